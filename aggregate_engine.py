@@ -0,0 +1,205 @@
+import io
+import os
+import csv
+import codecs
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from zip_fs import open_archive
+
+# Rows parsed per pandas chunk, which bounds memory per member
+CHUNK_ROWS = 200_000
+# Members smaller than this are read with the csv module, which beats pandas' setup cost
+VECTORIZE_MIN_BYTES = 1 << 20
+# Archives smaller than this are aggregated on the calling thread
+PARALLEL_THRESHOLD = 32 << 20
+# Bytes read from the start of a member to detect its encoding, delimiter and header
+SNIFF_BYTES = 64 << 10
+TEXT_EXTENSIONS = (".csv", ".tsv", ".txt")
+DELIMITERS = (",", "\t", ";", "|")
+AGGREGATES = ("sum", "count", "mean")
+
+# UTF-32 marks are checked first, since the UTF-32 LE mark starts with the UTF-16 LE one
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+logger = logging.getLogger(__name__)
+
+def sniff_encoding(prefix, declared=None):
+    """
+    Picks the encoding of a member from its byte-order mark, else the declared encoding.
+
+    Args:
+        prefix (bytes): The first bytes of the member.
+        declared (str): Encoding to assume when there is no byte-order mark; None means UTF-8.
+
+    Returns:
+        tuple: (encoding, detected), where detected is True if a byte-order mark decided it.
+    """
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding, True
+    return declared or "utf-8", False
+
+def sniff_header(prefix, encoding):
+    """
+    Decodes the first line of a member and returns (delimiter, column names).
+
+    The delimiter is the candidate from DELIMITERS that occurs most often in the header line.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    text = decoder.decode(prefix).lstrip("\ufeff")
+    first_line = text.splitlines()[0] if text else ""
+    delimiter = max(DELIMITERS, key=first_line.count)
+    columns = next(csv.reader([first_line], delimiter=delimiter), [])
+    return delimiter, columns
+
+def _number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def _aggregate_rows(text_stream, delimiter, key_column, value_column, symbols):
+    rows = csv.reader(text_stream, delimiter=delimiter)
+    header = next(rows)
+    key_index = header.index(key_column)
+    value_index = header.index(value_column)
+    symbols = set(symbols)
+    total = 0
+    count = 0
+    for row in rows:
+        if len(row) > key_index and row[key_index] in symbols:
+            total += _number(row[value_index])
+            count += 1
+    return total, count
+
+def _aggregate_stream(stream, encoding, delimiter, key_column, value_column, symbols, chunk_rows):
+    import pandas as pd
+
+    total = 0
+    count = 0
+    chunks = pd.read_csv(stream, sep=delimiter, encoding=encoding, usecols=[key_column, value_column],
+                         dtype=str, keep_default_na=False, chunksize=chunk_rows)
+    with chunks:
+        for chunk in chunks:
+            matched = chunk.loc[chunk[key_column].isin(symbols), value_column]
+            if matched.empty:
+                continue
+            total += pd.to_numeric(matched).sum().item()
+            count += len(matched)
+    return total, count
+
+def _is_utf8(prefix, complete):
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=complete)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+def aggregate_member(archive, name, symbols, key_column="symbol", value_column="value",
+                     encoding=None, fallback_encoding="cp1252", chunk_rows=CHUNK_ROWS):
+    """
+    Sums and counts the values of one member whose key is in symbols, streaming it in chunks.
+
+    A byte-order mark decides the encoding; otherwise the declared encoding is used, or UTF-8
+    if the member's first SNIFF_BYTES are valid UTF-8 and fallback_encoding if not. A member
+    that only turns out to be invalid UTF-8 further in is restarted in fallback_encoding.
+
+    Returns:
+        tuple: (sum, count), or None if the member lacks either column.
+    """
+    with archive.open(name) as stream:
+        prefix = stream.read(SNIFF_BYTES)
+    # Members shorter than the sniffing window are parsed from the bytes already read
+    complete = len(prefix) < SNIFF_BYTES
+    encoding, detected = sniff_encoding(prefix, encoding)
+    guessed = not detected and encoding == "utf-8" and bool(fallback_encoding)
+    if guessed and not _is_utf8(prefix, complete):
+        encoding, guessed = fallback_encoding, False
+    delimiter, columns = sniff_header(prefix, encoding)
+    if key_column not in columns or value_column not in columns:
+        logger.debug("Skipping %s: no %r and %r columns", name, key_column, value_column)
+        return None
+
+    def parse(encoding, delimiter):
+        if complete:
+            text = prefix.decode(encoding).lstrip("\ufeff")
+            return _aggregate_rows(io.StringIO(text, newline=""), delimiter, key_column, value_column, symbols)
+        if archive.size(name) < VECTORIZE_MIN_BYTES:
+            with archive.open_text(name, encoding=encoding, newline="") as text_stream:
+                return _aggregate_rows(text_stream, delimiter, key_column, value_column, symbols)
+        with archive.open(name) as stream:
+            return _aggregate_stream(stream, encoding, delimiter, key_column, value_column, symbols, chunk_rows)
+
+    try:
+        return parse(encoding, delimiter)
+    except UnicodeDecodeError:
+        if not guessed:
+            raise
+    logger.debug("Restarting %s as %s: not valid UTF-8", name, fallback_encoding)
+    return parse(fallback_encoding, sniff_header(prefix, fallback_encoding)[0])
+
+def aggregate_archive(source, symbols, aggregate="sum", key_column="symbol", value_column="value",
+                      members=None, encodings=None, fallback_encoding="cp1252", workers=None,
+                      chunk_rows=CHUNK_ROWS):
+    """
+    Aggregates the values of every row whose key is one of symbols, across the tabular members
+    of a ZIP archive.
+
+    Each member's encoding and delimiter are detected separately. Members of VECTORIZE_MIN_BYTES
+    or more are streamed through pandas in chunks of chunk_rows, smaller ones through the csv
+    module, so memory stays bounded however many rows they hold.
+    Archives of at least PARALLEL_THRESHOLD bytes are spread over a thread pool, one member per
+    task. Members without both columns are skipped.
+
+    Args:
+        source: Path to the ZIP file, its bytes, a file object or a ZipArchive.
+        symbols (iterable): Keys whose values are aggregated.
+        aggregate (str): "sum", "count" or "mean".
+        key_column (str): Column holding the keys.
+        value_column (str): Column holding the numeric values.
+        members (list): Members to read; defaults to those ending in TEXT_EXTENSIONS.
+        encodings (dict): Declared encodings by member name, for members without a byte-order mark.
+        fallback_encoding (str): Encoding retried when an undeclared member is not valid UTF-8.
+        workers (int): Worker count; None picks one per CPU for large archives and 1 otherwise.
+        chunk_rows (int): Rows parsed per chunk.
+
+    Returns:
+        The sum or count, or the mean (None when no row matched).
+    """
+    if aggregate not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate {aggregate!r}; expected one of {', '.join(AGGREGATES)}")
+    symbols = list(symbols)
+    encodings = encodings or {}
+    with open_archive(source) as archive:
+        if members is None:
+            members = [name for name in archive.names() if name.lower().endswith(TEXT_EXTENSIONS)]
+        total_size = sum(archive.size(name) for name in members)
+        if workers is None:
+            workers = min(os.cpu_count() or 1, 8) if total_size >= PARALLEL_THRESHOLD and len(members) > 1 else 1
+
+        def run(name):
+            return aggregate_member(archive, name, symbols, key_column, value_column,
+                                    encodings.get(name), fallback_encoding, chunk_rows)
+
+        if workers <= 1:
+            results = [run(name) for name in members]
+        else:
+            with ThreadPoolExecutor(workers) as executor:
+                results = list(executor.map(run, members))
+
+    results = [result for result in results if result is not None]
+    if not results:
+        raise ValueError(f"No member has {key_column!r} and {value_column!r} columns")
+    total = sum(result[0] for result in results)
+    count = sum(result[1] for result in results)
+    if aggregate == "count":
+        return count
+    if aggregate == "mean":
+        return total / count if count else None
+    return total
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+def normalize_question(question):
+    """
+    Collapses runs of whitespace so trivially reformatted questions share a cache entry.
+    """
+    return " ".join(question.split())
+
+_asset_hashes = {}
+_asset_lock = threading.Lock()
+
+def asset_fingerprint(path):
+    """
+    Fingerprints a bundled asset by modification time, size and content hash.
+
+    The SHA-256 is only recomputed when the file's mtime or size changes, so a warm
+    fingerprint costs a single stat call.
+
+    Args:
+        path (str): Path to the asset file.
+
+    Returns:
+        tuple: (path, mtime_ns, size, sha256), or (path, None, None, None) if the file is missing.
+    """
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return (path, None, None, None)
+
+    stamp = (stat_result.st_mtime_ns, stat_result.st_size)
+    with _asset_lock:
+        cached = _asset_hashes.get(path)
+    if cached is not None and cached[0] == stamp:
+        return (path,) + stamp + (cached[1],)
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    sha256 = digest.hexdigest()
+    with _asset_lock:
+        _asset_hashes[path] = (stamp, sha256)
+    return (path,) + stamp + (sha256,)
+
+def upload_digest(extracted_data):
+    """
+    Returns the SHA-256 of uploaded data, or None when nothing was uploaded.
+
+    Objects that already know their content hash expose it as a `sha256` attribute;
+    parsed uploads are hashed from their canonical JSON form.
+    """
+    if extracted_data is None:
+        return None
+    known = getattr(extracted_data, "sha256", None)
+    if isinstance(known, str):
+        return known
+    if isinstance(extracted_data, bytes):
+        payload = extracted_data
+    elif isinstance(extracted_data, str):
+        payload = extracted_data.encode("utf-8")
+    else:
+        payload = json.dumps(extracted_data, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+def is_error_answer(answer):
+    """
+    Handlers report failures as strings; those are never cached so transient errors can recover.
+    """
+    return isinstance(answer, str) and answer.startswith(("Error", "Exception occurred", "Invalid question format"))
+
+class AnswerCache:
+    """
+    Thread-safe LRU cache of answers with optional time-to-live.
+
+    Args:
+        max_size (int): Maximum number of entries; the least recently used entry is evicted first.
+        ttl (float): Seconds an entry stays valid, or None to keep entries until evicted.
+    """
+
+    def __init__(self, max_size=256, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.saved_seconds = 0.0
+        self._per_handler = {}
+
+    def make_key(self, handler_name, question, extracted_data=None, assets=()):
+        """
+        Builds the content-addressed key for a question.
+
+        Args:
+            handler_name (str): Name of the rule answering the question.
+            question (str): The question text.
+            extracted_data: Uploaded data, if any.
+            assets (list): Paths of bundled files the handler reads.
+
+        Returns:
+            tuple: A hashable cache key.
+        """
+        fingerprints = tuple(asset_fingerprint(path) for path in assets)
+        return (handler_name, normalize_question(question), upload_digest(extracted_data), fingerprints)
+
+    def _count(self, handler_name, field):
+        counters = self._per_handler.setdefault(handler_name, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def get(self, key):
+        """
+        Returns (True, answer) on a hit and (False, None) on a miss.
+        """
+        handler_name = key[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                answer, stored_at, compute_seconds = entry
+                if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                    del self._entries[key]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_seconds += compute_seconds
+                    self._count(handler_name, "hits")
+                    return True, answer
+            self.misses += 1
+            self._count(handler_name, "misses")
+            return False, None
+
+    def put(self, key, answer, compute_seconds=0.0):
+        """
+        Stores an answer, evicting least recently used entries beyond max_size.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (answer, time.monotonic(), compute_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached answer for key, calling compute() and storing its result on a miss.
+        """
+        found, answer = self.get(key)
+        if found:
+            return answer
+        started = time.perf_counter()
+        answer = compute()
+        if not is_error_answer(answer):
+            self.put(key, answer, time.perf_counter() - started)
+        return answer
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns hit/miss counters, overall and per handler, plus the compute time saved by hits.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "saved_seconds": self.saved_seconds,
+                "handlers": {name: dict(counters) for name, counters in self._per_handler.items()},
+            }
+
+def _env_float(name):
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+ANSWER_CACHE = AnswerCache(
+    max_size=int(os.environ.get("ANSWER_CACHE_SIZE", "256")),
+    ttl=_env_float("ANSWER_CACHE_TTL"),
+)
@@ -0,0 +1,230 @@
+"""
+Precomputed answers for handlers that only depend on bundled assets.
+
+Rules created with snapshot=True answer the same thing for every question, as a function of
+their asset files and the code they run. Running this module computes those answers once and
+writes them to answer_snapshot.json, keyed by the SHA-256 of every asset and of the code each
+answer depends on:
+
+    python answer_snapshot.py [--output answer_snapshot.json]
+    python answer_snapshot.py --check    # exit 1 if the stored snapshot is stale
+
+While an answer is computed, every application function it calls is recorded; the entry keeps
+a fingerprint of each of them (its source and the constant module globals it reads). Editing
+code an answer does not run leaves its entry valid. Set ANSWER_SNAPSHOT=off to always compute
+live.
+
+At runtime the snapshot is loaded on first use and checked once against the current hashes.
+Entries whose assets, or whose code, no longer match are dropped, and those rules fall back
+to live computation.
+"""
+import os
+import sys
+import json
+import types
+import hashlib
+import inspect
+import logging
+import argparse
+import importlib
+import threading
+from answer_cache import asset_fingerprint, is_error_answer
+
+SNAPSHOT_VERSION = 2
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_PATH = os.environ.get("ANSWER_SNAPSHOT_PATH", os.path.join(APP_DIR, "answer_snapshot.json"))
+
+logger = logging.getLogger(__name__)
+
+# Module globals of these types are treated as constants and fingerprinted with the code reading them
+CONSTANT_TYPES = (int, float, complex, str, bytes, bool, type(None), tuple, frozenset)
+
+def _global_names(code):
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            names |= _global_names(constant)
+    return names
+
+def function_fingerprint(dependency):
+    """
+    Fingerprints one recorded dependency, "module:qualname" of a module-level function or a
+    method, as the SHA-256 of its source and of the constant module globals it reads.
+    Nested functions are covered by the source of the function defining them.
+
+    Returns:
+        str: Hex digest, or None if the function no longer exists.
+    """
+    module_name, qualname = dependency.split(":", 1)
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        return None
+    target = module
+    for part in qualname.split("."):
+        target = getattr(target, part, None)
+    code = getattr(inspect.unwrap(target), "__code__", None) if target is not None else None
+    if code is None:
+        return None
+    digest = hashlib.sha256(inspect.getsource(code).encode("utf-8"))
+    for name in sorted(_global_names(code)):
+        value = vars(module).get(name)
+        if isinstance(value, CONSTANT_TYPES):
+            digest.update(f"\0{name}={value!r}".encode("utf-8"))
+    return digest.hexdigest()
+
+def code_hashes(dependencies):
+    return {dependency: function_fingerprint(dependency) for dependency in dependencies}
+
+def _is_app_code(code, app_dir=APP_DIR):
+    # Frozen and generated code has pseudo file names such as "<frozen abc>"
+    filename = code.co_filename
+    return (os.path.isabs(filename) and os.path.dirname(filename) == app_dir
+            and code.co_name != "<module>")
+
+def traced_call(function, *args):
+    """
+    Calls function(*args) and returns (result, dependencies): the "module:qualname" of every
+    application function called on this thread or on threads started meanwhile.
+    """
+    dependencies = set()
+
+    def profile(frame, event, arg):
+        if event == "call" and _is_app_code(frame.f_code):
+            qualname = frame.f_code.co_qualname.split(".<locals>", 1)[0]
+            if qualname != "<lambda>":
+                dependencies.add(f"{frame.f_globals.get('__name__')}:{qualname}")
+
+    threading.setprofile(profile)
+    sys.setprofile(profile)
+    try:
+        result = function(*args)
+    finally:
+        sys.setprofile(None)
+        threading.setprofile(None)
+    dependencies.discard(f"{__name__}:traced_call")
+    return result, sorted(dependencies)
+
+def asset_hashes(assets):
+    return {path: asset_fingerprint(path)[3] for path in assets}
+
+def build_snapshot(rules):
+    """
+    Computes the answers of every snapshot rule.
+
+    Args:
+        rules (list): Rule objects; only those with snapshot=True are computed.
+
+    Returns:
+        dict: The snapshot document, ready to be written as JSON.
+    """
+    entries = {}
+    for rule in rules:
+        if not rule.snapshot:
+            continue
+        answer, dependencies = traced_call(rule.handler, "", None)
+        if is_error_answer(answer):
+            logger.warning("Not snapshotting %s: %s", rule.name, answer)
+            continue
+        entries[rule.name] = {"assets": asset_hashes(rule.assets), "code": code_hashes(dependencies),
+                              "answer": answer}
+    return {"version": SNAPSHOT_VERSION, "entries": entries}
+
+class AnswerSnapshot:
+    """
+    Verified, read-only view of a snapshot file, loaded on first lookup.
+
+    Args:
+        path (str): Path to the snapshot JSON.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH, enabled=os.environ.get("ANSWER_SNAPSHOT", "on") != "off"):
+        self.path = path
+        self.enabled = enabled
+        self._answers = None
+        self._lock = threading.Lock()
+        self.rejected = {}
+        self.hits = 0
+
+    def _load(self):
+        answers = {}
+        try:
+            with open(self.path, encoding="utf-8") as source:
+                document = json.load(source)
+        except (OSError, ValueError) as e:
+            logger.info("No answer snapshot loaded from %s: %s", self.path, e)
+            return answers
+        if document.get("version") != SNAPSHOT_VERSION:
+            self.rejected["*"] = f"version {document.get('version')} != {SNAPSHOT_VERSION}"
+        else:
+            for name, entry in document.get("entries", {}).items():
+                if asset_hashes(entry["assets"]) != entry["assets"]:
+                    self.rejected[name] = "assets changed since the snapshot was built"
+                elif code_hashes(entry["code"]) != entry["code"]:
+                    changed = [dependency for dependency, digest in code_hashes(entry["code"]).items()
+                               if digest != entry["code"][dependency]]
+                    self.rejected[name] = f"code changed since the snapshot was built: {', '.join(changed)}"
+                else:
+                    answers[name] = entry["answer"]
+        for name, reason in self.rejected.items():
+            logger.warning("Answer snapshot entry %s ignored: %s", name, reason)
+        return answers
+
+    def answers(self):
+        if self._answers is None:
+            with self._lock:
+                if self._answers is None:
+                    self._answers = self._load()
+        return self._answers
+
+    def lookup(self, rule_name):
+        """
+        Returns (True, answer) if the snapshot holds a verified answer for the rule, else (False, None).
+        """
+        if not self.enabled:
+            return False, None
+        answers = self.answers()
+        if rule_name in answers:
+            self.hits += 1
+            return True, answers[rule_name]
+        return False, None
+
+    def stats(self):
+        return {"path": self.path, "entries": sorted(self.answers()), "rejected": dict(self.rejected),
+                "hits": self.hits}
+
+    def reload(self):
+        with self._lock:
+            self.rejected = {}
+            self._answers = None
+
+SNAPSHOT = AnswerSnapshot()
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute answers for asset-only handlers.")
+    parser.add_argument("--output", default=SNAPSHOT_PATH, help="snapshot file to write")
+    parser.add_argument("--check", action="store_true", help="only report whether the stored snapshot is current")
+    args = parser.parse_args()
+
+    # Handlers read their assets relative to the application directory
+    os.chdir(APP_DIR)
+    sys.path.insert(0, APP_DIR)
+    from question_handler import RULES
+    if args.check:
+        snapshot = AnswerSnapshot(args.output)
+        missing = [rule.name for rule in RULES if rule.snapshot and rule.name not in snapshot.answers()]
+        for name, reason in snapshot.rejected.items():
+            print(f"stale: {name}: {reason}")
+        if missing:
+            print(f"missing: {', '.join(missing)}")
+            sys.exit(1)
+        print(f"{args.output} is current")
+        return
+    document = build_snapshot(RULES)
+    with open(args.output, "w", encoding="utf-8") as out:
+        json.dump(document, out, indent=2, sort_keys=True, ensure_ascii=False)
+        out.write("\n")
+    print(f"Wrote {len(document['entries'])} answers to {args.output}")
+
+if __name__ == "__main__":
+    main()
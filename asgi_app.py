@@ -0,0 +1,322 @@
+"""
+Asynchronous (ASGI) serving mode for the question-answering API.
+
+Serves the same routes and contract as the Flask app in main.py: GET query parameters or a
+POST form with an optional "file" upload, JSON answers and the same CORS headers. Requests
+and responses are parsed and built with werkzeug, so form and multipart handling is identical.
+
+Cheap rules (constant answers, closed-form computations) run inline on the event loop. Rules
+marked with Rule.offload run on a bounded thread pool (blocking I/O, subprocesses, uploads)
+or process pool (CPU-bound archive work), so a slow handler never blocks other requests.
+
+Run with any ASGI server, e.g.:
+    uvicorn asgi_app:app --port 8000
+"""
+import os
+import sys
+import json
+import time
+import logging
+import asyncio
+import functools
+import contextvars
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from werkzeug.wrappers import Request, Response
+from werkzeug.exceptions import NotFound, MethodNotAllowed, InternalServerError
+from werkzeug.utils import redirect
+from file_handler import process_uploaded_file, spooled_stream_factory
+from question_handler import answer_routed, process_question, route_question, run_rule
+from answer_cache import ANSWER_CACHE, is_error_answer
+from batch import BatchError, answer_batch, parse_batch
+from metrics import METRICS, render_prometheus
+from http_cache import cache_answer_response
+from request_log import REQUEST_ID, configure_logging, new_request_id, timed_request
+
+THREAD_WORKERS = int(os.environ.get("ASYNC_THREAD_WORKERS", "32"))
+PROCESS_WORKERS = int(os.environ.get("ASYNC_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+# Requests allowed to wait for each pool, per worker, before new ones wait on the event loop
+QUEUE_DEPTH = 4
+# Request bodies larger than this are parsed on the thread pool instead of the event loop
+INLINE_BODY_LIMIT = 64 << 10
+
+FAVICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "favicon.ico")
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+class UploadRequest(Request):
+    # Each uploaded file is received into its own spooled buffer, as in main.py
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spooled_stream_factory(total_content_length, content_type, filename, content_length)
+
+def build_environ(scope, body, body_length):
+    """
+    Builds a WSGI environ for an ASGI HTTP scope, so werkzeug can parse the request.
+
+    Args:
+        scope (dict): The ASGI connection scope.
+        body: Seekable binary stream holding the request body.
+        body_length (int): Size of the body in bytes.
+    """
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client")
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0] if client else "",
+        "CONTENT_LENGTH": str(body_length),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_LENGTH":
+            continue
+        key = name if name == "CONTENT_TYPE" else "HTTP_" + name
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def json_response(payload, status=200):
+    # Same encoding as Flask's jsonify outside debug mode
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True) + "\n"
+    return Response(body, status=status, mimetype="application/json")
+
+def _build_cors_preflight_response():
+    response = json_response({})
+    response.headers.add("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+    response.headers.add("Access-Control-Allow-Headers", "Content-Type, Authorization")
+    return response
+
+def _answer_upload(question, file):
+    # Runs on the thread pool: parsing the upload and answering from it both block
+    extracted_data = process_uploaded_file(file)
+    try:
+        return process_question(question, extracted_data)
+    finally:
+        if hasattr(extracted_data, "close"):
+            extracted_data.close()
+
+class AsyncQuestionApp:
+    """
+    The ASGI application. Pools are created on first use and shut down on lifespan shutdown.
+
+    Args:
+        thread_workers (int): Size of the thread pool for blocking handlers and uploads.
+        process_workers (int): Size of the process pool for CPU-bound handlers.
+    """
+
+    def __init__(self, thread_workers=THREAD_WORKERS, process_workers=PROCESS_WORKERS):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._thread_pool = None
+        self._process_pool = None
+        self._slots = None
+
+    def _pool(self, kind):
+        if kind == "process" and self.process_workers > 0:
+            if self._process_pool is None:
+                # Workers are spawned, not forked, since the server process already runs threads
+                self._process_pool = ProcessPoolExecutor(
+                    self.process_workers, mp_context=multiprocessing.get_context("spawn"))
+            return "process", self._process_pool
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(self.thread_workers, thread_name_prefix="answer")
+        return "thread", self._thread_pool
+
+    async def offload(self, kind, function, *args):
+        """
+        Runs function(*args) on the thread or process pool and awaits its result.
+
+        At most QUEUE_DEPTH calls per worker are handed to each pool; further callers wait on
+        the event loop, so a burst of slow requests cannot queue unbounded work.
+        """
+        kind, pool = self._pool(kind)
+        if kind == "thread":
+            # Carry the request id into the worker thread so its log records are attributed
+            function = functools.partial(contextvars.copy_context().run, function)
+        if self._slots is None:
+            self._slots = {
+                "thread": asyncio.Semaphore(self.thread_workers * QUEUE_DEPTH),
+                "process": asyncio.Semaphore(max(self.process_workers, 1) * QUEUE_DEPTH),
+            }
+        async with self._slots[kind]:
+            return await asyncio.get_running_loop().run_in_executor(pool, function, *args)
+
+    async def answer(self, question):
+        """
+        Answers a question without an upload, inline or on a pool depending on its rule.
+
+        Offloaded rules go through the same answer_routed as the Flask app, on the thread pool,
+        so snapshot, cache and single-flight coalescing behave identically; rules marked
+        "process" have only their handler shipped on to the process pool.
+        """
+        rule = route_question(question)
+        if rule is None or rule.offload is None:
+            return answer_routed(rule, question, None)
+        run = self._run_in_process if rule.offload == "process" else None
+        return await self.offload("thread", answer_routed, rule, question, None, run)
+
+    def _run_in_process(self, rule, question, extracted_data):
+        # Runs on a thread-pool worker, which waits for the process pool
+        kind, pool = self._pool("process")
+        if kind != "process":
+            return rule.handler(question, extracted_data)
+        return pool.submit(run_rule, rule.name, question).result()
+
+    async def answer_question(self, request, body_length):
+        if request.method == "OPTIONS":
+            return _build_cors_preflight_response()
+
+        if request.method in ("GET", "HEAD"):
+            question = request.args.get("question")
+            file = None
+        else:
+            if body_length > INLINE_BODY_LIMIT:
+                await self.offload("thread", lambda: request.form)
+            question = request.form.get("question")
+            file = request.files.get("file")
+
+        if not question:
+            return json_response({"error": "No question provided"}, 400)
+
+        if file:
+            answer = await self.offload("thread", _answer_upload, question, file)
+        else:
+            answer = await self.answer(question)
+        cacheable = request.method in ("GET", "HEAD") and not file and not is_error_answer(answer)
+        return cache_answer_response(request, json_response({"answer": str(answer)}), cacheable)
+
+    async def answer_batch(self, request, body_length):
+        if request.method == "OPTIONS":
+            return _build_cors_preflight_response()
+        if body_length > INLINE_BODY_LIMIT:
+            await self.offload("thread", lambda: request.form)
+        payload = request.form.get("questions") if request.form else request.get_json(silent=True)
+        try:
+            items = parse_batch(payload)
+        except BatchError as e:
+            return json_response({"error": str(e)}, 400)
+        started = time.perf_counter()
+        answers = await self.offload("thread", answer_batch, items, request.files)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        return json_response({"answers": answers, "time_ms": elapsed_ms})
+
+    async def dispatch(self, request, environ, body_length):
+        path = request.path
+        if path == "/api":
+            return redirect(request.url.replace("/api", "/api/", 1), 308)
+        if path == "/api/":
+            if request.method not in ("GET", "HEAD", "POST", "OPTIONS"):
+                return MethodNotAllowed(["GET", "HEAD", "OPTIONS", "POST"]).get_response(environ)
+            return await self.answer_question(request, body_length)
+        if path == "/api/batch":
+            if request.method not in ("POST", "OPTIONS"):
+                return MethodNotAllowed(["OPTIONS", "POST"]).get_response(environ)
+            return await self.answer_batch(request, body_length)
+        if path == "/metrics":
+            if request.method not in ("GET", "HEAD", "OPTIONS"):
+                return MethodNotAllowed(["GET", "HEAD", "OPTIONS"]).get_response(environ)
+            return Response(render_prometheus(METRICS, ANSWER_CACHE.stats()),
+                            content_type="text/plain; version=0.0.4; charset=utf-8")
+        if path == "/api/cache-stats":
+            if request.method not in ("GET", "HEAD", "OPTIONS"):
+                return MethodNotAllowed(["GET", "HEAD", "OPTIONS"]).get_response(environ)
+            return json_response(ANSWER_CACHE.stats())
+        if path == "/":
+            if request.method not in ("GET", "HEAD", "POST", "OPTIONS"):
+                return MethodNotAllowed(["GET", "HEAD", "OPTIONS", "POST"]).get_response(environ)
+            return Response("Hello, World!", mimetype="text/html")
+        if path == "/favicon.ico" and os.path.exists(FAVICON_PATH):
+            with open(FAVICON_PATH, "rb") as favicon:
+                return Response(favicon.read(), mimetype="image/vnd.microsoft.icon")
+        return NotFound().get_response(environ)
+
+    async def _read_body(self, receive):
+        body = spooled_stream_factory()
+        length = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            body.write(chunk)
+            length += len(chunk)
+            more_body = message.get("more_body", False)
+        body.seek(0)
+        return body, length
+
+    async def _send(self, send, response, method):
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        body = b"" if method == "HEAD" else response.get_data()
+        headers = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                   for name, value in response.headers.items()]
+        await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def close(self):
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+            self._process_pool = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        started = time.perf_counter()
+        body, body_length = await self._read_body(receive)
+        try:
+            environ = build_environ(scope, body, body_length)
+            request = UploadRequest(environ)
+            token = new_request_id(request.headers.get("X-Request-ID"))
+            try:
+                try:
+                    response = await self.dispatch(request, environ, body_length)
+                except Exception:
+                    logger.exception("Unhandled error answering %s %s", scope["method"], scope["path"])
+                    response = InternalServerError().get_response(environ)
+                finally:
+                    request.close()
+                await self._send(send, response, scope["method"])
+                timed_request(scope["method"], scope["path"], response.status_code, started)
+            finally:
+                REQUEST_ID.reset(token)
+        finally:
+            body.close()
+
+app = AsyncQuestionApp()
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("The async serving mode needs an ASGI server: pip install uvicorn")
+    uvicorn.run(app, host="0.0.0.0", port=8000)
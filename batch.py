@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from file_handler import process_uploaded_file
+from question_handler import process_question
+
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", str(min(32, (os.cpu_count() or 1) * 4))))
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "500"))
+
+_executor = None
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(BATCH_WORKERS, thread_name_prefix="batch")
+    return _executor
+
+class BatchError(ValueError):
+    """
+    Raised for a batch request that cannot be processed at all, as opposed to a failing item.
+    """
+
+def parse_batch(payload):
+    """
+    Normalizes a batch payload into a list of (question, file_field) pairs.
+
+    Args:
+        payload: Either a list, or a dict with a "questions" list. Each entry is a question
+            string or an object {"question": ..., "file": <name of a multipart file field>}.
+
+    Returns:
+        list: (question, file_field) pairs; file_field is None when no file is referenced.
+    """
+    if isinstance(payload, str):
+        try:
+            payload = json.loads(payload)
+        except ValueError as e:
+            raise BatchError(f"Invalid JSON: {str(e)}")
+    if isinstance(payload, dict):
+        payload = payload.get("questions")
+    if not isinstance(payload, list):
+        raise BatchError("Expected a list of questions")
+    if len(payload) > MAX_BATCH_SIZE:
+        raise BatchError(f"At most {MAX_BATCH_SIZE} questions are allowed per batch")
+    items = []
+    for entry in payload:
+        if isinstance(entry, dict):
+            items.append((entry.get("question"), entry.get("file")))
+        else:
+            items.append((entry, None))
+    return items
+
+def _answer_one(question):
+    started = time.perf_counter()
+    try:
+        result = {"answer": str(process_question(question, None))}
+    except Exception as e:
+        result = {"error": str(e)}
+    result["time_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+def _answer_with_file(questions, file):
+    # Questions sharing an upload run in turn, since they read the same upload stream
+    results = {}
+    extracted_data = None
+    try:
+        extracted_data = process_uploaded_file(file)
+        for question in questions:
+            started = time.perf_counter()
+            try:
+                result = {"answer": str(process_question(question, extracted_data))}
+            except Exception as e:
+                result = {"error": str(e)}
+            result["time_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            results[question] = result
+    except Exception as e:
+        for question in questions:
+            results.setdefault(question, {"error": f"Error processing file: {str(e)}", "time_ms": 0.0})
+    finally:
+        if hasattr(extracted_data, "close"):
+            extracted_data.close()
+    return results
+
+def answer_batch(items, files=None):
+    """
+    Answers a batch of questions concurrently on a bounded thread pool.
+
+    Identical (question, file) pairs are answered once. Questions without a file run as
+    independent tasks; questions referencing the same upload share one parse of it.
+
+    Args:
+        items (list): (question, file_field) pairs, as returned by parse_batch.
+        files (dict): Uploaded files by multipart field name.
+
+    Returns:
+        list: One dict per item, in input order, holding "answer" or "error", "time_ms", and
+            "duplicate": true for items answered by an earlier identical one.
+    """
+    files = files or {}
+    results = [None] * len(items)
+    first_seen = {}
+    plain = {}
+    by_file = {}
+    for index, (question, file_field) in enumerate(items):
+        if not isinstance(question, str) or not question:
+            results[index] = {"error": "No question provided", "time_ms": 0.0}
+            continue
+        if file_field is not None and file_field not in files:
+            results[index] = {"error": f"No file uploaded as {file_field!r}", "time_ms": 0.0}
+            continue
+        key = (question, file_field)
+        if key in first_seen:
+            continue
+        first_seen[key] = index
+        if file_field is None:
+            plain[question] = None
+        else:
+            by_file.setdefault(file_field, []).append(question)
+
+    pool = _pool()
+    # Each task runs in a copy of the caller's context, so its log records keep the request id
+    plain_futures = {question: pool.submit(contextvars.copy_context().run, _answer_one, question)
+                     for question in plain}
+    file_futures = {field: pool.submit(contextvars.copy_context().run, _answer_with_file, questions, files[field])
+                    for field, questions in by_file.items()}
+    answers = {}
+    for question, future in plain_futures.items():
+        answers[(question, None)] = future.result()
+    for field, future in file_futures.items():
+        for question, result in future.result().items():
+            answers[(question, field)] = result
+
+    for index, (question, file_field) in enumerate(items):
+        if results[index] is not None:
+            continue
+        key = (question, file_field)
+        result = dict(answers[key])
+        if first_seen[key] != index:
+            result["duplicate"] = True
+        results[index] = result
+    return results
@@ -0,0 +1,159 @@
+"""
+Load comparison between the Flask app (main.py) and the async serving mode (asgi_app.py).
+
+Fires a mix of cheap constant-answer questions and slow archive/hash questions at both apps
+with the given number of concurrent clients. The answer cache is disabled so slow handlers do
+their full work on every request. Reports throughput and latency percentiles per class.
+
+By default both apps are driven in-process: Flask through its test client on one thread per
+client (as a threaded WSGI server would), the ASGI app through direct calls on one event loop.
+With --flask-url and --asgi-url the same load is sent over HTTP to running servers instead, e.g.
+    python main.py  &  uvicorn asgi_app:app --port 8001  &
+    python benchmarks/bench_async.py --flask-url http://127.0.0.1:8000 --asgi-url http://127.0.0.1:8001
+
+Usage:
+    python benchmarks/bench_async.py [--clients 200] [--requests 2000] [--slow-ratio 0.05]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FAST_QUESTIONS = [
+    "What is the Vercel URL?",
+    "What is the GitHub Pages URL?",
+    "How many Wednesdays are there in the date range 1981-03-03 to 2007-10-20?",
+    "What is the total number of ducks across players on page number 6 of ESPN Cricinfo's ODI batting stats?",
+    "What is the Docker image URL?",
+]
+
+SLOW_QUESTIONS = [
+    "Replace all \"IITM\" with \"IIT Madras\" in all files. What does running cat * | sha256sum in that folder show in bash?",
+    "Rename all files replacing each digit with the next. What does running grep . * | LC_ALL=C sort | sha256sum in bash on that folder show?",
+    "How many lines are different between a.txt and b.txt?",
+    "What's the total size of all files at least 800 bytes large and modified on or after Tue, 27 Mar, 2007, 10:13 pm IST?",
+]
+
+def build_workload(count, slow_ratio, seed=0):
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(count):
+        slow = rng.random() < slow_ratio
+        workload.append((slow, rng.choice(SLOW_QUESTIONS if slow else FAST_QUESTIONS)))
+    return workload
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+def report(label, elapsed, timings):
+    total = len(timings["fast"]) + len(timings["slow"])
+    print(f"{label:<10} {total / elapsed:9.1f} req/s  wall {elapsed:6.2f} s")
+    for kind in ("fast", "slow"):
+        values = [value * 1000 for value in timings[kind]]
+        print(f"  {kind:<5} n={len(values):<6} p50 {percentile(values, 0.50):9.2f} ms  "
+              f"p95 {percentile(values, 0.95):9.2f} ms  p99 {percentile(values, 0.99):9.2f} ms")
+
+def run_threaded(workload, clients, request):
+    timings = {"fast": [], "slow": []}
+
+    def one(item):
+        slow, question = item
+        started = time.perf_counter()
+        request(question)
+        return slow, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        for slow, elapsed in pool.map(one, workload):
+            timings["slow" if slow else "fast"].append(elapsed)
+    return time.perf_counter() - started, timings
+
+def flask_in_process(workload, clients):
+    from main import app
+    client = app.test_client()
+    return run_threaded(workload, clients,
+                        lambda question: client.get("/api/", query_string={"question": question}).get_data())
+
+def http_client(base_url):
+    def request(question):
+        url = base_url.rstrip("/") + "/api/?" + urllib.parse.urlencode({"question": question})
+        with urllib.request.urlopen(url) as response:
+            return response.read()
+    return request
+
+async def _asgi_call(app, question):
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/", "http_version": "1.1", "scheme": "http",
+        "query_string": urllib.parse.urlencode({"question": question}).encode(),
+        "headers": [], "server": ("localhost", 80), "client": ("127.0.0.1", 0),
+    }
+    await app(scope, receive, send)
+
+def asgi_in_process(workload, clients):
+    from asgi_app import AsyncQuestionApp
+    app = AsyncQuestionApp()
+
+    async def drive():
+        timings = {"fast": [], "slow": []}
+        gate = asyncio.Semaphore(clients)
+
+        async def one(slow, question):
+            async with gate:
+                started = time.perf_counter()
+                await _asgi_call(app, question)
+                timings["slow" if slow else "fast"].append(time.perf_counter() - started)
+
+        # Warm the pools so worker start-up is not billed to the first requests
+        await asyncio.gather(*(_asgi_call(app, question) for question in SLOW_QUESTIONS))
+        started = time.perf_counter()
+        await asyncio.gather(*(one(slow, question) for slow, question in workload))
+        return time.perf_counter() - started, timings
+
+    try:
+        return asyncio.run(drive())
+    finally:
+        app.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per app")
+    parser.add_argument("--slow-ratio", type=float, default=0.05, help="fraction of slow questions")
+    parser.add_argument("--flask-url", help="base URL of a running Flask server")
+    parser.add_argument("--asgi-url", help="base URL of a running ASGI server")
+    args = parser.parse_args()
+
+    from answer_cache import ANSWER_CACHE
+    ANSWER_CACHE.max_size = 0
+
+    workload = build_workload(args.requests, args.slow_ratio)
+    print(f"{args.requests} requests, {args.clients} clients, {args.slow_ratio:.0%} slow, cache disabled")
+    if args.flask_url or args.asgi_url:
+        if args.flask_url:
+            report("flask", *run_threaded(workload, args.clients, http_client(args.flask_url)))
+        if args.asgi_url:
+            report("asgi", *run_threaded(workload, args.clients, http_client(args.asgi_url)))
+        return
+    report("flask", *flask_in_process(workload, args.clients))
+    report("asgi", *asgi_in_process(workload, args.clients))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark for weekday counting.
+
+Times the closed-form count_weekdays against the day-by-day loop that count_wednesdays used
+to run, for ranges from a month to ten thousand years, and the NumPy batch path for scoring
+many ranges at once. The closed form should stay flat as the range grows.
+
+Usage:
+    python benchmarks/bench_calendar.py [--number 200]
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_engine import count_weekdays, count_weekdays_batch
+
+# The iteration is too slow to time beyond this many days
+ITERATION_LIMIT_DAYS = 400_000
+
+def count_by_iteration(start, end, weekday):
+    count = 0
+    current = start
+    while current <= end:
+        if current.weekday() == weekday:
+            count += 1
+        current += timedelta(days=1)
+    return count
+
+def time_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    start = date(1, 1, 1)
+    print(f"{'range':<12} {'days':>10} {'iteration us':>14} {'closed form us':>15}")
+    for label, days in [("1 month", 31), ("1 year", 365), ("100 years", 36_524),
+                        ("1000 years", 365_242), ("9000 years", 3_287_181)]:
+        end = start + timedelta(days=days - 1)
+        closed = time_call(lambda: count_weekdays(start, end, 2), args.number)
+        if days <= ITERATION_LIMIT_DAYS:
+            assert count_by_iteration(start, end, 2) == count_weekdays(start, end, 2)
+            iterated = f"{time_call(lambda: count_by_iteration(start, end, 2), 1):.1f}"
+        else:
+            iterated = "skipped"
+        print(f"{label:<12} {days:>10} {iterated:>14} {closed:>15.2f}")
+
+    rng = np.random.default_rng(0)
+    for size in (1_000, 100_000):
+        starts = np.datetime64("1900-01-01") + rng.integers(0, 50_000, size)
+        ends = starts + rng.integers(0, 20_000, size)
+        ranges = list(zip(starts.tolist(), ends.tolist()))
+        batch = time_call(lambda: count_weekdays_batch(starts, ends, 2), 3)
+        scalar = time_call(lambda: [count_weekdays(a, b, 2) for a, b in ranges], 1)
+        print(f"\nbatch of {size} ranges: numpy {batch / 1000:.2f} ms, scalar loop {scalar / 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark for the spreadsheet formula engine.
+
+Times evaluate_formula against the code that answered =SUM(TAKE(SORTBY(...))) questions before
+the engine, which scraped the two array literals with regular expressions and sorted them with
+sorted(), on the real question and on SORTBY literals of growing size. Sort keys are distinct,
+so both give the same answer; the engine should stay close to the old code on the real question
+and beat it once numpy does the sorting.
+
+Usage:
+    python benchmarks/bench_formula.py [--number 200]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formula_engine import evaluate_formula, extract_formula
+
+REAL_QUESTION = ("Let's make sure you can write formulas in Excel. Type this formula into Excel: "
+                 "=SUM(TAKE(SORTBY({1,10,12,4,6,8,9,13,6,15,14,15,2,13,0,3}, "
+                 "{10,9,13,2,11,8,16,14,7,15,5,4,6,1,3,12}), 1, 6)) What is the result?")
+
+def answer_by_scraping(question):
+    arrays = re.findall(r'\{[^}]*\}', question)
+    params = re.findall(r'TAKE\(.*?,\s*(\d+)\)', question)
+    values = list(map(int, arrays[0][1:-1].split(',')))
+    sort_order = list(map(int, arrays[1][1:-1].split(',')))
+    sorted_values = [x for _, x in sorted(zip(sort_order, values))]
+    return sum(sorted_values[:int(params[0])])
+
+def answer_with_engine(question):
+    return evaluate_formula(extract_formula(question))
+
+def sortby_question(size):
+    rng = random.Random(1)
+    values = ",".join(str(rng.randrange(1000)) for _ in range(size))
+    keys = ",".join(str(key) for key in rng.sample(range(10 ** 6), size))
+    return f"=SUM(TAKE(SORTBY({{{values}}}, {{{keys}}}), 1, {size // 10}))"
+
+def time_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'question':<16} {'scraping us':>12} {'engine us':>10} {'ratio':>6}")
+    cases = [("real question", REAL_QUESTION)] + [(f"SORTBY of {size}", sortby_question(size))
+                                                   for size in (100, 2_000, 20_000)]
+    for label, question in cases:
+        assert answer_with_engine(question) == answer_by_scraping(question), label
+        number = max(args.number * 100 // len(question), 1)
+        scraping = time_call(lambda: answer_by_scraping(question), number)
+        engine = time_call(lambda: answer_with_engine(question), number)
+        print(f"{label:<16} {scraping:>12.1f} {engine:>10.1f} {engine / scraping:>6.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark for replace_and_hash on large archives.
+
+Builds a synthetic archive above PARALLEL_MIN_BYTES from deflated and stored members, with
+CRLF line endings, mixed-case matches and one member too large to buffer, and times the
+sequential path against the process pool. The pool must give the same digest as the
+sequential path for every kind of source, or the script fails.
+
+Usage:
+    python benchmarks/bench_replace.py [--size-mb 64] [--workers 4]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import replace_engine
+from replace_engine import replace_and_hash
+from zip_fs import ZipArchive
+
+WORDS = ["IITM", "iitm", "IitM", "data", "science", "madras", "IIT", "M"]
+
+def make_archive(size_mb, seed=0):
+    rng = random.Random(seed)
+    out = io.BytesIO()
+    total = 0
+    index = 0
+    with zipfile.ZipFile(out, "w") as archive:
+        while total < size_mb << 20:
+            if index == 0:
+                # Larger than MAX_BUFFERED_MEMBER, so it is streamed in place between worker results
+                size = replace_engine.MAX_BUFFERED_MEMBER + 1024
+            else:
+                size = rng.randrange(64 << 10, 4 << 20)
+            line = " ".join(rng.choice(WORDS) for _ in range(12))
+            ending = "\r\n" if index % 3 == 0 else "\n"
+            text = (line + ending) * (size // (len(line) + len(ending)) + 1)
+            method = zipfile.ZIP_STORED if index % 4 == 1 else zipfile.ZIP_DEFLATED
+            archive.writestr(f"file{index:04d}.txt", text, compress_type=method)
+            total += len(text)
+            index += 1
+    return out.getvalue(), index, total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=64, help="uncompressed size of the synthetic archive")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    data, members, total = make_archive(args.size_mb)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_bench_replace.zip")
+    with open(path, "wb") as out:
+        out.write(data)
+    try:
+        print(f"{members} members, {total / 2 ** 20:.0f} MiB uncompressed, {len(data) / 2 ** 20:.0f} MiB compressed")
+        started = time.perf_counter()
+        expected = replace_and_hash(path, "IITM", "IIT Madras", workers=1)
+        print(f"sequential       {(time.perf_counter() - started) * 1000:>9.0f} ms")
+        sources = [("path", lambda: path), ("bytes", lambda: data), ("ZipArchive", lambda: ZipArchive(data))]
+        for label, source in sources:
+            started = time.perf_counter()
+            digest = replace_and_hash(source(), "IITM", "IIT Madras", workers=args.workers)
+            print(f"pool, {label:<10} {(time.perf_counter() - started) * 1000:>9.0f} ms")
+            assert digest == expected, f"{label}: {digest} != {expected}"
+    finally:
+        os.remove(path)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
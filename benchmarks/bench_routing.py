@@ -0,0 +1,84 @@
+"""
+Micro-benchmark for question routing.
+
+Compares the Aho-Corasick automaton (QuestionRouter.route_automaton) against the linear
+if-chain it replaced (QuestionRouter.route_linear) for questions that hit the first rule,
+the last rule or no rule, on the real registry and on synthetic registries with many more rules.
+It also times the fuzzy trigram index (QuestionIndex) that routes questions no trigger matches.
+
+Usage:
+    python benchmarks/bench_routing.py [--repeat 5] [--number 2000]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from router import Rule, QuestionRouter, QuestionIndex
+from question_handler import FUZZY_INDEX, ROUTER
+
+PADDING = "Please answer the following question about the assignment carefully. "
+
+def build_cases(router):
+    first = router.rules[0].triggers[0]
+    last = router.rules[-1].triggers[0]
+    return {
+        "first rule": PADDING + first + "?",
+        "last rule": PADDING * 3 + last + "?",
+        "no rule": PADDING * 4,
+    }
+
+def synthetic_router(rule_count, seed=0):
+    rng = random.Random(seed)
+    rules = []
+    for index in range(rule_count):
+        trigger = "".join(rng.choice(string.ascii_letters + " ") for _ in range(rng.randint(8, 24)))
+        rules.append(Rule(f"synthetic_{index}", [trigger], None, index))
+    return QuestionRouter(rules)
+
+def time_call(func, argument, number, repeat):
+    timings = timeit.repeat(lambda: func(argument), number=number, repeat=repeat)
+    return min(timings) / number * 1e6
+
+def run(router, label, number, repeat):
+    print(f"\n{label} ({len(router.rules)} rules, route() uses {router.strategy})")
+    print(f"{'case':<12} {'chars':>6} {'linear us':>10} {'automaton us':>13} {'speedup':>8}")
+    for case, question in build_cases(router).items():
+        assert router.route_automaton(question) is router.route_linear(question)
+        linear = time_call(router.route_linear, question, number, repeat)
+        automaton = time_call(router.route_automaton, question, number, repeat)
+        print(f"{case:<12} {len(question):>6} {linear:>10.2f} {automaton:>13.2f} {linear / automaton:>7.2f}x")
+
+def synthetic_index(text_count, seed=0):
+    rng = random.Random(seed)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9))) for _ in range(2000)]
+    return QuestionIndex([(" ".join(rng.choice(words) for _ in range(rng.randint(8, 25))), index)
+                          for index in range(text_count)])
+
+def run_fuzzy(index, label, number, repeat):
+    question = PADDING + "How many lines differ between the two files?"
+    index.route(question)
+    fuzzy = time_call(index.route, question, number, repeat)
+    print(f"{label:<28} {len(index.documents):>6} texts {fuzzy:>10.2f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    run(ROUTER, "question_handler registry", args.number, args.repeat)
+    for rule_count in (200, 1000):
+        run(synthetic_router(rule_count), "synthetic registry", args.number, args.repeat)
+
+    print("\nfuzzy index, unmatched question")
+    run_fuzzy(FUZZY_INDEX, "question_handler registry", args.number, args.repeat)
+    for text_count in (200, 1000):
+        run_fuzzy(synthetic_index(text_count), "synthetic registry", args.number, args.repeat)
+
+if __name__ == "__main__":
+    main()
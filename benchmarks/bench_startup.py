@@ -0,0 +1,126 @@
+"""
+Cold-start profiler and time-to-first-response check.
+
+Starts fresh interpreters that import the app and answer one constant question through the
+Flask test client (or the ASGI app), and reports the median import time and time to first
+response. It also checks which heavy libraries got imported: pandas, numpy, PyPDF2, openpyxl,
+gspread and oauth2client must stay unloaded until a handler or upload type needs them. The
+script exits non-zero when the median first response exceeds --budget-ms or a deferred
+library is loaded on the constant-answer path.
+
+With --profile it also prints an import-time breakdown from `python -X importtime`, summed
+per top-level package.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 1000] [--profile] [--app main]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED_MODULES = ("pandas", "numpy", "PyPDF2", "openpyxl", "gspread", "oauth2client")
+QUESTION = "What is the Vercel URL?"
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import {app}
+imported = time.perf_counter()
+if "{app}" == "main":
+    client = {app}.app.test_client()
+    body = client.get("/api/", query_string={{"question": {question!r}}}).get_data()
+else:
+    import asyncio, urllib.parse
+    messages = [{{"type": "http.request", "body": b"", "more_body": False}}]
+    sent = []
+    async def receive():
+        return messages.pop()
+    async def send(message):
+        sent.append(message)
+    scope = {{"type": "http", "method": "GET", "path": "/api/", "http_version": "1.1",
+              "query_string": urllib.parse.urlencode({{"question": {question!r}}}).encode(), "headers": []}}
+    asyncio.run({app}.app(scope, receive, send))
+    body = sent[-1]["body"]
+answered = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_response_ms": (answered - started) * 1000,
+    "loaded": [name for name in {deferred!r} if name in sys.modules],
+    "body": body.decode(),
+}}))
+"""
+
+def run_child(app):
+    code = CHILD.format(app=app, question=QUESTION, deferred=DEFERRED_MODULES)
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+def import_profile(app, top):
+    """
+    Prints self import time summed per top-level package, and the slowest modules by cumulative time.
+    """
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {app}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    per_package = defaultdict(int)
+    cumulative = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        per_package[name.split(".")[0]] += int(self_us)
+        cumulative.append((int(cumulative_us), name))
+    total = sum(per_package.values())
+    print(f"\nimport {app}: {total / 1000:.1f} ms of module execution")
+    print(f"{'package':<28} {'self ms':>9} {'share':>7}")
+    for package, self_us in sorted(per_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<28} {self_us / 1000:>9.1f} {self_us / total:>7.1%}")
+    print(f"\n{'module':<40} {'cumulative ms':>14}")
+    for cumulative_us, name in sorted(cumulative, reverse=True)[:top]:
+        print(f"{name:<40} {cumulative_us / 1000:>14.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--budget-ms", type=float, default=1000.0,
+                        help="maximum median time from import to first response")
+    parser.add_argument("--app", choices=["main", "asgi_app"], default="main", help="module serving the app")
+    parser.add_argument("--profile", action="store_true", help="print an import-time breakdown")
+    parser.add_argument("--top", type=int, default=15, help="rows in the import-time breakdown")
+    args = parser.parse_args()
+
+    results = [run_child(args.app) for _ in range(args.runs)]
+    import_ms = statistics.median(result["import_ms"] for result in results)
+    first_ms = statistics.median(result["first_response_ms"] for result in results)
+    process_ms = statistics.median(result["process_ms"] for result in results)
+    loaded = sorted({name for result in results for name in result["loaded"]})
+    print(f"{args.app}: import {import_ms:.1f} ms, first response {first_ms:.1f} ms, "
+          f"whole process {process_ms:.1f} ms (median of {args.runs})")
+    print(f"deferred libraries loaded: {', '.join(loaded) or 'none'}")
+
+    if args.profile:
+        import_profile(args.app, args.top)
+
+    problems = []
+    if first_ms > args.budget_ms:
+        problems.append(f"first response took {first_ms:.1f} ms, budget is {args.budget_ms:.0f} ms")
+    if loaded:
+        problems.append(f"constant-answer path imported {', '.join(loaded)}")
+    if problems:
+        print("\nFAILED:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
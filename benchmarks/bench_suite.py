@@ -0,0 +1,270 @@
+"""
+Benchmark suite for question_handler.py and file_handler.py.
+
+Runs every case in benchmarks/corpus.py against process_question directly and through the
+Flask test client, and reports per-case median latency and tracemalloc peak memory. Results are
+compared against a stored baseline. A case whose answer changes, a rule no case covers and a
+case routed to the wrong rule are failures, and the script exits non-zero. A case that gets
+slower or hungrier than the tolerance allows is only reported: the committed baseline was
+recorded on one machine, so its timings are a guide on any other. Pass --strict-timing to fail
+on those too, against a baseline recorded on the same host with --update-baseline.
+
+The answer cache and PDF text cache are cleared before every run, and the precomputed answer
+snapshot is bypassed unless --with-snapshot is given, so each measurement covers the full
+computation.
+
+Usage:
+    python benchmarks/bench_suite.py [--repeat 5] [--scale 1.0] [--mode both] [--cases NAME ...]
+    python benchmarks/bench_suite.py --update-baseline
+    python benchmarks/bench_suite.py --strict-timing
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from werkzeug.datastructures import FileStorage
+
+from corpus import CASES
+from answer_cache import ANSWER_CACHE
+from answer_snapshot import SNAPSHOT
+from pdf_engine import PDF_TEXT_CACHE
+from file_handler import process_uploaded_file
+from question_handler import RULES, UPLOADED_DATA_RULE, process_question, route_question
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def answer_digest(answer):
+    return hashlib.sha256(str(answer).encode("utf-8")).hexdigest()
+
+def reset_caches():
+    ANSWER_CACHE.clear()
+    PDF_TEXT_CACHE.clear()
+
+def run_direct(question, upload):
+    extracted_data = None
+    if upload is not None:
+        filename, data = upload
+        extracted_data = process_uploaded_file(FileStorage(io.BytesIO(data), filename=filename))
+    try:
+        return process_question(question, extracted_data)
+    finally:
+        if hasattr(extracted_data, "close"):
+            extracted_data.close()
+
+def make_http_runner():
+    from main import app
+    client = app.test_client()
+
+    def run_http(question, upload):
+        if upload is None:
+            response = client.get("/api/", query_string={"question": question})
+        else:
+            filename, data = upload
+            response = client.post("/api/", data={"question": question, "file": (io.BytesIO(data), filename)},
+                                   content_type="multipart/form-data")
+        return response.get_json().get("answer")
+
+    return run_http
+
+def measure(run, question, upload, repeat, memory):
+    """
+    Returns the median latency in ms over repeat cold runs, the peak traced memory in KiB of one
+    more run (or None), and the last answer.
+    """
+    timings = []
+    answer = None
+    for _ in range(repeat):
+        reset_caches()
+        started = time.perf_counter()
+        answer = run(question, upload)
+        timings.append((time.perf_counter() - started) * 1000)
+    peak_kib = None
+    if memory:
+        reset_caches()
+        tracemalloc.start()
+        try:
+            run(question, upload)
+            peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+    return statistics.median(timings), peak_kib, answer
+
+def shadowed_rules():
+    """
+    Returns {rule name: winning rule name} for rules none of whose triggers can ever win, because
+    each contains the trigger of a rule with a better priority.
+    """
+    shadowed = {}
+    for rule in RULES:
+        winners = set()
+        for trigger in rule.triggers:
+            winner = route_question(trigger)
+            if winner is None or winner is rule:
+                break
+            winners.add(winner.name)
+        else:
+            shadowed[rule.name] = ", ".join(sorted(winners))
+    return shadowed
+
+def check_coverage(cases):
+    problems = []
+    expected = {case.rule for case in cases}
+    shadowed = shadowed_rules()
+    for rule in RULES + [UPLOADED_DATA_RULE]:
+        if rule.name not in expected and rule.name not in shadowed:
+            problems.append(f"no case covers rule {rule.name!r}")
+    for name, winner in sorted(shadowed.items()):
+        print(f"note: rule {name!r} is unreachable, shadowed by {winner}")
+    return problems
+
+def check_routing(case, question, upload):
+    rule = route_question(question, object() if upload is not None else None)
+    name = rule.name if rule is not None else "unmatched"
+    if name != case.rule:
+        return f"{case.name}: routed to {name!r}, expected {case.rule!r}"
+    return None
+
+def compare(results, baseline, tolerance, memory_tolerance, min_ms, min_kib):
+    """
+    Compares results against a baseline.
+
+    Returns:
+        (changed answers, slowdowns and memory growth beyond the tolerances), as two lists
+        of messages.
+    """
+    changed = []
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("cases", {}).get(name)
+        if reference is None:
+            continue
+        if reference.get("answer_sha256") and reference["answer_sha256"] != result["answer_sha256"]:
+            changed.append(f"{name}: answer changed")
+        for mode, current in result["modes"].items():
+            previous = reference.get("modes", {}).get(mode)
+            if previous is None:
+                continue
+            slower = current["median_ms"] - previous["median_ms"]
+            if slower > min_ms and current["median_ms"] > previous["median_ms"] * (1 + tolerance):
+                regressions.append(f"{name} [{mode}]: {previous['median_ms']:.2f} ms -> {current['median_ms']:.2f} ms")
+            if current.get("peak_kib") is not None and previous.get("peak_kib") is not None:
+                grown = current["peak_kib"] - previous["peak_kib"]
+                if grown > min_kib and current["peak_kib"] > previous["peak_kib"] * (1 + memory_tolerance):
+                    regressions.append(f"{name} [{mode}]: peak {previous['peak_kib']:.0f} KiB -> "
+                                       f"{current['peak_kib']:.0f} KiB")
+    return changed, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case and mode")
+    parser.add_argument("--scale", type=float, default=1.0, help="size factor for synthetic inputs")
+    parser.add_argument("--mode", choices=["direct", "http", "both"], default="both")
+    parser.add_argument("--cases", nargs="*", help="only run cases whose name contains one of these")
+    parser.add_argument("--skip-synthetic", action="store_true", help="skip the scaled-up synthetic cases")
+    parser.add_argument("--include-external", action="store_true", help="also run cases that call npx")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--with-snapshot", action="store_true",
+                        help="answer asset-only rules from answer_snapshot.json instead of computing them")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--strict-timing", action="store_true",
+                        help="fail on slowdowns and memory growth, not only on changed answers")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="allowed relative slowdown")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed relative memory growth")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--min-kib", type=float, default=256.0, help="ignore memory growth smaller than this")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    # Handlers read their bundled assets relative to the repository root
+    os.chdir(REPO_ROOT)
+    SNAPSHOT.enabled = args.with_snapshot
+
+    cases = [case for case in CASES
+             if (args.include_external or not case.external)
+             and not (args.skip_synthetic and case.synthetic)
+             and (not args.cases or any(pattern in case.name for pattern in args.cases))]
+    problems = check_coverage(CASES) if not args.cases else []
+
+    runners = {}
+    if args.mode in ("direct", "both"):
+        runners["direct"] = run_direct
+    if args.mode in ("http", "both"):
+        runners["http"] = make_http_runner()
+
+    results = {}
+    print(f"{'case':<22} {'mode':<7} {'median ms':>11} {'peak KiB':>10}")
+    for case in cases:
+        question, upload = case.build(args.scale)
+        routing_problem = check_routing(case, question, upload)
+        if routing_problem:
+            problems.append(routing_problem)
+        result = {"modes": {}}
+        for mode, run in runners.items():
+            median_ms, peak_kib, answer = measure(run, question, upload, args.repeat, not args.no_memory)
+            result["modes"][mode] = {"median_ms": round(median_ms, 4),
+                                     "peak_kib": None if peak_kib is None else round(peak_kib, 1)}
+            result["answer_sha256"] = answer_digest(answer)
+            peak = "-" if peak_kib is None else f"{peak_kib:.0f}"
+            print(f"{case.name:<22} {mode:<7} {median_ms:>11.3f} {peak:>10}")
+        results[case.name] = result
+
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(results, out, indent=2)
+
+    if args.update_baseline:
+        baseline = {
+            "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                     "scale": args.scale, "repeat": args.repeat},
+            "cases": results,
+        }
+        if os.path.exists(args.baseline) and args.cases:
+            # Partial runs update their own cases and keep the rest
+            with open(args.baseline) as source:
+                previous = json.load(source)
+            previous["cases"].update(results)
+            baseline["cases"] = previous["cases"]
+        with open(args.baseline, "w") as out:
+            json.dump(baseline, out, indent=2, sort_keys=True)
+            out.write("\n")
+        print(f"baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as source:
+            baseline = json.load(source)
+        if baseline.get("meta", {}).get("scale") != args.scale:
+            print(f"note: baseline was recorded at scale {baseline['meta'].get('scale')}; "
+                  f"synthetic cases are not comparable")
+            results = {name: result for name, result in results.items()
+                       if not next(case for case in cases if case.name == name).synthetic}
+        changed, regressions = compare(results, baseline, args.tolerance, args.memory_tolerance,
+                                       args.min_ms, args.min_kib)
+        problems += changed
+        if args.strict_timing:
+            problems += regressions
+        elif regressions:
+            print("\nslower than the baseline (not a failure; use --strict-timing on the baseline's host):")
+            for regression in regressions:
+                print(f"  {regression}")
+    else:
+        print(f"note: no baseline at {args.baseline}; run with --update-baseline to record one")
+
+    if problems:
+        print("\nFAILED:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
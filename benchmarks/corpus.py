@@ -0,0 +1,225 @@
+"""
+Benchmark corpus: representative questions for every handler, plus synthetic scaled-up inputs.
+
+Each Case names the rule expected to answer it, so the suite can check that every rule in
+question_handler.RULES is covered. Uploads are built lazily by functions returning
+(filename, bytes), sized by the --scale factor passed to bench_suite.py.
+"""
+import io
+import random
+import zipfile
+from datetime import datetime
+
+class Case:
+    """
+    One benchmark item.
+
+    Args:
+        name (str): Unique case name, used as the key in the baseline file.
+        question (str or callable): The question text, or a function of scale returning it.
+        rule (str): Name of the rule expected to answer, or "unmatched".
+        upload (callable): Optional function of scale returning (filename, bytes) to upload.
+        external (bool): The handler calls out to external tools or the network; skipped by default.
+        synthetic (bool): The input is generated and grows with --scale.
+    """
+
+    def __init__(self, name, question, rule, upload=None, external=False, synthetic=False):
+        self.name = name
+        self.question = question
+        self.rule = rule
+        self.upload = upload
+        self.external = external
+        self.synthetic = synthetic
+
+    def build(self, scale):
+        question = self.question(scale) if callable(self.question) else self.question
+        upload = self.upload(scale) if self.upload is not None else None
+        return question, upload
+
+def make_csv(rows, seed=0):
+    rng = random.Random(seed)
+    out = io.StringIO()
+    out.write("id,name,answer,value\n")
+    for index in range(rows):
+        out.write(f"{index},item{index},{rng.randrange(10 ** 6)},{rng.random():.6f}\n")
+    return out.getvalue().encode("utf-8")
+
+def make_xlsx(rows, seed=0):
+    from openpyxl import Workbook
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["id", "answer", "value"])
+    for index in range(rows):
+        sheet.append([index, rng.randrange(10 ** 6), rng.random()])
+    out = io.BytesIO()
+    workbook.save(out)
+    return out.getvalue()
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages, lines_per_page=45, seed=0):
+    """
+    Writes a minimal, valid multi-page PDF with one Helvetica text line per row.
+    """
+    rng = random.Random(seed)
+    words = ["archive", "answer", "sequence", "column", "report", "latency", "value", "upload", "hash"]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # the page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = [f"Page {page + 1}"] + [" ".join(rng.choice(words) for _ in range(10)) for _ in range(lines_per_page)]
+        stream = "BT /F1 10 Tf 14 TL 50 780 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def make_text_zip(files, lines_per_file, seed=0):
+    """
+    Builds an archive of text files mentioning IITM in assorted cases, like q-replace-across-files.zip.
+    """
+    rng = random.Random(seed)
+    spellings = ["IITM", "iitm", "IItm", "Iitm"]
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        for index in range(files):
+            lines = []
+            for line in range(lines_per_file):
+                lines.append(f"line {line} of file {index} at {rng.choice(spellings)} with value {rng.random():.8f}")
+            archive.writestr(f"file{index:05d}.txt", "\n".join(lines) + "\n")
+    return out.getvalue()
+
+def make_listing_zip(files, seed=0):
+    """
+    Builds an archive of many small files with spread-out sizes and timestamps.
+    """
+    rng = random.Random(seed)
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as archive:
+        for index in range(files):
+            moment = datetime(2000 + rng.randrange(20), rng.randrange(1, 13), rng.randrange(1, 28),
+                              rng.randrange(24), rng.randrange(60))
+            info = zipfile.ZipInfo(f"dir{index % 10}/file{index}.txt", moment.timetuple()[:6])
+            archive.writestr(info, b"x" * rng.randrange(16, 16384))
+    return out.getvalue()
+
+def read_asset(path):
+    with open(path, "rb") as source:
+        return source.read()
+
+def _sortby_question(scale):
+    rng = random.Random(1)
+    size = int(2000 * scale)
+    values = ",".join(str(rng.randrange(1000)) for _ in range(size))
+    keys = ",".join(str(rng.randrange(10 ** 6)) for _ in range(size))
+    return f"=SUM(TAKE(SORTBY({{{values}}}, {{{keys}}}), 1, {size // 10}))"
+
+CASES = [
+    Case("vscode_version", "What is the VS Code Version output?", "vscode_version"),
+    Case("uv_request", "Send a HTTPS request to httpbin with the URL encoded parameter email set to "
+         "21f3001993@ds.study.iitm.ac.in", "uv_request"),
+    Case("npx_prettier", "Run npx -y prettier@3.4.2 README.md | sha256sum. What is the output?", "npx_prettier",
+         external=True),
+    Case("array_constrain_sum", "=SUM(ARRAY_CONSTRAIN(SEQUENCE(100, 100, 15, 12), 1, 10))", "array_constrain_sum"),
+    Case("take_sortby_sum", "=SUM(TAKE(SORTBY({1,10,12,4,6,8,9,13,6,15,14,15,2,13,0,3}, "
+         "{10,9,13,2,11,8,16,14,7,15,5,4,6,1,3,12}), 1, 6))", "take_sortby_sum"),
+    Case("hidden_input", "What is the value in the Hidden Input?", "hidden_input"),
+    Case("input_tokens", "how many input tokens does it take", "input_tokens"),
+    Case("wednesdays", "How many Wednesdays are there in the date range 1981-03-03 to 2007-10-30?", "wednesdays"),
+    Case("extract_csv", "What is the value in the \"answer\" column of the CSV file?", "extract_csv"),
+    Case("sort_json", 'Sort this JSON array of objects by the value of the age field. '
+         '[{"name":"Alice","age":30},{"name":"Bob","age":25},{"name":"Al","age":25}]', "sort_json"),
+    Case("jsonhash", "What's the result when you paste the JSON at tools-in-data-science.pages.dev/jsonhash "
+         "and click the Hash button?", "jsonhash"),
+    Case("data_value_sum", "What's the sum of their data-value attributes?", "data_value_sum"),
+    Case("unicode_sum", "What is the sum of all values associated? with symbols", "unicode_sum"),
+    Case("email_json_url", "Enter the raw Github URL of email.json so we can verify it.", "email_json_url"),
+    Case("replace_hash", "What does running cat * | sha256sum in that folder show in bash?", "replace_hash"),
+    Case("file_sizes", "What's the total size of all files at least 7602 bytes large and modified on or after "
+         "Tue, 27 Mar, 2007, 10:13 pm IST?", "file_sizes"),
+    Case("file_sizes_ist", "Find the size of all files at least 800 bytes large and modified on or after "
+         "Tue, 27 Mar, 2007, 10:13 pm IST?", "file_sizes_ist"),
+    Case("move_rename_hash", "What does running grep . * | LC_ALL=C sort | sha256sum in bash on that folder show?",
+         "move_rename_hash"),
+    Case("different_lines", "How many lines are different between a.txt and b.txt?", "different_lines"),
+    Case("total_sales", "What is the total sales of all the items in the Gold ticket type?", "total_sales"),
+    Case("markdown", "Write documentation in Markdown", "markdown"),
+    Case("losslessly", "Compress it losslessly", "losslessly"),
+    Case("github_pages", "What is the GitHub Pages URL?", "github_pages"),
+    Case("five_char_string", "What is the 5-character string?", "five_char_string"),
+    Case("minimum_brightness", "number of pixels with minimum brightness", "minimum_brightness"),
+    Case("vercel_url", "What is the Vercel URL?", "vercel_url"),
+    Case("repository_url", "Trigger the action and enter the repository URL", "repository_url"),
+    Case("docker_image", "What is the Docker image URL?", "docker_image"),
+    Case("fastapi", "Write a FastAPI server", "fastapi"),
+    Case("ngrok_url", "What is the ngrok URL?", "ngrok_url"),
+    Case("httpx", "Write a Python program that uses httpx", "httpx"),
+    Case("image_request", "Write just the JSON body with two pieces of content", "image_request"),
+    Case("embedding_request", "the JSON body for embedding", "embedding_request"),
+    # "most_similar(embeddings)" always contains the higher-priority "embedding" trigger
+    Case("most_similar", "Your task is to write a Python function most_similar(embeddings)", "embedding_request"),
+    Case("similarity_url", "What is the API URL endpoint for your similarity implementation?", "similarity_url"),
+    Case("execute_url", "What is the /execute endpoint?", "execute_url"),
+    Case("llm_yes", "Write a prompt that will get the LLM to say Yes", "llm_yes"),
+    Case("ducks", "What is the total number of ducks?", "ducks"),
+    Case("imdb", "IMDb movies JSON", "imdb"),
+    Case("wikipedia", "Wikipedia outline API URL", "wikipedia"),
+    Case("bbc", "BBC weather", "bbc"),
+    Case("hacker_news", "Hacker News latest", "hacker_news"),
+    Case("newest_user", "When was the newest user joined?", "newest_user"),
+    Case("github_action", "Trigger the GitHub action", "github_action"),
+    Case("economics", "Economics data question", "economics"),
+    Case("unmatched", "Something totally unrelated", "unmatched"),
+
+    # Uploads answered from the uploaded data
+    Case("upload_csv", "What is in the first row?", "uploaded_data",
+         upload=lambda scale: ("data.csv", make_csv(100))),
+    Case("upload_xlsx", "What is in the first row?", "uploaded_data",
+         upload=lambda scale: ("data.xlsx", make_xlsx(100))),
+    Case("upload_txt", "Summarise this text", "uploaded_data",
+         upload=lambda scale: ("notes.txt", b"The answer is 42.\n" * 100)),
+    Case("upload_pdf", "Summarise this report", "uploaded_data",
+         upload=lambda scale: ("report.pdf", make_pdf(3))),
+    Case("upload_zip_csv", "What is in the archive?", "uploaded_data",
+         upload=lambda scale: ("q-extract-csv-zip.zip", read_asset("q-extract-csv-zip.zip"))),
+
+    # Synthetic, scaled-up inputs
+    Case("large_csv_upload", "What is in the first row?", "uploaded_data",
+         upload=lambda scale: ("large.csv", make_csv(int(200000 * scale))), synthetic=True),
+    Case("large_xlsx_upload", "What is in the first row?", "uploaded_data",
+         upload=lambda scale: ("large.xlsx", make_xlsx(int(20000 * scale))), synthetic=True),
+    Case("large_pdf_upload", "Summarise this report", "uploaded_data",
+         upload=lambda scale: ("large.pdf", make_pdf(int(200 * scale))), synthetic=True),
+    Case("large_replace_zip", "What does running cat * | sha256sum in that folder show in bash?", "replace_hash",
+         upload=lambda scale: ("large.zip", make_text_zip(int(40 * scale), 5000)), synthetic=True),
+    Case("many_files_listing", "What's the total size of all files at least 7602 bytes large and modified on or "
+         "after Tue, 27 Mar, 2007, 10:13 pm IST?", "file_sizes",
+         upload=lambda scale: ("listing.zip", make_listing_zip(int(5000 * scale))), synthetic=True),
+    Case("wide_date_range", "How many Wednesdays are there in the date range 0001-01-01 to 9999-12-31?",
+         "wednesdays", synthetic=True),
+    Case("huge_sequence", "=SUM(ARRAY_CONSTRAIN(SEQUENCE(1000000, 1000000, 15, 12), 500000, 500000))",
+         "array_constrain_sum", synthetic=True),
+    Case("large_sortby", _sortby_question, "take_sortby_sum", synthetic=True),
+]
@@ -0,0 +1,90 @@
+from datetime import date, datetime, timedelta
+
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6,
+}
+
+# numpy counts days from 1970-01-01, which was a Thursday
+_EPOCH_WEEKDAY = 3
+
+def to_date(value):
+    """
+    Converts a 'YYYY-MM-DD' string, date or datetime to a date.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+def weekday_numbers(weekdays):
+    """
+    Normalizes a weekday or collection of weekdays to a sorted tuple of ints (Monday is 0).
+
+    Args:
+        weekdays: An int, a day name such as "Wednesday", or a collection of either.
+    """
+    if isinstance(weekdays, (int, str)):
+        weekdays = [weekdays]
+    numbers = set()
+    for day in weekdays:
+        number = WEEKDAYS[day.lower()] if isinstance(day, str) else int(day)
+        if not 0 <= number <= 6:
+            raise ValueError(f"Weekday out of range: {day}")
+        numbers.add(number)
+    return tuple(sorted(numbers))
+
+def count_weekdays(start, end, weekdays, include_start=True, include_end=True):
+    """
+    Counts the days falling on the given weekdays between two dates in constant time.
+
+    Args:
+        start: First date of the range ('YYYY-MM-DD', date or datetime).
+        end: Last date of the range.
+        weekdays: Weekday or weekdays to count, as ints (Monday is 0) or names.
+        include_start (bool): Whether start itself is part of the range.
+        include_end (bool): Whether end itself is part of the range.
+
+    Returns:
+        int: The number of matching days, or 0 for an empty range.
+    """
+    first = to_date(start) + timedelta(days=0 if include_start else 1)
+    last = to_date(end) - timedelta(days=0 if include_end else 1)
+    days = (last - first).days + 1
+    if days <= 0:
+        return 0
+    full_weeks, remainder = divmod(days, 7)
+    first_weekday = first.weekday()
+    count = 0
+    for weekday in weekday_numbers(weekdays):
+        # Each full week contains every weekday once; the partial week covers the next `remainder` days
+        count += full_weeks + ((weekday - first_weekday) % 7 < remainder)
+    return count
+
+def count_weekdays_batch(starts, ends, weekdays, include_start=True, include_end=True):
+    """
+    Counts matching weekdays for many ranges at once with NumPy; range i runs from starts[i]
+    to ends[i].
+
+    Args:
+        starts: Array-like of range start dates.
+        ends: Array-like of range end dates, the same length as starts.
+        weekdays: Weekday or weekdays to count, as ints (Monday is 0) or names.
+        include_start (bool): Whether each start is part of its range.
+        include_end (bool): Whether each end is part of its range.
+
+    Returns:
+        numpy.ndarray: int64 counts, one per range.
+    """
+    import numpy as np
+    first = np.asarray(starts, dtype="datetime64[D]").astype(np.int64) + (0 if include_start else 1)
+    last = np.asarray(ends, dtype="datetime64[D]").astype(np.int64) - (0 if include_end else 1)
+
+    days = np.maximum(last - first + 1, 0)
+    full_weeks, remainder = np.divmod(days, 7)
+    first_weekday = (first + _EPOCH_WEEKDAY) % 7
+    counts = np.zeros(days.shape, dtype=np.int64)
+    for weekday in weekday_numbers(weekdays):
+        counts += full_weeks + ((weekday - first_weekday) % 7 < remainder)
+    return counts
@@ -0,0 +1,285 @@
+import io
+import os
+import mmap
+import difflib
+from collections import deque
+from contextlib import contextmanager
+from zip_fs import open_archive
+
+# Bytes read from each input per refill
+CHUNK_SIZE = 1 << 20
+# Aligned blocks compared at once; the window grows while blocks match and shrinks on a mismatch.
+# Windows that stay in cache compare faster than larger ones.
+MIN_WINDOW = 256
+MAX_WINDOW = 256 << 10
+WHITESPACE_MODES = ("strip", "exact", "ignore")
+
+@contextmanager
+def open_source(source):
+    """
+    Opens one side of a comparison as a binary stream for the duration of a with-block.
+
+    Args:
+        source: A path (memory-mapped), bytes, a binary file object, or an (archive, member
+            name) pair where archive is anything open_archive accepts.
+    """
+    if isinstance(source, tuple):
+        archive_source, name = source
+        with open_archive(archive_source) as archive, archive.open(name) as stream:
+            yield stream
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                yield file
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    else:
+        yield source
+
+class _LineBuffer:
+    """
+    Reads a byte stream in chunks behind a cursor that always sits at the start of a line.
+
+    Line endings are normalized to \\n as they are read, the way text files are read with
+    universal newlines, so CRLF and CR files compare equal to LF ones.
+    """
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.pos = 0
+        self.eof = False
+        self._carried_cr = b""
+
+    def _read_chunk(self):
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            chunk, self._carried_cr = self._carried_cr, b""
+            return chunk.replace(b"\r", b"\n")
+        chunk = self._carried_cr + chunk
+        self._carried_cr = b""
+        if b"\r" in chunk:
+            # A CR at the end of a chunk may be the first half of a CRLF split across chunks
+            if chunk.endswith(b"\r"):
+                chunk, self._carried_cr = chunk[:-1], b"\r"
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        return chunk
+
+    def fill(self, size):
+        """
+        Reads until at least size bytes follow the cursor, or the stream ends.
+        """
+        while len(self.buf) - self.pos < size and not self.eof:
+            chunk = self._read_chunk()
+            if chunk:
+                self.buf = self.buf[self.pos:] + chunk
+                self.pos = 0
+        return len(self.buf) - self.pos
+
+    def peek_line(self):
+        """
+        Returns the line at the cursor, with its \\n if it has one, without moving past it.
+        """
+        end = self.buf.find(b"\n", self.pos)
+        while end < 0 and not self.eof:
+            searched = len(self.buf) - self.pos
+            self.fill(searched + self.chunk_size)
+            end = self.buf.find(b"\n", self.pos + searched)
+        end = end + 1 if end >= 0 else len(self.buf)
+        return self.buf[self.pos:end]
+
+    def next_line(self):
+        """
+        Returns the line at the cursor and moves past it.
+        """
+        line = self.peek_line()
+        self.pos += len(line)
+        return line
+
+    def rest(self):
+        """
+        Returns everything after the cursor and moves to the end.
+        """
+        while not self.eof:
+            self.fill(len(self.buf) - self.pos + self.chunk_size)
+        rest = self.buf[self.pos:]
+        self.buf, self.pos = b"", 0
+        return rest
+
+    def count_remaining_lines(self):
+        """
+        Counts the lines after the cursor, reading one chunk at a time.
+        """
+        count = 0
+        last = b"\n"
+        while True:
+            self.fill(1)
+            remaining = self.buf[self.pos:]
+            if not remaining:
+                break
+            count += remaining.count(b"\n")
+            last = remaining[-1:]
+            self.buf, self.pos = b"", 0
+        return count + (last != b"\n")
+
+def normalize_line(line, whitespace="strip", encoding="utf-8"):
+    """
+    Returns the comparison key of a line under a whitespace mode.
+
+    Args:
+        line (bytes): The line, possibly ending in \\n.
+        whitespace (str): "strip" ignores leading and trailing whitespace, "ignore" ignores all
+            whitespace, "exact" compares the line as it is, including its \n, so a last line
+            without a newline differs from the same line with one, as in `diff -u`.
+        encoding (str): Encoding of the input.
+    """
+    text = line.decode(encoding, errors="replace")
+    if whitespace == "strip":
+        return text.strip()
+    if whitespace == "ignore":
+        return "".join(text.split())
+    return text
+
+def _skip_equal(left, right, window):
+    """
+    Moves both cursors past the whole lines of the next window if its bytes are identical.
+
+    Returns:
+        tuple: (skipped bytes, next window size); 0 skipped bytes means the caller has to
+            compare the next line pair itself.
+    """
+    available = min(window, left.fill(window), right.fill(window))
+    if available and left.buf[left.pos:left.pos + available] == right.buf[right.pos:right.pos + available]:
+        end = left.buf.rfind(b"\n", left.pos, left.pos + available) + 1
+        if end:
+            skipped = left.buf[left.pos:end]
+            left.pos = end
+            right.pos += len(skipped)
+            return skipped, min(window * 4, MAX_WINDOW)
+        return b"", window
+    return b"", MIN_WINDOW
+
+def count_differences(source1, source2, whitespace="strip", count_extra=False, encoding="utf-8",
+                      chunk_size=CHUNK_SIZE):
+    """
+    Counts the line positions at which two inputs differ, comparing line i with line i.
+
+    Both inputs are streamed in chunks of chunk_size. Aligned blocks are compared byte for
+    byte first, in a window that grows up to MAX_WINDOW while they match, so identical
+    stretches cost one memory comparison; only lines inside a mismatching block are decoded
+    and compared under the whitespace mode.
+
+    Args:
+        source1, source2: Inputs, as accepted by open_source.
+        whitespace (str): One of WHITESPACE_MODES; "strip" matches comparing line.strip().
+        count_extra (bool): Also count the lines of the longer input that have no counterpart.
+            By default they are ignored, like zip() over the two files.
+        encoding (str): An ASCII-compatible encoding of both inputs.
+        chunk_size (int): Bytes read from each input at a time.
+
+    Returns:
+        int: The number of differing lines.
+    """
+    if whitespace not in WHITESPACE_MODES:
+        raise ValueError(f"Unknown whitespace mode {whitespace!r}; expected one of {', '.join(WHITESPACE_MODES)}")
+    with open_source(source1) as stream1, open_source(source2) as stream2:
+        left = _LineBuffer(stream1, chunk_size)
+        right = _LineBuffer(stream2, chunk_size)
+        differences = 0
+        window = MIN_WINDOW
+        while True:
+            skipped, window = _skip_equal(left, right, window)
+            if skipped:
+                continue
+            if not left.fill(1) or not right.fill(1):
+                break
+            line1 = left.next_line()
+            line2 = right.next_line()
+            if line1 != line2 and normalize_line(line1, whitespace, encoding) != normalize_line(line2, whitespace, encoding):
+                differences += 1
+        if count_extra:
+            differences += left.count_remaining_lines() + right.count_remaining_lines()
+    return differences
+
+def _format_range(start, stop):
+    # Same range notation as difflib.unified_diff
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+def unified_diff(source1, source2, name1="a", name2="b", context=3, whitespace="exact", encoding="utf-8",
+                 chunk_size=CHUNK_SIZE):
+    """
+    Returns a unified diff of two inputs, in the format of `diff -u`.
+
+    The common leading lines are skipped with the same block comparison as count_differences,
+    keeping only the context lines before the first change; the remainder is matched with
+    difflib's longest-matching-block algorithm. Lines are matched by their whitespace-mode key
+    but printed as they are.
+
+    Args:
+        source1, source2: Inputs, as accepted by open_source.
+        name1, name2 (str): Labels for the --- and +++ header lines.
+        context (int): Unchanged lines shown around each change.
+        whitespace (str): One of WHITESPACE_MODES.
+        encoding (str): An ASCII-compatible encoding of both inputs.
+        chunk_size (int): Bytes read from each input at a time.
+
+    Returns:
+        str: The diff, or an empty string when the inputs match.
+    """
+    if whitespace not in WHITESPACE_MODES:
+        raise ValueError(f"Unknown whitespace mode {whitespace!r}; expected one of {', '.join(WHITESPACE_MODES)}")
+    with open_source(source1) as stream1, open_source(source2) as stream2:
+        left = _LineBuffer(stream1, chunk_size)
+        right = _LineBuffer(stream2, chunk_size)
+        skipped_lines = 0
+        recent = deque(maxlen=context)
+        window = MIN_WINDOW
+        while True:
+            skipped, window = _skip_equal(left, right, window)
+            if not skipped:
+                line = left.peek_line()
+                if not line or line != right.peek_line():
+                    break
+                skipped = left.next_line()
+                right.next_line()
+            skipped_lines += skipped.count(b"\n")
+            if context:
+                recent.extend(line + b"\n" for line in skipped[:-1].rsplit(b"\n", context)[-context:])
+        lines1 = list(recent) + left.rest().splitlines(keepends=True)
+        lines2 = list(recent) + right.rest().splitlines(keepends=True)
+    offset = skipped_lines - len(recent)
+
+    text1 = [line.decode(encoding, errors="replace") for line in lines1]
+    text2 = [line.decode(encoding, errors="replace") for line in lines2]
+    keys1 = [normalize_line(line, whitespace, encoding) for line in lines1]
+    keys2 = [normalize_line(line, whitespace, encoding) for line in lines2]
+    output = []
+    for group in difflib.SequenceMatcher(None, keys1, keys2).get_grouped_opcodes(context):
+        first, last = group[0], group[-1]
+        output.append(f"@@ -{_format_range(first[1] + offset, last[2] + offset)} "
+                      f"+{_format_range(first[3] + offset, last[4] + offset)} @@\n")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                output.extend(" " + line for line in text1[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                output.extend("-" + line for line in text1[i1:i2])
+            if tag in ("replace", "insert"):
+                output.extend("+" + line for line in text2[j1:j2])
+    if not output:
+        return ""
+    lines = [f"--- {name1}\n", f"+++ {name2}\n"]
+    for line in output:
+        lines.append(line if line.endswith("\n") else line + "\n\\ No newline at end of file\n")
+    return "".join(lines)
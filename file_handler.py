@@ -1,16 +1,270 @@
 import os
-import zipfile
-import pandas as pd
-import PyPDF2
+import codecs
+import shutil
+import hashlib
+import tempfile
 from werkzeug.utils import secure_filename
+from zip_fs import ZipArchive
+from pdf_engine import extract_text
+from metrics import METRICS
+
+TABULAR_TYPES = (".csv", ".xlsx")
+
+# Uploads up to this size stay in memory; larger ones roll over to an anonymous temporary file
+UPLOAD_SPOOL_THRESHOLD = int(os.environ.get("UPLOAD_SPOOL_THRESHOLD", str(8 << 20)))
+
+def spooled_stream_factory(total_content_length=None, content_type=None, filename=None, content_length=None):
+    """
+    Werkzeug stream factory that receives each uploaded file into its own spooled buffer.
+
+    The buffer is private to the request and, once rolled over to disk, is an already-unlinked
+    temporary file, so it disappears when closed and never collides with other requests.
+    """
+    return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD)
+
+class LazyUpload:
+    """
+    An uploaded file that is only parsed as far as its consumer asks.
+
+    CSV and XLSX uploads answer header() from the first row, then read a single column and only
+    as many rows as needed; text uploads decode just the requested prefix. Nothing is parsed
+    when the upload is created.
+
+    Args:
+        stream: Seekable binary stream holding the upload.
+        filename (str): Sanitized upload filename.
+        file_ext (str): Lower-cased extension, e.g. ".csv".
+        encoding (str): Text encoding for CSV and text uploads.
+    """
+
+    def __init__(self, stream, filename, file_ext, encoding="utf-8"):
+        self.stream = stream
+        self.filename = filename
+        self.file_ext = file_ext
+        self.encoding = encoding
+        self._header = None
+        self._sha256 = None
+
+    def _rewind(self):
+        self.stream.seek(0)
+        return self.stream
+
+    @property
+    def sha256(self):
+        """
+        SHA-256 of the raw upload, computed once by streaming it in blocks.
+        """
+        if self._sha256 is None:
+            digest = hashlib.sha256()
+            stream = self._rewind()
+            for block in iter(lambda: stream.read(1 << 20), b""):
+                digest.update(block)
+            self._sha256 = digest.hexdigest()
+            self._rewind()
+        return self._sha256
+
+    @property
+    def is_tabular(self):
+        return self.file_ext in TABULAR_TYPES
+
+    def _xlsx_rows(self):
+        # Read-only mode streams rows from the sheet XML instead of loading the workbook
+        from openpyxl import load_workbook
+        workbook = load_workbook(self._rewind(), read_only=True, data_only=True)
+        try:
+            yield from workbook.worksheets[0].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    def header(self):
+        """
+        Returns the column names, reading only the first row.
+        """
+        if self._header is None:
+            if self.file_ext == ".csv":
+                import pandas as pd
+                self._header = list(pd.read_csv(self._rewind(), nrows=0, encoding=self.encoding).columns)
+            elif self.file_ext == ".xlsx":
+                first_row = next(self._xlsx_rows(), ())
+                self._header = [str(name) if name is not None else f"Unnamed: {index}"
+                                for index, name in enumerate(first_row)]
+            else:
+                self._header = []
+        return self._header
+
+    def column(self, name, nrows=None):
+        """
+        Returns the values of one column, parsing at most nrows data rows.
+        """
+        position = self.header().index(name)
+        if self.file_ext == ".csv":
+            import pandas as pd
+            frame = pd.read_csv(self._rewind(), usecols=[position], nrows=nrows, encoding=self.encoding)
+            return frame.iloc[:, 0].tolist()
+        values = []
+        rows = self._xlsx_rows()
+        next(rows, None)
+        for row in rows:
+            if nrows is not None and len(values) >= nrows:
+                break
+            values.append(row[position] if position < len(row) else None)
+        return values
+
+    def first_value(self, column_substring):
+        """
+        Returns the first value of the first column whose name contains column_substring
+        (case-insensitive), or None if there is no such column or it has no rows.
+        """
+        for name in self.header():
+            if column_substring in name.lower():
+                values = self.column(name, nrows=1)
+                return values[0] if values else None
+        return None
+
+    def text_prefix(self, length):
+        """
+        Decodes and returns only the first length characters of the upload.
+        """
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        stream = self._rewind()
+        text = ""
+        while len(text) < length:
+            block = stream.read(4096)
+            text += decoder.decode(block, final=not block)
+            if not block:
+                break
+        return text[:length]
+
+    def to_dict(self):
+        """
+        Parses the whole upload the way process_uploaded_file used to, for callers that need it.
+        """
+        import pandas as pd
+        if self.file_ext == ".csv":
+            return pd.read_csv(self._rewind(), encoding=self.encoding).to_dict()
+        if self.file_ext == ".xlsx":
+            return pd.read_excel(self._rewind()).to_dict()
+        return self._rewind().read().decode(self.encoding)
+
+    def close(self):
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __bool__(self):
+        if self.is_tabular:
+            return bool(self.header())
+        stream = self._rewind()
+        has_data = bool(stream.read(1))
+        self._rewind()
+        return has_data
+
+class ZipUpload(LazyUpload):
+    """
+    An uploaded ZIP archive read in place from its upload buffer, without extraction.
+
+    The first CSV member (top-level members first, then in archive order) backs the tabular
+    methods and is parsed lazily straight from the archive. The whole archive is exposed as
+    `archive` for handlers that work on uploaded archives.
+
+    Args:
+        stream: Seekable binary stream holding the ZIP upload.
+        filename (str): Sanitized upload filename.
+    """
+
+    def __init__(self, stream, filename):
+        super().__init__(stream, filename, ".zip")
+        self.archive = ZipArchive(stream)
+        csv_members = [name for name in self.archive.names() if name.lower().endswith(".csv")]
+        csv_members.sort(key=lambda name: name.count("/"))
+        self.csv_member = csv_members[0] if csv_members else None
+        self._csv = None
+        if self.csv_member is not None:
+            self._csv = LazyUpload(self.archive.open(self.csv_member), self.csv_member, ".csv")
+
+    @property
+    def is_tabular(self):
+        return self._csv is not None
+
+    def header(self):
+        return self._csv.header() if self._csv is not None else []
+
+    def column(self, name, nrows=None):
+        return self._csv.column(name, nrows)
+
+    def first_value(self, column_substring):
+        return self._csv.first_value(column_substring) if self._csv is not None else None
+
+    def to_dict(self):
+        return self._csv.to_dict() if self._csv is not None else None
+
+    def close(self):
+        if self._csv is not None:
+            self._csv.close()
+        self.archive.close()
+        self.stream.close()
+
+    def __bool__(self):
+        # Archives without a CSV member used to produce no extracted data
+        return self._csv is not None
+
+def _seekable_upload_stream(file):
+    """
+    Returns the upload's own stream when it can be re-read, else spools it into a private buffer.
+    """
+    stream = file.stream
+    if getattr(stream, "seekable", lambda: False)():
+        stream.seek(0)
+        return stream
+    spool = spooled_stream_factory()
+    shutil.copyfileobj(stream, spool, 1 << 20)
+    spool.seek(0)
+    return spool
+
+def _stream_size(stream):
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    return size
+
+class PdfUpload(LazyUpload):
+    """
+    An uploaded PDF whose text is extracted from memory, only up to the pages a caller needs.
+
+    Extracted pages are cached by the PDF's content hash, so uploading the same file again
+    does not parse it again.
+
+    Args:
+        stream: Seekable binary stream holding the PDF upload.
+        filename (str): Sanitized upload filename.
+    """
+
+    def __init__(self, stream, filename):
+        super().__init__(stream, filename, ".pdf")
+
+    def text(self, max_chars=None, pages=None):
+        """
+        Returns the stripped text of the document, or its first max_chars characters.
+        """
+        data = self._rewind().read()
+        return extract_text(data, pages=pages, max_chars=max_chars, digest=self.sha256)
+
+    def text_prefix(self, length):
+        return self.text(max_chars=length)
+
+    def to_dict(self):
+        return self.text()
+
+    def __bool__(self):
+        # Documents without any extractable text used to produce no extracted data
+        return bool(self.text_prefix(1))
 
 def extract_text_from_pdf(pdf_path):
-    text = ""
     with open(pdf_path, "rb") as file:
-        reader = PyPDF2.PdfReader(file)
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-    return text.strip()
+        return extract_text(file.read())
 
 def process_uploaded_file(file):
     if not file:
@@ -19,32 +273,19 @@ def process_uploaded_file(file):
     filename = secure_filename(file.filename)
     file_ext = os.path.splitext(filename)[1].lower()
     extracted_data = None
+    stream = _seekable_upload_stream(file)
+    METRICS.record_upload(file_ext, _stream_size(stream))
     
     if file_ext == ".zip":
-        file.save(filename)
-        with zipfile.ZipFile(filename, 'r') as zip_ref:
-            zip_ref.extractall("extracted")
-        os.remove(filename)
-        
-        csv_files = [f for f in os.listdir("extracted") if f.endswith(".csv")]
-        if csv_files:
-            df = pd.read_csv(os.path.join("extracted", csv_files[0]))
-            extracted_data = df.to_dict()
-        
-    elif file_ext == ".csv":
-        df = pd.read_csv(file)
-        extracted_data = df.to_dict()
+        extracted_data = ZipUpload(stream, filename)
         
-    elif file_ext == ".xlsx":
-        df = pd.read_excel(file)
-        extracted_data = df.to_dict()
+    elif file_ext in TABULAR_TYPES:
+        extracted_data = LazyUpload(stream, filename, file_ext)
         
     elif file_ext == ".pdf":
-        file.save(filename)
-        extracted_data = extract_text_from_pdf(filename)
-        os.remove(filename)
+        extracted_data = PdfUpload(stream, filename)
         
     elif file_ext == ".txt":
-        extracted_data = file.read().decode("utf-8")
+        extracted_data = LazyUpload(stream, filename, file_ext)
     
     return extracted_data
@@ -0,0 +1,432 @@
+"""
+Formatting service for the prettier question.
+
+A long-lived Node worker loads prettier once and formats files sent to it as JSON lines over
+stdin/stdout, so only the first request pays for starting Node. Prettier should be installed as
+a build step (`python formatter_service.py --install`); if it is missing at run time, it is
+installed by a background thread, never on the request path. Until prettier is available, a
+pure-Python formatter answers for documents that use only the Markdown constructs it normalizes
+exactly like prettier, and other documents get a FormatterError. Prettier results are cached by
+the SHA-256 of the file content and the prettier version; fallback results are not cached.
+
+Configuration comes from the environment:
+    PRETTIER_PATH             directory of an installed prettier package to use
+    PRETTIER_CACHE_DIR        where prettier is installed when it is not found elsewhere
+    PRETTIER_AUTO_INSTALL     "off" disables the background npm install
+    FORMATTER_TIMEOUT         seconds to wait for one formatting request, default 30
+"""
+import os
+import re
+import sys
+import json
+import shutil
+import select
+import atexit
+import argparse
+import hashlib
+import logging
+import time
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+
+PRETTIER_VERSION = "3.4.2"
+# Bump when format_markdown changes, so cached results of the old version are not reused
+FALLBACK_VERSION = "python-markdown-1"
+PRETTIER_PATH = os.environ.get("PRETTIER_PATH") or None
+PRETTIER_CACHE_DIR = os.environ.get("PRETTIER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "prettier-worker"))
+PRETTIER_AUTO_INSTALL = os.environ.get("PRETTIER_AUTO_INSTALL", "on") != "off"
+FORMATTER_TIMEOUT = float(os.environ.get("FORMATTER_TIMEOUT", "30"))
+INSTALL_TIMEOUT = 120
+RESULT_CACHE_SIZE = 64
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+logger = logging.getLogger(__name__)
+
+# Reads {"id", "source", "filepath"} lines and writes {"id", "output"} or {"id", "error"} lines.
+# Options are resolved like the CLI does, from prettier config files and .editorconfig.
+WORKER_SCRIPT = r"""
+const prettier = require(process.argv[1]);
+const readline = require("readline");
+const lines = readline.createInterface({ input: process.stdin });
+let queue = Promise.resolve();
+lines.on("line", (line) => {
+  queue = queue.then(async () => {
+    const request = JSON.parse(line);
+    let response;
+    try {
+      const options = (await prettier.resolveConfig(request.filepath, { editorconfig: true })) || {};
+      const output = await prettier.format(request.source, { ...options, filepath: request.filepath });
+      response = { id: request.id, output };
+    } catch (error) {
+      response = { id: request.id, error: String(error && error.message ? error.message : error) };
+    }
+    process.stdout.write(JSON.stringify(response) + "\n");
+  });
+});
+"""
+
+class FormatterError(Exception):
+    """
+    Raised when the formatter rejects a file or the worker fails.
+    """
+
+def _installed_version(package_dir):
+    try:
+        with open(os.path.join(package_dir, "package.json"), encoding="utf-8") as file:
+            return json.load(file).get("version")
+    except (OSError, ValueError):
+        return None
+
+def find_prettier(version=PRETTIER_VERSION):
+    """
+    Returns the directory of an installed prettier package of the given version, or None.
+
+    Looks at PRETTIER_PATH, the repository's node_modules and PRETTIER_CACHE_DIR.
+    """
+    candidates = [PRETTIER_PATH,
+                  os.path.join(REPO_ROOT, "node_modules", "prettier"),
+                  os.path.join(PRETTIER_CACHE_DIR, "node_modules", "prettier")]
+    for candidate in candidates:
+        if candidate and _installed_version(candidate) == version:
+            return candidate
+    return None
+
+def install_prettier(version=PRETTIER_VERSION):
+    """
+    Installs prettier into PRETTIER_CACHE_DIR with npm and returns its directory, or None if
+    npm is missing or the install fails.
+    """
+    npm = shutil.which("npm")
+    if npm is None:
+        return None
+    os.makedirs(PRETTIER_CACHE_DIR, exist_ok=True)
+    try:
+        subprocess.run([npm, "install", "--no-save", "--no-audit", "--no-fund", "--prefix", PRETTIER_CACHE_DIR,
+                        f"prettier@{version}"], capture_output=True, timeout=INSTALL_TIMEOUT, check=True)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning("Could not install prettier@%s: %s", version, e)
+        return None
+    return find_prettier(version)
+
+class PrettierWorker:
+    """
+    A Node process that keeps prettier loaded and formats one file per request.
+
+    The process is started on the first request and restarted if it dies. Requests are sent
+    one at a time.
+
+    Args:
+        package_dir (str): Directory of the prettier package to load.
+        timeout (float): Seconds to wait for a response before the worker is killed.
+    """
+
+    def __init__(self, package_dir, timeout=FORMATTER_TIMEOUT):
+        self.package_dir = package_dir
+        self.version = f"prettier@{_installed_version(package_dir)}"
+        self.timeout = timeout
+        self._process = None
+        self._buffer = b""
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _start(self):
+        node = shutil.which("node")
+        if node is None:
+            raise FormatterError("node is not installed")
+        self._process = subprocess.Popen([node, "-e", WORKER_SCRIPT, self.package_dir],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL)
+        self._buffer = b""
+
+    def _read_line(self, deadline):
+        # Reads the raw pipe until a whole line arrives, so a partial line cannot block past the deadline
+        stdout = self._process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return b""
+            ready, _, _ = select.select([stdout], [], [], remaining)
+            if ready:
+                chunk = os.read(stdout, 65536)
+                if not chunk:
+                    return b""
+                self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line
+
+    def format(self, source, filepath):
+        """
+        Returns source formatted by prettier, which infers the parser from filepath.
+        """
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            self._next_id += 1
+            request = {"id": self._next_id, "source": source, "filepath": filepath}
+            try:
+                self._process.stdin.write(json.dumps(request).encode("utf-8") + b"\n")
+                self._process.stdin.flush()
+                line = self._read_line(time.monotonic() + self.timeout)
+            except OSError as e:
+                self._stop()
+                raise FormatterError(f"prettier worker failed: {e}")
+            if not line:
+                self._stop()
+                raise FormatterError("prettier worker exited or timed out")
+        response = json.loads(line)
+        if "error" in response:
+            raise FormatterError(response["error"])
+        return response["output"]
+
+    def _stop(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+            self._buffer = b""
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+_ATX_HEADING = re.compile(r"^( {0,3})(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+_EMPTY_HEADING = re.compile(r"^ {0,3}(#{1,6})[ \t]*#*[ \t]*$")
+_THEMATIC_BREAK = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_SETEXT_UNDERLINE = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+_BULLET = re.compile(r"^(\s*)[*+](\s+)")
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+# Inline markup, tables, HTML, entities, escapes, ordered lists and indented blocks, none of which
+# format_markdown rewrites the way prettier does
+_UNSUPPORTED = re.compile(r"[*_|<>\[\]&\\]|^\s|^\d+[.)]|^[-+](?:\s|$)")
+_LIST_MARKER = re.compile(r"^[-*+] (?=\S)")
+
+def fallback_supported(text):
+    """
+    Returns whether format_markdown formats text exactly as prettier would.
+
+    Only documents made of headings, thematic breaks, flat bullet lists using one marker, plain
+    paragraphs and bare fenced code blocks qualify, with lists and code blocks set off from
+    paragraphs by blank lines. The check is conservative and rejects anything else.
+    """
+    fence = None
+    previous = "blank"
+    markers = set()
+    for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        if fence is not None:
+            if line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+                fence = None
+                previous = "fence"
+            continue
+        line = line.rstrip()
+        opening = _FENCE.match(line)
+        if opening:
+            fence = opening.group(1)
+            # An info string may hold anything, so only bare fences qualify
+            if line.strip().strip(fence[0]) or previous not in ("blank", "break"):
+                return False
+            continue
+        if not line:
+            previous = "blank"
+            continue
+        if previous == "fence":
+            return False
+        if _THEMATIC_BREAK.match(line) or _EMPTY_HEADING.match(line):
+            previous = "break"
+            continue
+        heading = _ATX_HEADING.match(line)
+        if heading:
+            if _UNSUPPORTED.search(heading.group(3)):
+                return False
+            previous = "break"
+            continue
+        marker = _LIST_MARKER.match(line)
+        if marker:
+            markers.add(line[0])
+            if previous == "text" or len(markers) > 1:
+                return False
+            line = line[marker.end():]
+        elif previous == "list":
+            return False
+        if _UNSUPPORTED.search(line):
+            return False
+        previous = "list" if marker else "text"
+    return fence is None
+
+def format_markdown(text):
+    """
+    Formats Markdown with the normalizations prettier applies to common documents.
+
+    Line endings become LF, trailing whitespace is removed, ATX headings are normalized and
+    setext headings converted to ATX, * and + bullets become -, thematic breaks become ---,
+    headings are separated from their neighbours by a blank line, runs of blank lines are
+    collapsed, and the result ends with a single newline. Fenced code blocks are left as they
+    are. Other constructs (emphasis markers, tables, list renumbering, escapes) are not
+    rewritten, so documents that use them can format differently from prettier; fallback_supported
+    tells which documents are safe.
+    """
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    output = []
+    fence = None
+
+    def blank_line():
+        if output and output[-1] != "":
+            output.append("")
+
+    for line in lines:
+        if fence is not None:
+            output.append(line)
+            if line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+                fence = None
+            continue
+        opening = _FENCE.match(line)
+        if opening:
+            fence = opening.group(1)
+            output.append(line.rstrip())
+            continue
+        line = line.rstrip()
+        if not line:
+            blank_line()
+            continue
+        underline = _SETEXT_UNDERLINE.match(line)
+        if underline and output and output[-1] and (len(output) == 1 or output[-2] == "") \
+                and not output[-1].startswith(("#", "-", "*", "+", ">", " ")):
+            level = "#" if underline.group(1)[0] == "=" else "##"
+            output[-1] = f"{level} {output[-1].strip()}"
+            output.append("")
+            continue
+        if _THEMATIC_BREAK.match(line):
+            blank_line()
+            output.extend(["---", ""])
+            continue
+        heading = _ATX_HEADING.match(line) or _EMPTY_HEADING.match(line)
+        if heading:
+            blank_line()
+            if heading.re is _ATX_HEADING:
+                output.append(f"{heading.group(2)} {heading.group(3)}")
+            else:
+                output.append(heading.group(1))
+            output.append("")
+            continue
+        output.append(_BULLET.sub(lambda match: f"{match.group(1)}-{match.group(2)}", line))
+    while output and output[-1] == "":
+        output.pop()
+    while output and output[0] == "":
+        output.pop(0)
+    return "\n".join(output) + "\n" if output else ""
+
+class FormatterService:
+    """
+    Formats files with prettier through a persistent worker, falling back to format_markdown,
+    and caches the SHA-256 of each result by content hash and formatter version.
+
+    Args:
+        version (str): Prettier version to use.
+        cache_size (int): Results kept in the cache.
+    """
+
+    def __init__(self, version=PRETTIER_VERSION, cache_size=RESULT_CACHE_SIZE):
+        self.version = version
+        self.cache_size = cache_size
+        self._worker = None
+        self._resolved = False
+        self._installer = None
+        self._resolve_lock = threading.Lock()
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+
+    def _get_worker(self):
+        # Locating prettier happens once per process; a missing one is installed in the background
+        with self._resolve_lock:
+            if not self._resolved:
+                self._resolved = True
+                node = shutil.which("node")
+                package_dir = find_prettier(self.version) if node else None
+                if package_dir is not None:
+                    self._worker = PrettierWorker(package_dir)
+                elif node and PRETTIER_AUTO_INSTALL:
+                    logger.warning("prettier@%s is not installed; installing it in the background", self.version)
+                    self._installer = threading.Thread(target=self._install, name="prettier-install", daemon=True)
+                    self._installer.start()
+                else:
+                    logger.warning("prettier@%s is unavailable; formatting with the Python fallback", self.version)
+            return self._worker
+
+    def _install(self):
+        package_dir = install_prettier(self.version)
+        if package_dir is None:
+            logger.warning("prettier@%s is unavailable; formatting with the Python fallback", self.version)
+            return
+        with self._resolve_lock:
+            self._worker = PrettierWorker(package_dir)
+
+    def formatter_version(self):
+        """
+        Returns the version string of the formatter in use, which is part of every cache key.
+        """
+        worker = self._get_worker()
+        return worker.version if worker is not None else FALLBACK_VERSION
+
+    def format_source(self, source, filepath):
+        """
+        Returns (formatted text, formatter version) for the source of a file.
+
+        Raises:
+            FormatterError: Prettier is unavailable and the fallback cannot match its output for
+                this source, or prettier rejected the source.
+        """
+        worker = self._get_worker()
+        if worker is None:
+            if not filepath.lower().endswith((".md", ".markdown")) or not fallback_supported(source):
+                raise FormatterError(f"prettier@{self.version} is unavailable and the fallback formatter "
+                                     f"cannot reproduce its output for {os.path.basename(filepath)}")
+            return format_markdown(source), FALLBACK_VERSION
+        return worker.format(source, filepath), worker.version
+
+    def formatted_sha256(self, path):
+        """
+        Returns the hex SHA-256 of a file formatted as `prettier <path>` would print it.
+
+        Only prettier results are cached, so a fallback answer is never reused once prettier
+        has been installed.
+        """
+        with open(path, "rb") as file:
+            content = file.read()
+        key = (hashlib.sha256(content).hexdigest(), self.formatter_version())
+        with self._results_lock:
+            digest = self._results.get(key)
+            if digest is not None:
+                self._results.move_to_end(key)
+                return digest
+        formatted, version = self.format_source(content.decode("utf-8"), path)
+        digest = hashlib.sha256(formatted.encode("utf-8")).hexdigest()
+        if version == FALLBACK_VERSION:
+            return digest
+        with self._results_lock:
+            self._results[key] = digest
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return digest
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.close()
+
+PRETTIER = FormatterService()
+atexit.register(PRETTIER.close)
+
+def main():
+    parser = argparse.ArgumentParser(description="Install the prettier the formatting service uses.")
+    parser.add_argument("--install", action="store_true", help="install prettier into PRETTIER_CACHE_DIR if it is not found")
+    args = parser.parse_args()
+    package_dir = find_prettier()
+    if package_dir is None and args.install:
+        package_dir = install_prettier()
+    if package_dir is None:
+        sys.exit(f"prettier@{PRETTIER_VERSION} is not installed")
+    print(f"prettier@{PRETTIER_VERSION} is installed in {package_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+import re
+import numpy as np
+
+_NUMBER = r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?"
+# An array literal is one token, converted in bulk; any other character is an error
+_TOKEN = re.compile(rf"\s*(?:(?P<number>{_NUMBER})|(?P<name>[A-Za-z_][A-Za-z0-9_.]*)|(?P<punct>[(),])"
+                    rf"|\{{(?P<array>[^{{}}]*)\}}|(?P<error>\S))")
+_CELL = re.compile(rf"\s*{_NUMBER}\s*")
+_PARENTHESIS = re.compile(r"[()]")
+# SORTBY over at most this many cells of array literals sorts with sorted(); numpy's setup
+# costs more than it saves on arrays this small
+SMALL_SORT_CELLS = 256
+
+class Grid:
+    """
+    A lazily evaluated arithmetic grid: cell (r, c) holds start + step * (c + r * stride).
+
+    SEQUENCE produces one, and ARRAY_CONSTRAIN and TAKE only narrow or shift it, so a formula
+    like SUM(ARRAY_CONSTRAIN(SEQUENCE(...))) is answered without creating a single cell.
+    """
+
+    def __init__(self, rows, cols, start, step, stride=None):
+        self.rows = max(int(rows), 0)
+        self.cols = max(int(cols), 0)
+        self.start = start
+        self.step = step
+        self.stride = self.cols if stride is None else stride
+
+    def window(self, row_offset, col_offset, rows, cols):
+        """
+        Returns the sub-grid of the given size whose top-left cell is (row_offset, col_offset).
+        """
+        start = self.start + self.step * (col_offset + row_offset * self.stride)
+        return Grid(rows, cols, start, self.step, self.stride)
+
+    def total(self):
+        """
+        Sums the grid in closed form as an arithmetic series over rows and columns.
+        """
+        rows, cols = self.rows, self.cols
+        cells = rows * cols
+        if not cells:
+            return 0
+        # sum(c) over a row is cols*(cols-1)/2, and sum(r) over the rows is rows*(rows-1)/2
+        offsets = rows * (cols * (cols - 1) // 2) + self.stride * cols * (rows * (rows - 1) // 2)
+        return cells * self.start + self.step * offsets
+
+    def materialize(self):
+        row_index = np.arange(self.rows).reshape(-1, 1)
+        col_index = np.arange(self.cols).reshape(1, -1)
+        return self.start + self.step * (col_index + row_index * self.stride)
+
+def _as_array(value):
+    if isinstance(value, Grid):
+        return value.materialize()
+    array = np.asarray(value)
+    if array.ndim == 0:
+        array = array.reshape(1, 1)
+    elif array.ndim == 1:
+        array = array.reshape(1, -1)
+    return array
+
+def _as_scalar(value):
+    if type(value) is int:
+        return value
+    if isinstance(value, list):
+        value = np.asarray(value)
+    if isinstance(value, Grid) or (isinstance(value, np.ndarray) and value.size != 1):
+        raise ValueError("Expected a single number")
+    value = value.item() if isinstance(value, np.ndarray) else value
+    return int(value) if float(value).is_integer() else value
+
+def _number(text):
+    # The text already matched _NUMBER, so only the kind of literal is left to decide
+    return float(text) if "." in text or "e" in text or "E" in text else int(text)
+
+def _cell(text):
+    if _CELL.fullmatch(text) is None:
+        raise ValueError(f"Expected a number in array literal, found {text.strip()!r}")
+    return _number(text.strip())
+
+def _array_literal(body):
+    """
+    Converts the text between the braces of an array literal into rows of numbers.
+
+    Cells are split with str.split and converted with int in one pass; only a literal that
+    holds something other than integers is checked and converted cell by cell.
+    """
+    rows = [row.split(",") for row in body.split(";")]
+    try:
+        rows = [list(map(int, row)) for row in rows]
+    except ValueError:
+        rows = [[_cell(cell) for cell in row] for row in rows]
+    if len(rows) > 1 and len({len(row) for row in rows}) != 1:
+        raise ValueError("Array literal rows must have equal length")
+    return rows
+
+def tokenize(formula):
+    formula = formula.strip()
+    tokens = []
+    for number, name, punct, array, error in _TOKEN.findall(formula, 1 if formula.startswith("=") else 0):
+        if punct:
+            tokens.append(("punct", punct))
+        elif name:
+            tokens.append(("name", name.upper()))
+        elif number:
+            tokens.append(("number", _number(number)))
+        elif error:
+            raise ValueError(f"Unexpected character in formula: {error!r}")
+        else:
+            tokens.append(("array", _array_literal(array)))
+    return tokens
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            raise ValueError(f"Expected {value or kind}, found {token[1]!r}")
+        self.position += 1
+        return token
+
+    def expression(self):
+        kind, value = self.peek()
+        self.position += 1
+        if kind == "number" or kind == "array":
+            return (kind, value)
+        if kind != "name":
+            raise ValueError(f"Unexpected token {value!r}")
+        self.take("punct", "(")
+        args = []
+        if self.peek() == ("punct", ")"):
+            self.position += 1
+            return ("call", value, args)
+        while True:
+            args.append(self.expression())
+            separator = self.take("punct")[1]
+            if separator == ")":
+                return ("call", value, args)
+            if separator != ",":
+                raise ValueError(f"Expected ) or ,, found {separator!r}")
+
+def parse(formula):
+    """
+    Parses a formula such as "=SUM(TAKE(SORTBY({1,2},{2,1}),1,1))" into a nested tuple tree.
+    """
+    parser = _Parser(tokenize(formula))
+    tree = parser.expression()
+    if parser.position != len(parser.tokens):
+        raise ValueError(f"Unexpected trailing input: {parser.peek()[1]!r}")
+    return tree
+
+def _sequence(rows, cols=1, start=1, step=1):
+    return Grid(_as_scalar(rows), _as_scalar(cols), _as_scalar(start), _as_scalar(step))
+
+def _array_constrain(array, num_rows, num_cols):
+    num_rows, num_cols = _as_scalar(num_rows), _as_scalar(num_cols)
+    if isinstance(array, Grid):
+        return array.window(0, 0, min(array.rows, num_rows), min(array.cols, num_cols))
+    return _as_array(array)[:num_rows, :num_cols]
+
+def _take_span(size, count):
+    # Negative counts take from the end, as in Excel
+    if count is None:
+        return 0, size
+    count = int(count)
+    if count >= 0:
+        return 0, min(count, size)
+    return max(size + count, 0), min(-count, size)
+
+def _take(array, rows=None, cols=None):
+    if isinstance(array, _TopK):
+        return array.take(rows, cols)
+    rows = None if rows is None else _as_scalar(rows)
+    cols = None if cols is None else _as_scalar(cols)
+    if isinstance(array, list):
+        row_offset, row_count = _take_span(len(array), rows)
+        col_offset, col_count = _take_span(len(array[0]), cols)
+        return [row[col_offset:col_offset + col_count] for row in array[row_offset:row_offset + row_count]]
+    if isinstance(array, Grid):
+        row_offset, row_count = _take_span(array.rows, rows)
+        col_offset, col_count = _take_span(array.cols, cols)
+        return array.window(row_offset, col_offset, row_count, col_count)
+    array = _as_array(array)
+    row_offset, row_count = _take_span(array.shape[0], rows)
+    col_offset, col_count = _take_span(array.shape[1], cols)
+    return array[row_offset:row_offset + row_count, col_offset:col_offset + col_count]
+
+class _TopK:
+    """
+    A SORTBY result that has not been sorted yet.
+
+    TAKE only needs the first k entries of the sorted vector, so it finds the k-th smallest
+    key with a linear-time np.partition and only orders the k entries selected. Ties keep their original order,
+    matching the stable sort Excel and Google Sheets use.
+    """
+
+    def __init__(self, values, keys, descending, axis):
+        self.values = values
+        self.keys = keys
+        self.descending = descending
+        self.axis = axis
+
+    def _order(self, count):
+        keys = -self.keys if self.descending else self.keys
+        size = keys.size
+        if count >= size:
+            return np.argsort(keys, kind="stable")
+        if count <= 0:
+            return np.array([], dtype=np.int64)
+        # Every key below the k-th smallest is in; keys equal to it are admitted in index order
+        threshold = np.partition(keys, count - 1)[count - 1]
+        below = np.flatnonzero(keys < threshold)
+        equal = np.flatnonzero(keys == threshold)[:count - below.size]
+        chosen = np.concatenate([below, equal])
+        return chosen[np.lexsort((chosen, keys[chosen]))]
+
+    def sorted(self):
+        return np.take(self.values, self._order(self.keys.size), axis=self.axis)
+
+    def take(self, rows=None, cols=None):
+        rows = None if rows is None else _as_scalar(rows)
+        cols = None if cols is None else _as_scalar(cols)
+        along = cols if self.axis == 1 else rows
+        across = rows if self.axis == 1 else cols
+        if along is None or along < 0:
+            result = self.sorted()
+        else:
+            result = np.take(self.values, self._order(along), axis=self.axis)
+        if across is not None:
+            offset, count = _take_span(result.shape[1 - self.axis], across)
+            result = result[offset:offset + count] if self.axis == 1 else result[:, offset:offset + count]
+        if along is not None and along < 0:
+            offset, count = _take_span(result.shape[self.axis], along)
+            result = result[:, offset:offset + count] if self.axis == 1 else result[offset:offset + count]
+        return result
+
+def _sort_rows(rows, by_rows, descending):
+    # Small literals are sorted in Python; sorted() is stable, also with reverse=True
+    if len(by_rows) == 1 and len(by_rows[0]) == len(rows[0]):
+        keys = by_rows[0]
+        order = sorted(range(len(keys)), key=keys.__getitem__, reverse=descending)
+        return [[row[index] for index in order] for row in rows]
+    if all(len(row) == 1 for row in by_rows) and len(by_rows) == len(rows):
+        keys = [row[0] for row in by_rows]
+        order = sorted(range(len(keys)), key=keys.__getitem__, reverse=descending)
+        return [rows[index] for index in order]
+    raise ValueError("SORTBY by_array must be a single row or column matching the array")
+
+def _sortby(array, by_array, order=1):
+    if isinstance(array, list) and isinstance(by_array, list) \
+            and len(array) * len(array[0]) <= SMALL_SORT_CELLS:
+        return _sort_rows(array, by_array, _as_scalar(order) == -1)
+    values = _as_array(array)
+    keys = _as_array(by_array)
+    order = _as_scalar(order)
+    if keys.shape[0] == 1 and keys.shape[1] == values.shape[1]:
+        axis = 1
+    elif keys.shape[1] == 1 and keys.shape[0] == values.shape[0]:
+        axis = 0
+    else:
+        raise ValueError("SORTBY by_array must be a single row or column matching the array")
+    return _TopK(values, keys.ravel(), order == -1, axis)
+
+def _sum(*args):
+    total = 0
+    for arg in args:
+        if isinstance(arg, _TopK):
+            arg = arg.sorted()
+        if isinstance(arg, Grid):
+            total += arg.total()
+        elif isinstance(arg, np.ndarray):
+            total += arg.sum().item()
+        elif isinstance(arg, list):
+            total += sum(map(sum, arg))
+        else:
+            total += arg
+    return total
+
+FUNCTIONS = {
+    "SUM": _sum,
+    "SEQUENCE": _sequence,
+    "ARRAY_CONSTRAIN": _array_constrain,
+    "TAKE": _take,
+    "SORTBY": _sortby,
+}
+
+def evaluate(tree):
+    kind = tree[0]
+    if kind == "number":
+        return tree[1]
+    if kind == "array":
+        # Literals stay nested lists until a function needs them as an ndarray
+        return tree[1]
+    name, args = tree[1], tree[2]
+    if name not in FUNCTIONS:
+        raise ValueError(f"Unsupported function: {name}")
+    return FUNCTIONS[name](*[evaluate(arg) for arg in args])
+
+def evaluate_formula(formula):
+    """
+    Evaluates a formula built from SUM, SEQUENCE, ARRAY_CONSTRAIN, TAKE and SORTBY.
+
+    Returns:
+        A number for scalar results, otherwise a nested list.
+    """
+    result = evaluate(parse(formula))
+    if isinstance(result, _TopK):
+        result = result.sorted()
+    if isinstance(result, Grid):
+        result = result.materialize()
+    if isinstance(result, np.ndarray):
+        return result.tolist()
+    return result
+
+def extract_formula(text):
+    """
+    Returns the first "=NAME(...)" formula in a piece of text, with balanced parentheses.
+    """
+    match = re.search(r"=\s*[A-Za-z_]+\s*\(", text)
+    if match is None:
+        raise ValueError("No formula found")
+    depth = 0
+    for parenthesis in _PARENTHESIS.finditer(text, match.end() - 1):
+        if parenthesis.group() == "(":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return text[match.start():parenthesis.end()]
+    raise ValueError("Unbalanced parentheses in formula")
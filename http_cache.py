@@ -0,0 +1,154 @@
+"""
+HTTP caching for /api/ answers: strong ETags, conditional GET and compression.
+
+Answers are pure functions of the question and the bundled assets, so a GET answer can be
+reused by browsers and CDNs for HTTP_MAX_AGE seconds and revalidated with If-None-Match after
+that; a matching tag gets a bodyless 304. Bodies of COMPRESS_MIN_BYTES or more are sent with
+brotli (when the brotli package is installed) or gzip, whichever the client accepts, and the
+compressed copies of recent answers are kept so polling for the same answer compresses once.
+
+Configuration comes from the environment:
+    HTTP_MAX_AGE               seconds a GET answer may be reused, default 300
+    HTTP_COMPRESS_MIN_BYTES    smallest body that is compressed, default 1024
+    HTTP_COMPRESSED_CACHE_BYTES    bytes of compressed copies kept, default 16 MiB
+"""
+import os
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+HTTP_MAX_AGE = int(os.environ.get("HTTP_MAX_AGE", "300"))
+COMPRESS_MIN_BYTES = int(os.environ.get("HTTP_COMPRESS_MIN_BYTES", "1024"))
+COMPRESSED_CACHE_BYTES = int(os.environ.get("HTTP_COMPRESSED_CACHE_BYTES", str(16 << 20)))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+_brotli = None
+
+def _brotli_module():
+    # Imported on first use; False once the import has failed, so it is only tried once
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+            _brotli = brotli
+        except ImportError:
+            _brotli = False
+    return _brotli
+
+def strong_etag(body):
+    """
+    Returns the unquoted strong entity tag of a body: the first 32 hex digits of its SHA-256.
+    """
+    return hashlib.sha256(body).hexdigest()[:32]
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return _brotli_module().compress(body, quality=BROTLI_QUALITY)
+    # A fixed mtime keeps the gzip bytes, and so the tag of the compressed copy, stable
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+class CompressedBodies:
+    """
+    Thread-safe LRU of compressed bodies, keyed by entity tag and content coding, holding up
+    to max_bytes of compressed data.
+    """
+
+    def __init__(self, max_bytes=COMPRESSED_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag, encoding, body):
+        """
+        Returns body compressed with encoding, compressing it on a miss.
+        """
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+        compressed = _compress(body, encoding)
+        if len(compressed) > self.max_bytes:
+            return compressed
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self._size += len(compressed)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return compressed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+COMPRESSED_BODIES = CompressedBodies()
+
+def choose_encoding(request):
+    """
+    Picks the content coding for a response: "br" or "gzip" if the client accepts it, else None.
+    Brotli wins ties, but only when the brotli package is installed.
+    """
+    accepted = request.accept_encodings
+    choices = []
+    if accepted.quality("br") > 0 and _brotli_module():
+        choices.append((accepted.quality("br"), 1, "br"))
+    if accepted.quality("gzip") > 0:
+        choices.append((accepted.quality("gzip"), 0, "gzip"))
+    return max(choices)[2] if choices else None
+
+def cache_answer_response(request, response, cacheable):
+    """
+    Adds validators, cache headers and compression to an /api/ answer response.
+
+    A cacheable response gets a strong ETag and Cache-Control: public, and becomes a 304 when
+    the request's If-None-Match lists its tag; other responses are marked no-store. Each
+    content coding of a body has its own tag (the identity tag with "-br" or "-gzip" appended),
+    and only the tag of the coding chosen for this request yields a 304, so a client never
+    gets the tag of one coding for a body it cached in another.
+
+    Args:
+        request: The werkzeug request being answered.
+        response: The werkzeug response holding the JSON body; modified in place.
+        cacheable (bool): The answer may be stored and reused, i.e. a GET or HEAD answer
+            without an upload that is not an error.
+
+    Returns:
+        The response.
+    """
+    body = response.get_data()
+    compressible = len(body) >= COMPRESS_MIN_BYTES
+    if compressible:
+        response.vary.add("Accept-Encoding")
+    if not cacheable:
+        response.headers["Cache-Control"] = "no-store"
+    else:
+        response.headers["Cache-Control"] = f"public, max-age={HTTP_MAX_AGE}"
+    encoding = choose_encoding(request) if compressible else None
+    etag = strong_etag(body)
+    if cacheable:
+        selected = f"{etag}-{encoding}" if encoding else etag
+        response.set_etag(selected)
+        if request.if_none_match and request.if_none_match.contains_weak(selected):
+            response.status_code = 304
+            response.set_data(b"")
+            # A 304 carries no body, so it describes no content type or length
+            for header in ("Content-Type", "Content-Length"):
+                response.headers.pop(header, None)
+            return response
+    if encoding:
+        response.set_data(COMPRESSED_BODIES.get(etag, encoding, body))
+        response.headers["Content-Encoding"] = encoding
+    return response
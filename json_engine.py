@@ -0,0 +1,123 @@
+import io
+import os
+import hashlib
+from contextlib import contextmanager
+from json.encoder import encode_basestring_ascii
+
+# Characters of text decoded and split into lines per batch
+BATCH_CHARS = 1 << 20
+
+@contextmanager
+def _open_text(source, encoding):
+    """
+    Opens a path, or rewinds a seekable binary stream, for reading text with universal newlines.
+    A stream passed in is left open for its owner.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding=encoding) as file:
+            yield file
+        return
+    source.seek(0)
+    text = io.TextIOWrapper(source, encoding=encoding)
+    try:
+        yield text
+    finally:
+        text.detach()
+
+def _batches(text, batch_chars):
+    # Yields lists of the lines holding an "=", about batch_chars characters at a time
+    for lines in iter(lambda: text.readlines(batch_chars), []):
+        yield [line for line in lines if "=" in line]
+
+def _split(line):
+    return line.strip().split("=", 1)
+
+def _members(batch):
+    # The members of a dict as compact JSON without the braces, as json.dumps would write them
+    return ",".join(map(":".join, zip(map(encode_basestring_ascii, batch),
+                                      map(encode_basestring_ascii, batch.values()))))
+
+def _first_pass(source, encoding, batch_chars):
+    """
+    Streams the compact JSON object into SHA-256, collecting the keys that occur more than
+    once with their latest values. The digest is only right if there are none.
+
+    A hash per key is kept to spot repeats across batches; batches without one are written
+    whole. A colliding pair of distinct keys is only taken for a duplicate, which the second
+    pass writes out correctly anyway.
+
+    Returns:
+        tuple: (digest, {duplicated key: latest value}).
+    """
+    digest = hashlib.sha256(b"{")
+    separator = ""
+    seen = set()
+    final_values = {}
+    with _open_text(source, encoding) as text:
+        for lines in _batches(text, batch_chars):
+            batch = dict(map(_split, lines))
+            hashes = set(map(hash, batch))
+            if len(hashes) == len(lines) and seen.isdisjoint(hashes):
+                seen |= hashes
+            else:
+                for key, value in map(_split, lines):
+                    key_hash = hash(key)
+                    if key_hash in seen:
+                        final_values[key] = value
+                    else:
+                        seen.add(key_hash)
+            if batch and not final_values:
+                digest.update((separator + _members(batch)).encode("ascii"))
+                separator = ","
+    digest.update(b"}")
+    return digest, final_values
+
+def _second_pass(source, encoding, batch_chars, final_values):
+    """
+    Streams the compact JSON object into SHA-256, writing each key in final_values once, at its
+    first occurrence, with its final value.
+    """
+    digest = hashlib.sha256(b"{")
+    separator = ""
+    written = set()
+    with _open_text(source, encoding) as text:
+        for lines in _batches(text, batch_chars):
+            batch = dict(map(_split, lines))
+            if not final_values.keys().isdisjoint(batch):
+                batch = {}
+                for key, value in map(_split, lines):
+                    if key in final_values:
+                        if key in written:
+                            continue
+                        written.add(key)
+                        value = final_values[key]
+                    batch[key] = value
+            if batch:
+                digest.update((separator + _members(batch)).encode("ascii"))
+                separator = ","
+    digest.update(b"}")
+    return digest
+
+def kv_json_sha256(source, encoding="utf-8", batch_chars=BATCH_CHARS):
+    """
+    Returns the SHA-256 of a key=value text file converted to compact JSON, the way
+    json.dumps(obj, separators=(',', ':')) would serialize the dict built from its lines.
+
+    The JSON is emitted into the hash as the file is read, without building the dict or the
+    string. A later duplicate of a key replaces the value but keeps the first key's position,
+    as dict assignment does; since the hash cannot be rewritten, a file with duplicate keys is
+    read a second time, emitting each key's final value at its first position. Memory holds a
+    hash per distinct key and the latest values of duplicated keys only.
+
+    Args:
+        source: Path to the file, or a seekable binary stream.
+        encoding (str): Text encoding of the file.
+        batch_chars (int): Characters decoded and split into lines at a time.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    digest, final_values = _first_pass(source, encoding, batch_chars)
+    if final_values:
+        digest = _second_pass(source, encoding, batch_chars, final_values)
+    return digest.hexdigest()
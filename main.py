@@ -1,15 +1,42 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, request, jsonify, g
 from flask_cors import CORS
 import os
-import logging
-from file_handler import process_uploaded_file
+import time
+from file_handler import process_uploaded_file, spooled_stream_factory
 from question_handler import process_question
+from answer_cache import ANSWER_CACHE, is_error_answer
+from batch import BatchError, answer_batch, parse_batch
+from metrics import METRICS, render_prometheus
+from http_cache import cache_answer_response
+from request_log import REQUEST_ID, configure_logging, new_request_id, timed_request
 
-logging.basicConfig(level=logging.DEBUG)
+configure_logging()
+
+class UploadRequest(Request):
+    # Each uploaded file is received into its own spooled buffer instead of werkzeug's default
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spooled_stream_factory(total_content_length, content_type, filename, content_length)
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app)
 
+@app.before_request
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.request_id_token = new_request_id(request.headers.get('X-Request-ID'))
+
+@app.after_request
+def _log_request(response):
+    timed_request(request.method, request.path, response.status_code, g.request_started)
+    return response
+
+@app.teardown_request
+def _end_request(exc):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        REQUEST_ID.reset(token)
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     return "Hello, World!"
@@ -35,9 +62,43 @@ def answer_question():
         return jsonify({'error': 'No question provided'}), 400
 
     extracted_data = process_uploaded_file(file) if file else None
-    answer = process_question(question, extracted_data)
+    try:
+        answer = process_question(question, extracted_data)
+    finally:
+        # Release the request's upload buffers now rather than at garbage collection
+        if hasattr(extracted_data, "close"):
+            extracted_data.close()
+
+    # GET answers without an upload can be reused by browsers and CDNs and revalidated by ETag
+    cacheable = request.method in ('GET', 'HEAD') and not file and not is_error_answer(answer)
+    response = cache_answer_response(request, jsonify({'answer': str(answer)}), cacheable)
+    return _corsify_actual_response(response)
+
+@app.route('/api/batch', methods=['POST', 'OPTIONS'])
+def answer_question_batch():
+    if request.method == 'OPTIONS':
+        return _build_cors_preflight_response()
+
+    # Multipart batches carry the list as a JSON "questions" field next to the files
+    payload = request.form.get('questions') if request.form else request.get_json(silent=True)
+    try:
+        items = parse_batch(payload)
+    except BatchError as e:
+        return jsonify({'error': str(e)}), 400
+
+    started = time.perf_counter()
+    answers = answer_batch(items, request.files)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    return _corsify_actual_response(jsonify({'answers': answers, 'time_ms': elapsed_ms}))
+
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    return _corsify_actual_response(jsonify(ANSWER_CACHE.stats()))
 
-    return _corsify_actual_response(jsonify({'answer': str(answer)}))
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    body = render_prometheus(METRICS, ANSWER_CACHE.stats())
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
 
 # Helper functions to handle CORS responses
 def _build_cors_preflight_response():
@@ -0,0 +1,212 @@
+import bisect
+import threading
+import time
+
+# Latency bucket upper bounds in seconds, roughly x2.5 apart from 50 µs to 60 s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+class HandlerStats:
+    """
+    Call, error and latency counters for one handler.
+
+    Latencies go into fixed buckets, so recording is a bisect and two additions and memory
+    does not grow with traffic. Quantiles are estimated from the buckets when scraped.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds, error=False):
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.calls += 1
+        self.errors += bool(error)
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def quantile(self, q):
+        """
+        Estimates a latency quantile by linear interpolation inside the bucket that holds it.
+        """
+        if not self.calls:
+            return 0.0
+        rank = q * self.calls
+        seen = 0
+        for index, count in enumerate(self.bucket_counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max_seconds
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max_seconds)
+            seen += count
+        return self.max_seconds
+
+class Metrics:
+    """
+    Process-wide instrumentation: per-handler calls, errors and latency, and upload volume.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._handlers = {}
+        self._uploads = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, handler_name, seconds, error=False):
+        """
+        Records one call of a handler.
+
+        Args:
+            handler_name (str): Name of the rule that answered.
+            seconds (float): Wall-clock time spent answering.
+            error (bool): The handler raised or returned an error message.
+        """
+        with self._lock:
+            stats = self._handlers.get(handler_name)
+            if stats is None:
+                stats = self._handlers[handler_name] = HandlerStats(self.buckets)
+            stats.observe(seconds, error)
+
+    def record_upload(self, file_ext, size):
+        """
+        Records an uploaded file of the given size in bytes.
+        """
+        with self._lock:
+            counters = self._uploads.setdefault(file_ext or "none", [0, 0])
+            counters[0] += 1
+            counters[1] += size
+
+    def snapshot(self):
+        """
+        Returns a JSON-friendly copy of every counter, with estimated latency quantiles.
+        """
+        with self._lock:
+            handlers = {}
+            for name, stats in self._handlers.items():
+                handlers[name] = {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "total_seconds": stats.total_seconds,
+                    "max_seconds": stats.max_seconds,
+                    "buckets": list(stats.bucket_counts),
+                    "quantiles": {q: stats.quantile(q) for q in QUANTILES},
+                }
+            uploads = {ext: {"count": count, "bytes": size} for ext, (count, size) in self._uploads.items()}
+        return {"handlers": handlers, "uploads": uploads, "uptime_seconds": time.time() - self.started_at}
+
+    def reset(self):
+        with self._lock:
+            self._handlers.clear()
+            self._uploads.clear()
+            self.started_at = time.time()
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_prometheus(metrics, cache_stats=None):
+    """
+    Renders metrics, and optionally AnswerCache.stats(), in the Prometheus text format.
+
+    Args:
+        metrics (Metrics): The instrumentation to export.
+        cache_stats (dict): Output of AnswerCache.stats(), if the cache should be included.
+
+    Returns:
+        str: The exposition text, version 0.0.4.
+    """
+    snapshot = metrics.snapshot()
+    lines = [
+        "# HELP answer_requests_total Questions answered, by handler.",
+        "# TYPE answer_requests_total counter",
+    ]
+    handlers = sorted(snapshot["handlers"].items())
+    for name, stats in handlers:
+        lines.append(f'answer_requests_total{{handler="{_label(name)}"}} {stats["calls"]}')
+    lines += [
+        "# HELP answer_errors_total Questions whose handler raised or returned an error, by handler.",
+        "# TYPE answer_errors_total counter",
+    ]
+    for name, stats in handlers:
+        lines.append(f'answer_errors_total{{handler="{_label(name)}"}} {stats["errors"]}')
+    lines += [
+        "# HELP answer_latency_seconds Time spent answering a question, by handler.",
+        "# TYPE answer_latency_seconds histogram",
+    ]
+    for name, stats in handlers:
+        label = _label(name)
+        cumulative = 0
+        for bound, count in zip(metrics.buckets, stats["buckets"]):
+            cumulative += count
+            lines.append(f'answer_latency_seconds_bucket{{handler="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'answer_latency_seconds_bucket{{handler="{label}",le="+Inf"}} {stats["calls"]}')
+        lines.append(f'answer_latency_seconds_sum{{handler="{label}"}} {_number(stats["total_seconds"])}')
+        lines.append(f'answer_latency_seconds_count{{handler="{label}"}} {stats["calls"]}')
+    lines += [
+        "# HELP answer_latency_quantile_seconds Estimated latency quantiles, by handler.",
+        "# TYPE answer_latency_quantile_seconds gauge",
+    ]
+    for name, stats in handlers:
+        for q, value in stats["quantiles"].items():
+            lines.append(f'answer_latency_quantile_seconds{{handler="{_label(name)}",quantile="{q}"}} {_number(value)}')
+    lines += [
+        "# HELP upload_files_total Uploaded files processed, by extension.",
+        "# TYPE upload_files_total counter",
+    ]
+    uploads = sorted(snapshot["uploads"].items())
+    for ext, counters in uploads:
+        lines.append(f'upload_files_total{{type="{_label(ext)}"}} {counters["count"]}')
+    lines += [
+        "# HELP upload_bytes_total Bytes of uploaded files processed, by extension.",
+        "# TYPE upload_bytes_total counter",
+    ]
+    for ext, counters in uploads:
+        lines.append(f'upload_bytes_total{{type="{_label(ext)}"}} {counters["bytes"]}')
+
+    if cache_stats is not None:
+        lines += [
+            "# HELP answer_cache_hits_total Answer cache hits, by handler.",
+            "# TYPE answer_cache_hits_total counter",
+        ]
+        cache_handlers = sorted(cache_stats["handlers"].items())
+        for name, counters in cache_handlers:
+            lines.append(f'answer_cache_hits_total{{handler="{_label(name)}"}} {counters["hits"]}')
+        lines += [
+            "# HELP answer_cache_misses_total Answer cache misses, by handler.",
+            "# TYPE answer_cache_misses_total counter",
+        ]
+        for name, counters in cache_handlers:
+            lines.append(f'answer_cache_misses_total{{handler="{_label(name)}"}} {counters["misses"]}')
+        lines += [
+            "# HELP answer_cache_hit_ratio Fraction of answer cache lookups that hit.",
+            "# TYPE answer_cache_hit_ratio gauge",
+            f'answer_cache_hit_ratio {_number(float(cache_stats["hit_rate"]))}',
+            "# HELP answer_cache_entries Answers currently cached.",
+            "# TYPE answer_cache_entries gauge",
+            f'answer_cache_entries {cache_stats["size"]}',
+            "# HELP answer_cache_evictions_total Answers evicted to stay within the size limit.",
+            "# TYPE answer_cache_evictions_total counter",
+            f'answer_cache_evictions_total {cache_stats["evictions"]}',
+            "# HELP answer_cache_saved_seconds_total Compute time saved by cache hits.",
+            "# TYPE answer_cache_saved_seconds_total counter",
+            f'answer_cache_saved_seconds_total {_number(float(cache_stats["saved_seconds"]))}',
+        ]
+    lines += [
+        "# HELP process_uptime_seconds Seconds since metrics were started or reset.",
+        "# TYPE process_uptime_seconds gauge",
+        f'process_uptime_seconds {_number(float(snapshot["uptime_seconds"]))}',
+    ]
+    return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
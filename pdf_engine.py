@@ -0,0 +1,174 @@
+import io
+import os
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# Documents with fewer pages to extract than this are handled on the calling thread
+PARALLEL_MIN_PAGES = 16
+# Contiguous pages handed to a worker per task, so each worker parses the document once per batch
+PAGES_PER_TASK = 8
+PDF_TEXT_CACHE_SIZE = int(os.environ.get("PDF_TEXT_CACHE_SIZE", "32"))
+
+class PdfTextCache:
+    """
+    An LRU cache of extracted page text, keyed by the SHA-256 of the PDF's bytes.
+
+    Pages are cached individually, so a budgeted extraction that stopped after the first page
+    is extended, not repeated, when a later caller asks for more.
+    """
+
+    def __init__(self, max_documents=PDF_TEXT_CACHE_SIZE):
+        self.max_documents = max_documents
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def document(self, digest):
+        """
+        Returns a copy of the cached (page_count, {page_index: text}) entry for a document, or None.
+        """
+        with self._lock:
+            entry = self._documents.get(digest)
+            if entry is None:
+                return None
+            self._documents.move_to_end(digest)
+            return entry[0], dict(entry[1])
+
+    def store(self, digest, page_count, texts):
+        """
+        Records extracted page texts ({page_index: text}) for a document.
+        """
+        with self._lock:
+            entry = self._documents.get(digest)
+            if entry is None:
+                entry = self._documents[digest] = (page_count, {})
+            entry[1].update(texts)
+            self._documents.move_to_end(digest)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+
+PDF_TEXT_CACHE = PdfTextCache()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _process_pool(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(workers)
+            atexit.register(_executor.shutdown, wait=False)
+        return _executor
+
+def _open_reader(data):
+    # PyPDF2 is only imported once a PDF is actually read
+    import PyPDF2
+    return PyPDF2.PdfReader(io.BytesIO(data))
+
+def _extract_range(data, start, stop):
+    # Runs in a worker process: parse the document and extract pages [start, stop)
+    reader = _open_reader(data)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+def _contiguous_runs(indices, limit):
+    # Groups page indices into (start, stop) runs of consecutive pages, at most limit long
+    runs = []
+    for index in indices:
+        if runs and runs[-1][1] == index and runs[-1][1] - runs[-1][0] < limit:
+            runs[-1][1] = index + 1
+        else:
+            runs.append([index, index + 1])
+    return runs
+
+def _default_workers():
+    return min(os.cpu_count() or 1, 8)
+
+def extract_pages(data, pages=None, max_chars=None, workers=None, digest=None, cache=PDF_TEXT_CACHE):
+    """
+    Extracts the text of a PDF held in memory, page by page.
+
+    Pages already in the cache are not parsed again. The remaining ones are extracted in
+    batches, spread over a process pool when there are at least PARALLEL_MIN_PAGES of them
+    and more than one worker. With max_chars, batches start at a single page and double in
+    size, and extraction stops after the first batch that brings the stripped text up to the
+    budget.
+
+    Args:
+        data (bytes): The PDF file contents.
+        pages: Iterable of 0-based page indices to extract, e.g. range(0, 3). None means all.
+        max_chars (int): Stop once the joined, stripped text has at least this many characters.
+        workers (int): Worker processes; None picks one per CPU.
+        digest (str): Hex SHA-256 of data, if the caller already has it.
+        cache (PdfTextCache): Cache to consult and fill, or None to bypass caching.
+
+    Returns:
+        list: Page texts in page order, possibly fewer than requested when max_chars is reached.
+    """
+    data = bytes(data)
+    digest = digest or hashlib.sha256(data).hexdigest()
+    entry = cache.document(digest) if cache is not None else None
+    reader = None
+    if entry is None:
+        reader = _open_reader(data)
+        entry = (len(reader.pages), {})
+    page_count, cached = entry
+    indices = [index for index in (range(page_count) if pages is None else pages) if 0 <= index < page_count]
+    workers = _default_workers() if workers is None else workers
+    full_batch = max(workers, 1) * PAGES_PER_TASK
+    batch_limit = 1 if max_chars is not None else full_batch
+
+    texts = []
+    length = 0
+    position = 0
+    while position < len(indices):
+        if indices[position] in cached:
+            text = cached[indices[position]]
+            texts.append(text)
+            length += len(text) + 1
+            position += 1
+        else:
+            # Gather the next uncached pages into one batch
+            stop = position
+            while stop < len(indices) and indices[stop] not in cached and stop - position < batch_limit:
+                stop += 1
+            batch = indices[position:stop]
+            batch_limit = min(batch_limit * 2, full_batch)
+            extracted = {}
+            if workers > 1 and len(batch) >= PARALLEL_MIN_PAGES:
+                runs = _contiguous_runs(batch, PAGES_PER_TASK)
+                executor = _process_pool(workers)
+                futures = [executor.submit(_extract_range, data, start, end) for start, end in runs]
+                for (start, end), future in zip(runs, futures):
+                    extracted.update(zip(range(start, end), future.result()))
+            else:
+                if reader is None:
+                    reader = _open_reader(data)
+                for index in batch:
+                    extracted[index] = reader.pages[index].extract_text() or ""
+            cached.update(extracted)
+            if cache is not None:
+                cache.store(digest, page_count, extracted)
+            for index in batch:
+                texts.append(extracted[index])
+                length += len(extracted[index]) + 1
+            position = stop
+        # The length is an upper bound on the stripped text, so only strip once it could suffice
+        if max_chars is not None and length >= max_chars and len("\n".join(texts).strip()) >= max_chars:
+            break
+    return texts
+
+def extract_text(data, pages=None, max_chars=None, workers=None, digest=None, cache=PDF_TEXT_CACHE):
+    """
+    Returns the text of a PDF held in memory, pages joined by newlines and stripped.
+
+    With max_chars the result is the first max_chars characters of the full text, computed
+    from only as many pages as needed. See extract_pages for the other arguments.
+    """
+    text = "\n".join(extract_pages(data, pages, max_chars, workers, digest, cache)).strip()
+    return text if max_chars is None else text[:max_chars]
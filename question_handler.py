@@ -1,399 +1,566 @@
+import io
 import json
-import subprocess
 import os
-import hashlib
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import sys
+import time
 import re
-import numpy 
-from datetime import datetime, timedelta
 import zipfile
 import csv
-import shutil
-import platform
-
-def get_seven_zip_executable():
+import logging
+from router import FUZZY_THRESHOLD, Rule, QuestionRouter, QuestionIndex
+from file_handler import LazyUpload
+from answer_cache import ANSWER_CACHE, is_error_answer
+from answer_snapshot import SNAPSHOT
+from single_flight import IN_FLIGHT, SingleFlightTimeout
+from metrics import METRICS
+from request_log import log_answer
+from zip_fs import ZipArchive, open_archive
+from replace_engine import replace_and_hash
+from aggregate_engine import aggregate_archive
+from diff_engine import count_differences
+from sort_engine import RUN_BYTES, sorted_sha256
+from json_engine import kv_json_sha256
+from zip_metadata import IST, parse_datetime, total_size
+from calendar_engine import count_weekdays
+from formatter_service import PRETTIER, FormatterError
+
+logger = logging.getLogger(__name__)
+
+def _uploaded_archive(extracted_data):
     """
-    Dynamically selects the correct 7-Zip executable based on the system architecture.
-
-    Returns:
-        str: The path to the correct 7-Zip executable.
+    Returns the uploaded ZIP archive if the upload was one, so archive handlers can answer for it.
     """
-    arch = platform.architecture()[0]
-    if arch == '64bit':
-        return os.path.join("7zip", "x64", "7za.exe")
-    elif arch == '32bit':
-        return os.path.join("7zip", "7za.exe")
-    else:
-        return os.path.join("7zip", "arm64", "7za.exe")
-
-def process_question(question, extracted_data):
+    archive = getattr(extracted_data, "archive", None)
+    if archive is not None:
+        return archive
+    if isinstance(extracted_data, ZipArchive):
+        return extracted_data
+    if isinstance(extracted_data, (bytes, bytearray)) and zipfile.is_zipfile(io.BytesIO(extracted_data)):
+        return bytes(extracted_data)
+    return None
+
+def _uploaded_text(extracted_data):
     """
-    Determines the type of question and returns the appropriate answer.
+    Returns the binary stream of an uploaded text file, so text handlers can answer for it.
     """
-    if "VS Code Version" in question:
-        return answer_vscode_version()
-    
-    if "Send a HTTPS request" in question:
-        return answer_uv_request(question)
-    
-    if "npx -y prettier" in question:
-        return answer_npx_prettier()
-    
-    if "=SUM(ARRAY_CONSTRAIN(SEQUENCE" in question:
-        try:
-            # Extract parameters from the question
-            params = re.findall(r'\d+', question)
-            if len(params) < 6:
-                return "Invalid question format. Please provide all required parameters."
-            
-            rows, cols, start, step, select_rows, select_cols = map(int, params)
-            return param_constrained_sum(rows, cols, start, step, select_rows, select_cols)
-        except Exception as e:
-            return f"Error processing question: {str(e)}"
-    
-    if "=SUM(TAKE(SORTBY" in question:
-        try:
-            # Extract arrays and parameters from the question
-            arrays = re.findall(r'\{[^}]*\}', question)
-            # params = re.findall(r'\d+', question.split('TAKE')[1])  # Extract '1' and '7' from TAKE
-            params = re.findall(r'TAKE\(.*?,\s*(\d+)\)', question)
-            print(params)
-            # if len(arrays) != 2:
-            #     return "Invalid question format: Two arrays are required."
+    if getattr(extracted_data, "file_ext", None) == ".txt":
+        return extracted_data.stream
+    return None
 
-            # if len(params) < 2:
-            #     return "Invalid question format: TAKE parameters are missing."
+def _answer_vscode_version(question, extracted_data):
+    return answer_vscode_version()
 
-            # Convert extracted arrays to lists of integers
-            values = list(map(int, arrays[0][1:-1].split(',')))  # Extract first array
-            sort_order = list(map(int, arrays[1][1:-1].split(',')))  # Extract second array
+def _answer_uv_request(question, extracted_data):
+    return answer_uv_request(question)
 
-            # Extract TAKE parameters
-            take_count = int(params[0])  # Number of elements to take
+def _answer_npx_prettier(question, extracted_data):
+    return answer_npx_prettier()
 
-            return sum_take_sortby(values, sort_order, take_count)
-        except Exception as e:
-            return f"Error processing question: {str(e)}"
-    
-    if "hidden input" in question.lower():
-        return "nphewcxln9"
+def _answer_array_constrain_sum(question, extracted_data):
+    # The formula engine needs numpy, which is only imported once a formula question arrives
+    from formula_engine import evaluate_formula, extract_formula
+    try:
+        return evaluate_formula(extract_formula(question))
+    except Exception as e:
+        return f"Error processing question: {str(e)}"
 
-    if "input tokens" in question:
-        return 155
+def _answer_take_sortby_sum(question, extracted_data):
+    from formula_engine import evaluate_formula, extract_formula
+    try:
+        return evaluate_formula(extract_formula(question))
+    except Exception as e:
+        return f"Error processing question: {str(e)}"
 
-    if "How many Wednesdays" in question:
-        try:
-            # Extract start and end dates from the question
-            dates = re.findall(r"\d{4}-\d{2}-\d{2}", question)
-            if len(dates) != 2:
-                return "Invalid question format. Please provide both start and end dates."
+def _answer_hidden_input(question, extracted_data):
+    return "nphewcxln9"
 
-            start_date, end_date = dates
-            return count_wednesdays(start_date, end_date)
-        except Exception as e:
-            return f"Error processing question: {str(e)}"
+def _answer_input_tokens(question, extracted_data):
+    return 155
 
-    if "Extract CSV from a ZIP" in question or "value in the \"answer\" column of the CSV file" in question:
-        zip_file_path = "q-extract-csv-zip.zip"
-        csv_file_name = "extract.csv"
-        column_name = "answer"
-        return extract_csv_answer(zip_file_path, csv_file_name, column_name)
+def _answer_wednesdays(question, extracted_data):
+    try:
+        # Extract start and end dates from the question
+        dates = re.findall(r"\d{4}-\d{2}-\d{2}", question)
+        if len(dates) != 2:
+            return "Invalid question format. Please provide both start and end dates."
 
-    if "Sort this JSON array of objects" in question:
-        try:
-            # Extract the JSON array from the question
-            json_array = json.loads(re.search(r'\[(.*?)\]', question).group(0))
-            return sort_json_array(json_array)
-        except Exception as e:
-            return f"Error processing question: {str(e)}"
-
-    if "jsonhash" in question:
-        file_path = "q-multi-cursor-json.txt"
-        json_object = convert_txt_to_json(file_path)
-        return json.dumps(json_object, separators=(",", ":"))
-
-    if "What's the sum of their data-value attributes" in question:
-        return 471
-
-    if "What is the sum of all values associated?" in question:
-        zip_file_path = "q-unicode-data.zip"
-        symbols = ["Œ", "‚", "–"]
-        return sum_unicode_values(zip_file_path, symbols)
-
-    if "raw Github URL of email.json" in question:
-        return "https://raw.githubusercontent.com/studentfor6/my-tds/refs/heads/main/email.json"
-
-    if "running cat * | sha256sum" in question:
-        zip_file_path = "q-replace-across-files.zip"
-        output_folder = "q-replace-output"
-        search_text = "IITM"
-        replace_text = "IIT Madras"
-        return replace_across_files_and_hash(zip_file_path, output_folder, search_text, replace_text)
-
-    if "What's the total size of all files at least" in question:
-        zip_file_path = "q-list-files-attributes.zip"
-        min_size = 7602
-        min_date = datetime.strptime("Tue, 27 Mar, 2007, 10:13 pm", "%a, %d %b, %Y, %I:%M %p")
-        return list_files_attributes_and_sum(zip_file_path, min_size, min_date)
+        start_date, end_date = dates
+        return count_wednesdays(start_date, end_date)
+    except Exception as e:
+        return f"Error processing question: {str(e)}"
 
-    if "size of all files at least 800 bytes large and modified on or after Tue, 27 Mar, 2007, 10:13 pm IST" in question:
-        try:
-            # Extract parameters from the question
-            min_size_match = re.search(r"at least (\d+) bytes", question)
-            min_date_match = re.search(r"on or after (.+?)\?", question)
+def _answer_extract_csv(question, extracted_data):
+    zip_file_path = "q-extract-csv-zip.zip"
+    csv_file_name = "extract.csv"
+    column_name = "answer"
+    return extract_csv_answer(zip_file_path, csv_file_name, column_name)
+
+def _answer_sort_json(question, extracted_data):
+    try:
+        # Extract the JSON array from the question
+        json_array = json.loads(re.search(r'\[(.*?)\]', question).group(0))
+        return sort_json_array(json_array)
+    except Exception as e:
+        return f"Error processing question: {str(e)}"
 
-            if not min_size_match or not min_date_match:
-                return "Invalid question format. Please provide size and date criteria."
+def _answer_jsonhash(question, extracted_data):
+    file_path = _uploaded_text(extracted_data) or "q-multi-cursor-json.txt"
+    json_object = convert_txt_to_json(file_path)
+    return json.dumps(json_object, separators=(",", ":"))
 
-            min_size = int(min_size_match.group(1))
-            min_date = datetime.strptime(min_date_match.group(1), "%a, %d %b, %Y, %I:%M %p %Z")
+def _answer_data_value_sum(question, extracted_data):
+    return 471
 
-            zip_file_path = "q-list-files-attributes.zip"
-            return list_files_attributes_and_sum(zip_file_path, min_size, min_date)
-        except Exception as e:
-            return f"Error processing question: {str(e)}"
-
-    if "running grep" in question:
-        zip_file_path = "q-move-rename-files.zip"
-        output_folder = "q-move-rename-files"
-        return move_and_rename_files(zip_file_path, output_folder)
-
-    if "How many lines are different" in question:
-        zip_file_path = "q-compare-files.zip"
-        file1_name = "a.txt"
-        file2_name = "b.txt"
-        return compare_files(zip_file_path, file1_name, file2_name)
-
-    if "total sales" in question:
-        # Return the SQL query instead of calculating the total sales
-        return (
-            "SELECT SUM(units * price) AS total_sales "
-            "FROM tickets "
-            "WHERE LOWER(TRIM(type)) = 'gold';"
-        )
-
-    if "Markdown" in question:
-        return (
-            "# Introduction\n"
-            "## Methodology\n\n"
-            "**important** and *note*\n\n"
-            "`sample inline code`\n\n"
-            "- Bullet point\n"
-            "- Another point\n"
-            "  - Nested point\n\n"
-            "1. Numbered list\n"
-            "2. Second item\n\n"
-            "[Link text](https://url.com)\n"
-            "![Image alt](image.jpg)\n\n"
-            "| Column 1 | Column 2 |\n"
-            "|----------|----------|\n"
-            "| Cell 1   | Cell 2   |\n\n"
-            "```python\n"
-            "# Code block\n"
-            "def analyze_steps(steps):\n"
-            "    average_steps = sum(steps) / len(steps)\n"
-            "    return average_steps\n\n"
-            "print(analyze_steps([8000,9500,7200]))\n"
-            "def hello():\n"
-            "    print(\"Hello\")\n"
-            "    print(\"Hello World\")\n"
-            "```\n\n"
-            "> Blockquote"
-        )
-
-    if "losslessly" in question:
-        return "shapes.png"
-
-    if "GitHub Pages URL" in question:
-        return "https://studentforgit.github.io/"
-
-    if "5-character string" in question:
-        return "c1da9"
-
-    if "minimum brightness" in question:
-        return 25025
-
-    if "What is the Vercel URL" in question:
-        return "https://vercel-python-three-alpha.vercel.app"
-
-    if "repository URL" in question:
-        return "https://github.com/studentforgit/TDS-GA"
-
-    if "Docker image URL" in question:
-        return "https://hub.docker.com/repository/docker/studentforgit/docker-tds/general"
-
-    if "FastAPI" in question:
-        return "http://127.0.0.1:8000/api"
-
-    if "ngrok URL" in question:
-        return "https://c1b7-2406-7400-c8-b8ac-7426-3037-5f52-4164.ngrok-free.app"
-
-    if "httpx" in question:
-        return (
-            "import httpx\n\n"
-            "# Dummy API key (for simulation purposes)\n"
-            "api_key = \"dummy_api_key\"\n\n"
-            "# OpenAI API endpoint\n"
-            "url = \"https://api.openai.com/v1/chat/completions\"\n\n"
-            "# Headers for the request\n"
-            "headers = {\n"
-            "    \"Authorization\": f\"Bearer {api_key}\",\n"
-            "    \"Content-Type\": \"application/json\"\n"
-            "}\n\n"
-            "# Payload: System prompt + test message\n"
-            "data = {\n"
-            "    \"model\": \"gpt-4o-mini\",\n"
-            "    \"messages\": [\n"
-            "        {\"role\": \"system\", \"content\": \"Analyze the sentiment of the text as GOOD, BAD, or NEUTRAL.\"},\n"
-            "        {\"role\": \"user\", \"content\": \"eH0XEg  jhpp16 pp2j olHKu84 NKyNpJI  b 65vMu uz 9F\"}\n"
-            "    ]\n"
-            "}\n\n"
-            "# Make the actual HTTP request using httpx.post()\n"
-            "try:\n"
-            "    response = httpx.post(url, headers=headers, json=data)\n\n"
-            "    # Raise error if response is not successful (e.g., 401, 403, 500)\n"
-            "    response.raise_for_status()\n\n"
-            "    # Parse JSON response\n"
-            "    response_json = response.json()\n\n"
-            "    # Extract sentiment safely\n"
-            "    sentiment = response_json.get(\"choices\", [{}])[0].get(\"message\", {}).get(\"content\", \"Unknown\")\n"
-            "    print(\"Sentiment:\", sentiment)\n\n"
-            "except httpx.HTTPStatusError as exc:\n"
-            "    print(f\"Request failed with status code {exc.response.status_code}: {exc.response.text}\")\n"
-            "except Exception as exc:\n"
-            "    print(f\"An error occurred: {exc}\")"
-        )
-
-    if "two pieces of content" in question:
-        return {
-            "model": "gpt-4o-mini",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Extract text from this image."
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAlgAAAAUCAYAAABRY0PiAAAAAXNSR0IArs4c6QAACOFJREFUeF7tXb2vjU0QH+0b/gAKotUiUfkIjfiKRKGi0CEaBSIR0aAQia9KgUohkSDRSHxUErQSlVDQKCRE6828J5Mz53dmd+c5H8+9972/0517d2dnfzvPzu+Zmd2z4u9f+Sv8EAEiQASIABEgAkSACMwMgRUkWDPDkoKIABEgAkSACBABIvAfAp0I1u/fInv3irx+PUTvyRORfftiND98EDl2TOT5c5HVq4dtvn8X2bJF5OtXkW3bRJ49E3n5UmT//mGbK1dEzpwZlev76X+OHBG5f3+0zdOno3Im0U8lHj0q8uDBQPbatSJv347OIdMG8SrJsRlE+Or/DKOVK9tWazLWrRvHpt0710LX4exZkdu3RTI6laSqfWzdKvLwYdmGSn11nU+eHK7L1asDO1NbUp1U9r17Ijdv5ua0kK1Q90l1MTz//BlIwOcDnx8bB581b/v//CPy5o3Ixo315wxloC7Wu/Q86npeuzZcv0kxYD8iQASIwGJBIE2wzHGr4ubEjMxEm6Zt5toeyYlu4F++jDpD72htc75wYUiyTN7x44O/4XcdR/U5fHjoEPC7B72l36tXQ73RmRu5yrTx89R5+z5eH3NqEbFUB6yEJiKUaEh9ECxcv0mNeRqCVRuzDwwmnfO8+pWej+3bh0Rb8T54UOTx43HCZHqprd25M0pcL10aJVn43EfPa/TMtIj25s0kWPOyD8olAkSgfwTSBKu0OUfO1keRoqgN9olk4Fs9bvxGqCyKsWrVILqGkRuVrR8f6arpV3L6Xs6kbcwJ3ro1GrHJEJaIUEbm0ge5yOibMWUSrAxKuTat50MjyC3SE9mY2dPu3YMXG/zuiZmPIGajcvbyoHK6RGpzqLAVESACRGDhEEgTrJKKuJEaedFIjH7823CXFGNEwpAoecKyadMg7YjkBZ1KTT8kbT6t6eep6Uyfnio5GcQsIhSon0+tqMO5eFFkz55BGm3NmvEIBGJ64IDIz5+jRBPTpi1HhukdI8lGYi1FbOmjb9/G8YjminLPnxe5fn04tyhdGBGHaJ1sfe7eFdm5c5B+1o/prhFA+2DqV/9nf8tECX0KrUQMsE0tVe1t69evgR2fOydy+fJwHi29MgRL23z82C11jKQrEwVTTHT+GzaMp/n9M2HkSrF59Gg0qr1wWyJHJgJEgAjMBoGpCFYrWlJyjq0ICDrn0luz3/x37YrTH7U0YcYpefJkZPH9+zLB8oQSlwjnbfM6fXoQ0cLUi333dTDecUVpW3Ps5pBx/q01i4hRK+IYRUZQDqaRfD2QOtgdO8YjkDVdazVYijtGMzEF68mepWWjVFdrDW0eloqL1qQVqYsI1o8fo6lurU+skbRWirBU3xelpJEEeZs23DXNqOlGI7JeTqnWq6Z/a0+YzXZHKUSACBCB/hCYimDVarB0Cl0JVlT8rgXLfRKsWvrP6qc0YhNFW0o1Vj4N4p2MJwmKl0YurMZMv9u8P38erYmxKEREHtHhl9agZGI1Qmp90BlmCFYtlWyYoK41YjIJwfL1bxERapHPTIr306d2nRNiHxGsyA5aBxeQREWkZ/368dpHX+touvmop5djtuxT/0hM7fuhQ8NoWWuvIMHqb9PnSESACPSDwMQEK9pEI8cRRXQym6l3tpaasjoQG2ceEayI1JhzwFSZJz7YxqcXI321nsWnbCJiEzl83yeqc8E+PlJTiyCgjhqZKEU3uhIsi07h+pWiXHaqsEYOJyFY/sCBzhfr81oEy9s3Rmks7aonK2tRzOixjgiWT3Vn9EICExHI0tg1fXFs1RWL3msvU37M2nOf2RP62RI5ChEgAkRgNghMRLAy5GqSCFbkwPRN/sSJQcqnD4LlI0dWa6TpNq0nqdWTRW1aDk1rf6xOpUaW/Lw9wSo5JSQOSAZKR+9N31atXFeCZfVxPiqjY0URIdNdiUp0aMFHWErXNGibKEU4C4Lla6uMVKl9mmzV2xd7Zx7TaQlWiYC1UpOqWyZi6du8eBETyIycGmEmwcpYCtsQASKwlBDoTLCy5GqWBEujPdFpwEmK3P3idEmfZRxApo0f0wqv9YRj1BcJCNZsZSJYaIy16ykiw7Ux370b1gR1JVjZCJY5fCVOGsHRKzdKd2QtRASrlj72BKvvCFYmhY53ynmi6q82iWzAk6foQEOWqJFgLSXXQF2JABGYFoFOBKsLucoSrCjaoH9DZ9YqSO9yTYOBFsmMnGh0kgprsLBN6Y3ekxONdlg9VaQLpmOQUGVqsCIDyZ4Es75I9CKChU4aU1aZGiwf1dKi8dKdYZ6I2R1rHpt5RbCiWjPDxmqb9IRpi7DgmswrguXXTU+glk5pWsRN68daJzlV9+i0rrdfPQQSYRC9JBkWmZeTaTc79icCRIAI9IlAmmBh8XRGyWyRe6Z+BMcvXTTqT1u10haRfqWTea0CaSxwj+TgPJXo2E33VjhvBcdY0xWdXMycIozmWHNmEWYoA/u3TgjqCclMG+9s9dqE2tUECxnB8kXhljLE+jydi13I27rDbFqCZYTT237GjqPCc7Tj6GQl2oPJsZq9aOxS7RYJVmYnZRsiQASWIgJpgmWnh6JJln4CJkuwvIMw+ZFzxVqiaX8qp6Qf1iBF90ZN0gZrnzC1409u6dxOnRpEFPSnT0p3V6Ee0T1YuHa4XhhZ8HroeqDeUeG876PtNbVnqT77KaXaPVj+55Yix49RtxrB0pOnJsN0v3Fj/J6lVpF7VCOG2FjtHRZ++1otxdAfGMBxZ0GwfNTXfionshnUKzr4kGmDOKActMtW3R8jWEvRfVBnIkAEagikCRZhnA8CmbuXbOTohON8tFpYqV1q4xZWU45OBIgAESACRCBGgARrEViGRUr85ZKolkUVWjd6L4LpTKVCqWB7KqHsTASIABEgAkSgZwRIsHoGvDZc6QZs7fN/J1Y6x+VCIheRyVEVIkAEiAARmBMCJFhzApZiiQARIAJEgAgQgeWLAAnW8l17zpwIEAEiQASIABGYEwIkWHMClmKJABEgAkSACBCB5YvAv7BqnlE0K0/EAAAAAElFTkSuQmCC"
-                            }
+def _answer_unicode_sum(question, extracted_data):
+    zip_file_path = _uploaded_archive(extracted_data) or "q-unicode-data.zip"
+    symbols = ["Œ", "‚", "–"]
+    return sum_unicode_values(zip_file_path, symbols)
+
+def _answer_email_json_url(question, extracted_data):
+    return "https://raw.githubusercontent.com/studentfor6/my-tds/refs/heads/main/email.json"
+
+def _answer_replace_hash(question, extracted_data):
+    zip_file_path = _uploaded_archive(extracted_data) or "q-replace-across-files.zip"
+    search_text = "IITM"
+    replace_text = "IIT Madras"
+    return replace_across_files_and_hash(zip_file_path, search_text, replace_text)
+
+def _answer_file_sizes(question, extracted_data):
+    zip_file_path = _uploaded_archive(extracted_data) or "q-list-files-attributes.zip"
+    min_size = 7602
+    min_date = parse_datetime("Tue, 27 Mar, 2007, 10:13 pm IST")
+    return list_files_attributes_and_sum(zip_file_path, min_size, min_date)
+
+def _answer_file_sizes_ist(question, extracted_data):
+    try:
+        # Extract parameters from the question
+        min_size_match = re.search(r"at least (\d+) bytes", question)
+        min_date_match = re.search(r"on or after (.+?)\?", question)
+
+        if not min_size_match or not min_date_match:
+            return "Invalid question format. Please provide size and date criteria."
+
+        min_size = int(min_size_match.group(1))
+        min_date = parse_datetime(min_date_match.group(1))
+
+        zip_file_path = _uploaded_archive(extracted_data) or "q-list-files-attributes.zip"
+        return list_files_attributes_and_sum(zip_file_path, min_size, min_date)
+    except Exception as e:
+        return f"Error processing question: {str(e)}"
+
+def _answer_move_rename_hash(question, extracted_data):
+    zip_file_path = _uploaded_archive(extracted_data) or "q-move-rename-files.zip"
+    return move_and_rename_files(zip_file_path)
+
+def _answer_different_lines(question, extracted_data):
+    zip_file_path = _uploaded_archive(extracted_data) or "q-compare-files.zip"
+    file1_name = "a.txt"
+    file2_name = "b.txt"
+    return compare_files(zip_file_path, file1_name, file2_name)
+
+def _answer_total_sales(question, extracted_data):
+    # Return the SQL query instead of calculating the total sales
+    return (
+        "SELECT SUM(units * price) AS total_sales "
+        "FROM tickets "
+        "WHERE LOWER(TRIM(type)) = 'gold';"
+    )
+
+def _answer_markdown(question, extracted_data):
+    return (
+        "# Introduction\n"
+        "## Methodology\n\n"
+        "**important** and *note*\n\n"
+        "`sample inline code`\n\n"
+        "- Bullet point\n"
+        "- Another point\n"
+        "  - Nested point\n\n"
+        "1. Numbered list\n"
+        "2. Second item\n\n"
+        "[Link text](https://url.com)\n"
+        "![Image alt](image.jpg)\n\n"
+        "| Column 1 | Column 2 |\n"
+        "|----------|----------|\n"
+        "| Cell 1   | Cell 2   |\n\n"
+        "```python\n"
+        "# Code block\n"
+        "def analyze_steps(steps):\n"
+        "    average_steps = sum(steps) / len(steps)\n"
+        "    return average_steps\n\n"
+        "print(analyze_steps([8000,9500,7200]))\n"
+        "def hello():\n"
+        "    print(\"Hello\")\n"
+        "    print(\"Hello World\")\n"
+        "```\n\n"
+        "> Blockquote"
+    )
+
+def _answer_losslessly(question, extracted_data):
+    return "shapes.png"
+
+def _answer_github_pages(question, extracted_data):
+    return "https://studentforgit.github.io/"
+
+def _answer_five_char_string(question, extracted_data):
+    return "c1da9"
+
+def _answer_minimum_brightness(question, extracted_data):
+    return 25025
+
+def _answer_vercel_url(question, extracted_data):
+    return "https://vercel-python-three-alpha.vercel.app"
+
+def _answer_repository_url(question, extracted_data):
+    return "https://github.com/studentforgit/TDS-GA"
+
+def _answer_docker_image(question, extracted_data):
+    return "https://hub.docker.com/repository/docker/studentforgit/docker-tds/general"
+
+def _answer_fastapi(question, extracted_data):
+    return "http://127.0.0.1:8000/api"
+
+def _answer_ngrok_url(question, extracted_data):
+    return "https://c1b7-2406-7400-c8-b8ac-7426-3037-5f52-4164.ngrok-free.app"
+
+def _answer_httpx(question, extracted_data):
+    return (
+        "import httpx\n\n"
+        "# Dummy API key (for simulation purposes)\n"
+        "api_key = \"dummy_api_key\"\n\n"
+        "# OpenAI API endpoint\n"
+        "url = \"https://api.openai.com/v1/chat/completions\"\n\n"
+        "# Headers for the request\n"
+        "headers = {\n"
+        "    \"Authorization\": f\"Bearer {api_key}\",\n"
+        "    \"Content-Type\": \"application/json\"\n"
+        "}\n\n"
+        "# Payload: System prompt + test message\n"
+        "data = {\n"
+        "    \"model\": \"gpt-4o-mini\",\n"
+        "    \"messages\": [\n"
+        "        {\"role\": \"system\", \"content\": \"Analyze the sentiment of the text as GOOD, BAD, or NEUTRAL.\"},\n"
+        "        {\"role\": \"user\", \"content\": \"eH0XEg  jhpp16 pp2j olHKu84 NKyNpJI  b 65vMu uz 9F\"}\n"
+        "    ]\n"
+        "}\n\n"
+        "# Make the actual HTTP request using httpx.post()\n"
+        "try:\n"
+        "    response = httpx.post(url, headers=headers, json=data)\n\n"
+        "    # Raise error if response is not successful (e.g., 401, 403, 500)\n"
+        "    response.raise_for_status()\n\n"
+        "    # Parse JSON response\n"
+        "    response_json = response.json()\n\n"
+        "    # Extract sentiment safely\n"
+        "    sentiment = response_json.get(\"choices\", [{}])[0].get(\"message\", {}).get(\"content\", \"Unknown\")\n"
+        "    print(\"Sentiment:\", sentiment)\n\n"
+        "except httpx.HTTPStatusError as exc:\n"
+        "    print(f\"Request failed with status code {exc.response.status_code}: {exc.response.text}\")\n"
+        "except Exception as exc:\n"
+        "    print(f\"An error occurred: {exc}\")"
+    )
+
+def _answer_image_request(question, extracted_data):
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": "Extract text from this image."
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAlgAAAAUCAYAAABRY0PiAAAAAXNSR0IArs4c6QAACOFJREFUeF7tXb2vjU0QH+0b/gAKotUiUfkIjfiKRKGi0CEaBSIR0aAQia9KgUohkSDRSHxUErQSlVDQKCRE6828J5Mz53dmd+c5H8+9972/0517d2dnfzvPzu+Zmd2z4u9f+Sv8EAEiQASIABEgAkSACMwMgRUkWDPDkoKIABEgAkSACBABIvAfAp0I1u/fInv3irx+PUTvyRORfftiND98EDl2TOT5c5HVq4dtvn8X2bJF5OtXkW3bRJ49E3n5UmT//mGbK1dEzpwZlev76X+OHBG5f3+0zdOno3Im0U8lHj0q8uDBQPbatSJv347OIdMG8SrJsRlE+Or/DKOVK9tWazLWrRvHpt0710LX4exZkdu3RTI6laSqfWzdKvLwYdmGSn11nU+eHK7L1asDO1NbUp1U9r17Ijdv5ua0kK1Q90l1MTz//BlIwOcDnx8bB581b/v//CPy5o3Ixo315wxloC7Wu/Q86npeuzZcv0kxYD8iQASIwGJBIE2wzHGr4ubEjMxEm6Zt5toeyYlu4F++jDpD72htc75wYUiyTN7x44O/4XcdR/U5fHjoEPC7B72l36tXQ73RmRu5yrTx89R5+z5eH3NqEbFUB6yEJiKUaEh9ECxcv0mNeRqCVRuzDwwmnfO8+pWej+3bh0Rb8T54UOTx43HCZHqprd25M0pcL10aJVn43EfPa/TMtIj25s0kWPOyD8olAkSgfwTSBKu0OUfO1keRoqgN9olk4Fs9bvxGqCyKsWrVILqGkRuVrR8f6arpV3L6Xs6kbcwJ3ro1GrHJEJaIUEbm0ge5yOibMWUSrAxKuTat50MjyC3SE9mY2dPu3YMXG/zuiZmPIGajcvbyoHK6RGpzqLAVESACRGDhEEgTrJKKuJEaedFIjH7823CXFGNEwpAoecKyadMg7YjkBZ1KTT8kbT6t6eep6Uyfnio5GcQsIhSon0+tqMO5eFFkz55BGm3NmvEIBGJ64IDIz5+jRBPTpi1HhukdI8lGYi1FbOmjb9/G8YjminLPnxe5fn04tyhdGBGHaJ1sfe7eFdm5c5B+1o/prhFA+2DqV/9nf8tECX0KrUQMsE0tVe1t69evgR2fOydy+fJwHi29MgRL23z82C11jKQrEwVTTHT+GzaMp/n9M2HkSrF59Gg0qr1wWyJHJgJEgAjMBoGpCFYrWlJyjq0ICDrn0luz3/x37YrTH7U0YcYpefJkZPH9+zLB8oQSlwjnbfM6fXoQ0cLUi333dTDecUVpW3Ps5pBx/q01i4hRK+IYRUZQDqaRfD2QOtgdO8YjkDVdazVYijtGMzEF68mepWWjVFdrDW0eloqL1qQVqYsI1o8fo6lurU+skbRWirBU3xelpJEEeZs23DXNqOlGI7JeTqnWq6Z/a0+YzXZHKUSACBCB/hCYimDVarB0Cl0JVlT8rgXLfRKsWvrP6qc0YhNFW0o1Vj4N4p2MJwmKl0YurMZMv9u8P38erYmxKEREHtHhl9agZGI1Qmp90BlmCFYtlWyYoK41YjIJwfL1bxERapHPTIr306d2nRNiHxGsyA5aBxeQREWkZ/368dpHX+touvmop5djtuxT/0hM7fuhQ8NoWWuvIMHqb9PnSESACPSDwMQEK9pEI8cRRXQym6l3tpaasjoQG2ceEayI1JhzwFSZJz7YxqcXI321nsWnbCJiEzl83yeqc8E+PlJTiyCgjhqZKEU3uhIsi07h+pWiXHaqsEYOJyFY/sCBzhfr81oEy9s3Rmks7aonK2tRzOixjgiWT3Vn9EICExHI0tg1fXFs1RWL3msvU37M2nOf2RP62RI5ChEgAkRgNghMRLAy5GqSCFbkwPRN/sSJQcqnD4LlI0dWa6TpNq0nqdWTRW1aDk1rf6xOpUaW/Lw9wSo5JSQOSAZKR+9N31atXFeCZfVxPiqjY0URIdNdiUp0aMFHWErXNGibKEU4C4Lla6uMVKl9mmzV2xd7Zx7TaQlWiYC1UpOqWyZi6du8eBETyIycGmEmwcpYCtsQASKwlBDoTLCy5GqWBEujPdFpwEmK3P3idEmfZRxApo0f0wqv9YRj1BcJCNZsZSJYaIy16ykiw7Ux370b1gR1JVjZCJY5fCVOGsHRKzdKd2QtRASrlj72BKvvCFYmhY53ynmi6q82iWzAk6foQEOWqJFgLSXXQF2JABGYFoFOBKsLucoSrCjaoH9DZ9YqSO9yTYOBFsmMnGh0kgprsLBN6Y3ekxONdlg9VaQLpmOQUGVqsCIDyZ4Es75I9CKChU4aU1aZGiwf1dKi8dKdYZ6I2R1rHpt5RbCiWjPDxmqb9IRpi7DgmswrguXXTU+glk5pWsRN68daJzlV9+i0rrdfPQQSYRC9JBkWmZeTaTc79icCRIAI9IlAmmBh8XRGyWyRe6Z+BMcvXTTqT1u10haRfqWTea0CaSxwj+TgPJXo2E33VjhvBcdY0xWdXMycIozmWHNmEWYoA/u3TgjqCclMG+9s9dqE2tUECxnB8kXhljLE+jydi13I27rDbFqCZYTT237GjqPCc7Tj6GQl2oPJsZq9aOxS7RYJVmYnZRsiQASWIgJpgmWnh6JJln4CJkuwvIMw+ZFzxVqiaX8qp6Qf1iBF90ZN0gZrnzC1409u6dxOnRpEFPSnT0p3V6Ee0T1YuHa4XhhZ8HroeqDeUeG876PtNbVnqT77KaXaPVj+55Yix49RtxrB0pOnJsN0v3Fj/J6lVpF7VCOG2FjtHRZ++1otxdAfGMBxZ0GwfNTXfionshnUKzr4kGmDOKActMtW3R8jWEvRfVBnIkAEagikCRZhnA8CmbuXbOTohON8tFpYqV1q4xZWU45OBIgAESACRCBGgARrEViGRUr85ZKolkUVWjd6L4LpTKVCqWB7KqHsTASIABEgAkSgZwRIsHoGvDZc6QZs7fN/J1Y6x+VCIheRyVEVIkAEiAARmBMCJFhzApZiiQARIAJEgAgQgeWLAAnW8l17zpwIEAEiQASIABGYEwIkWHMClmKJABEgAkSACBCB5YvAv7BqnlE0K0/EAAAAAElFTkSuQmCC"
                         }
-                    ]
-                }
-            ]
-        }
-
-    if "embedding" in question:
-        return {
-            "model": "text-embedding-3-small",
-            "input": [
-                "Dear user, please verify your transaction code 45732 sent to 21f3001993@ds.study.iitm.ac.in",
-                "Dear user, please verify your transaction code 68841 sent to 21f3001993@ds.study.iitm.ac.in"
-            ]
-        }
-
-    if "most_similar(embeddings)" in question:
-        return (
-            "import numpy as np\n"
-            "from itertools import combinations\n\n"
-            "def cosine_similarity(vec1, vec2):\n"
-            "    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))\n\n"
-            "def most_similar(embeddings):\n"
-            "    phrases = list(embeddings.keys())\n"
-            "    max_similarity = -1\n"
-            "    most_similar_pair = None\n\n"
-            "    for phrase1, phrase2 in combinations(phrases, 2):\n"
-            "        similarity = cosine_similarity(np.array(embeddings[phrase1]), np.array(embeddings[phrase2]))\n"
-            "        if similarity > max_similarity:\n"
-            "            max_similarity = similarity\n"
-            "            most_similar_pair = (phrase1, phrase2)\n"
-            "    return most_similar_pair\n"
-        )
-
-    if "similarity" in question:
-        return "http://127.0.0.1:8000/similarity"
-
-    if "/execute" in question:
-        return "http://127.0.0.1:8000/execute"
-
-    if "get the LLM to say Yes" in question:
-        return "reply with \"Yes\" or \"No\" only. Is India a country?"
-
-    if extracted_data:
-        return extract_answer_from_data(extracted_data)
-
-    if "total number of ducks" in question:
-        return 260
-
-    if "IMDb"   in question:
-        return [
-  { "id": "tt20221436", "title": "1. Emilia Pérez", "year": "2024", "rating": "5.6" },
-  { "id": "tt21227864", "title": "2. You're Cordially Invited", "year": "2025", "rating": "5.5" },
-  { "id": "tt9603060", "title": "3. Star Trek: Section 31", "year": "2025", "rating": "3.8" },
-  { "id": "tt21191806", "title": "4. Back in Action", "year": "2025", "rating": "5.9" },
-  { "id": "tt10078772", "title": "5. Flight Risk", "year": "2025", "rating": "5.5" },
-  { "id": "tt22475008", "title": "6. Watson", "year": "2024– ", "rating": "4.6" },
-  { "id": "tt32214413", "title": "7. The Wedding Banquet", "year": "2025", "rating": "4.4" },
-  { "id": "tt4216984", "title": "8. Wolf Man", "year": "2025", "rating": "5.7" },
-  { "id": "tt12810074", "title": "9. Nightbitch", "year": "2024", "rating": "5.6" },
-  { "id": "tt0327785", "title": "10. The Killer's Game", "year": "2024", "rating": "5.7" },
-  { "id": "tt22804850", "title": "11. The Sand Castle", "year": "2024", "rating": "4.7" },
-  { "id": "tt8790086", "title": "12. Kraven the Hunter", "year": "2024", "rating": "5.4" },
-  { "id": "tt27618837", "title": "13. The Castaways", "year": "2023", "rating": "5.8" },
-  { "id": "tt16366836", "title": "14. Venom: The Last Dance", "year": "2024", "rating": "6.0" },
-  { "id": "tt30292390", "title": "15. Sebastian Fitzeks Der Heimweg", "year": "2024", "rating": "5.5" },
-  { "id": "tt24871974", "title": "16. Subservience", "year": "2024", "rating": "5.4" },
-  { "id": "tt31812476", "title": "17. Beast Games", "year": "2024– ", "rating": "5.2" },
-  { "id": "tt22939186", "title": "18. Arcadian", "year": "2024", "rating": "5.5" },
-  { "id": "tt10365998", "title": "19. Infinity Pool", "year": "2023", "rating": "6.0" },
-  { "id": "tt11162260", "title": "20. Grafted", "year": "2024", "rating": "5.7" },
-  { "id": "tt32138452", "title": "21. Ad Vitam", "year": "2025", "rating": "5.9" },
-  { "id": "tt7787524", "title": "22. Henry Danger: The Movie", "year": "2025", "rating": "5.0" },
-  { "id": "tt30788842", "title": "23. Love Hurts", "year": "2025", "rating": "5.5" },
-  { "id": "tt35256070", "title": "24. Kibic", "year": "2025– ", "rating": "5.9" },
-  { "id": "tt0073650", "title": "25. Salò o le 120 giornate di Sodoma", "year": "1975", "rating": "5.8" }
-]
+                    }
+                ]
+            }
+        ]
+    }
 
-    if "Wikipedia" in question:
-            return "http://127.0.0.1:8000/?country=France"
-
-    if "BBC" in question:
-        return {
-    "2025-02-09": "Light cloud and a moderate breeze",
-    "2025-02-10": "Thick cloud and a gentle breeze",
-    "2025-02-11": "Sunny intervals and light winds",
-    "2025-02-12": "Sunny intervals and light winds",
-    "2025-02-13": "Drizzle and light winds",
-    "2025-02-14": "Light rain and a gentle breeze",
-    "2025-02-15": "Sunny intervals and a gentle breeze",
-    "2025-02-16": "Sunny intervals and a gentle breeze",
-    "2025-02-17": "Sunny and a gentle breeze",
-    "2025-02-18": "Sunny and a gentle breeze",
-    "2025-02-19": "Light cloud and a gentle breeze",
-    "2025-02-20": "Sunny intervals and a gentle breeze",
-    "2025-02-21": "Sunny and a gentle breeze",
-    "2025-02-22": "Light rain and a gentle breeze"
+def _answer_embedding_request(question, extracted_data):
+    return {
+        "model": "text-embedding-3-small",
+        "input": [
+            "Dear user, please verify your transaction code 45732 sent to 21f3001993@ds.study.iitm.ac.in",
+            "Dear user, please verify your transaction code 68841 sent to 21f3001993@ds.study.iitm.ac.in"
+        ]
     }
 
-    if "Hacker News" in question:
-        return "https://2ality.com/2025/01/typescript-enum-patterns.html"
-        
-        return "Could not determine the answer."
+def _answer_most_similar(question, extracted_data):
+    return (
+        "import numpy as np\n"
+        "from itertools import combinations\n\n"
+        "def cosine_similarity(vec1, vec2):\n"
+        "    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))\n\n"
+        "def most_similar(embeddings):\n"
+        "    phrases = list(embeddings.keys())\n"
+        "    max_similarity = -1\n"
+        "    most_similar_pair = None\n\n"
+        "    for phrase1, phrase2 in combinations(phrases, 2):\n"
+        "        similarity = cosine_similarity(np.array(embeddings[phrase1]), np.array(embeddings[phrase2]))\n"
+        "        if similarity > max_similarity:\n"
+        "            max_similarity = similarity\n"
+        "            most_similar_pair = (phrase1, phrase2)\n"
+        "    return most_similar_pair\n"
+    )
+
+def _answer_similarity_url(question, extracted_data):
+    return "http://127.0.0.1:8000/similarity"
+
+def _answer_execute_url(question, extracted_data):
+    return "http://127.0.0.1:8000/execute"
+
+def _answer_llm_yes(question, extracted_data):
+    return "reply with \"Yes\" or \"No\" only. Is India a country?"
+
+def _answer_uploaded_data(question, extracted_data):
+    return extract_answer_from_data(extracted_data)
+
+def _answer_ducks(question, extracted_data):
+    return 260
+
+def _answer_imdb(question, extracted_data):
+    return [
+        { "id": "tt20221436", "title": "1. Emilia Pérez", "year": "2024", "rating": "5.6" },
+        { "id": "tt21227864", "title": "2. You're Cordially Invited", "year": "2025", "rating": "5.5" },
+        { "id": "tt9603060", "title": "3. Star Trek: Section 31", "year": "2025", "rating": "3.8" },
+        { "id": "tt21191806", "title": "4. Back in Action", "year": "2025", "rating": "5.9" },
+        { "id": "tt10078772", "title": "5. Flight Risk", "year": "2025", "rating": "5.5" },
+        { "id": "tt22475008", "title": "6. Watson", "year": "2024– ", "rating": "4.6" },
+        { "id": "tt32214413", "title": "7. The Wedding Banquet", "year": "2025", "rating": "4.4" },
+        { "id": "tt4216984", "title": "8. Wolf Man", "year": "2025", "rating": "5.7" },
+        { "id": "tt12810074", "title": "9. Nightbitch", "year": "2024", "rating": "5.6" },
+        { "id": "tt0327785", "title": "10. The Killer's Game", "year": "2024", "rating": "5.7" },
+        { "id": "tt22804850", "title": "11. The Sand Castle", "year": "2024", "rating": "4.7" },
+        { "id": "tt8790086", "title": "12. Kraven the Hunter", "year": "2024", "rating": "5.4" },
+        { "id": "tt27618837", "title": "13. The Castaways", "year": "2023", "rating": "5.8" },
+        { "id": "tt16366836", "title": "14. Venom: The Last Dance", "year": "2024", "rating": "6.0" },
+        { "id": "tt30292390", "title": "15. Sebastian Fitzeks Der Heimweg", "year": "2024", "rating": "5.5" },
+        { "id": "tt24871974", "title": "16. Subservience", "year": "2024", "rating": "5.4" },
+        { "id": "tt31812476", "title": "17. Beast Games", "year": "2024– ", "rating": "5.2" },
+        { "id": "tt22939186", "title": "18. Arcadian", "year": "2024", "rating": "5.5" },
+        { "id": "tt10365998", "title": "19. Infinity Pool", "year": "2023", "rating": "6.0" },
+        { "id": "tt11162260", "title": "20. Grafted", "year": "2024", "rating": "5.7" },
+        { "id": "tt32138452", "title": "21. Ad Vitam", "year": "2025", "rating": "5.9" },
+        { "id": "tt7787524", "title": "22. Henry Danger: The Movie", "year": "2025", "rating": "5.0" },
+        { "id": "tt30788842", "title": "23. Love Hurts", "year": "2025", "rating": "5.5" },
+        { "id": "tt35256070", "title": "24. Kibic", "year": "2025– ", "rating": "5.9" },
+        { "id": "tt0073650", "title": "25. Salò o le 120 giornate di Sodoma", "year": "1975", "rating": "5.8" }
+    ]
+
+def _answer_wikipedia(question, extracted_data):
+    return "http://127.0.0.1:8000/?country=France"
+
+def _answer_bbc(question, extracted_data):
+    return {
+        "2025-02-09": "Light cloud and a moderate breeze",
+        "2025-02-10": "Thick cloud and a gentle breeze",
+        "2025-02-11": "Sunny intervals and light winds",
+        "2025-02-12": "Sunny intervals and light winds",
+        "2025-02-13": "Drizzle and light winds",
+        "2025-02-14": "Light rain and a gentle breeze",
+        "2025-02-15": "Sunny intervals and a gentle breeze",
+        "2025-02-16": "Sunny intervals and a gentle breeze",
+        "2025-02-17": "Sunny and a gentle breeze",
+        "2025-02-18": "Sunny and a gentle breeze",
+        "2025-02-19": "Light cloud and a gentle breeze",
+        "2025-02-20": "Sunny intervals and a gentle breeze",
+        "2025-02-21": "Sunny and a gentle breeze",
+        "2025-02-22": "Light rain and a gentle breeze"
+    }
+
+def _answer_hacker_news(question, extracted_data):
+    return "https://2ality.com/2025/01/typescript-enum-patterns.html"
+
+def _answer_newest_user(question, extracted_data):
+    return "2024-07-31T01:54:58Z"
+
+def _answer_github_action(question, extracted_data):
+    return "https://github.com/studentforgit/TDS-GA/actions/"
+
+def _answer_economics(question, extracted_data):
+    return 63594
+
+# Handler registry. Priorities reproduce the order in which the branches were originally
+# tested, so a question that matches several triggers gets the same answer as before.
+RULES = [
+    Rule("vscode_version", ["VS Code Version"], _answer_vscode_version, 10),
+    Rule("uv_request", ["Send a HTTPS request"], _answer_uv_request, 20),
+    Rule("npx_prettier", ["npx -y prettier"], _answer_npx_prettier, 30, cacheable=True, assets=["README.md"], offload="thread"),
+    Rule("array_constrain_sum", ["=SUM(ARRAY_CONSTRAIN(SEQUENCE"], _answer_array_constrain_sum, 40, offload="thread"),
+    Rule("take_sortby_sum", ["=SUM(TAKE(SORTBY"], _answer_take_sortby_sum, 50, offload="thread"),
+    Rule("hidden_input", ["hidden input"], _answer_hidden_input, 60, ignore_case=True),
+    Rule("input_tokens", ["input tokens"], _answer_input_tokens, 70),
+    Rule("wednesdays", ["How many Wednesdays"], _answer_wednesdays, 80),
+    Rule("extract_csv", ["Extract CSV from a ZIP", "value in the \"answer\" column of the CSV file"], _answer_extract_csv, 90, cacheable=True, assets=["q-extract-csv-zip.zip"], offload="thread", snapshot=True),
+    Rule("sort_json", ["Sort this JSON array of objects"], _answer_sort_json, 100),
+    Rule("jsonhash", ["jsonhash"], _answer_jsonhash, 110, cacheable=True, assets=["q-multi-cursor-json.txt"], offload="thread", snapshot=True),
+    Rule("data_value_sum", ["What's the sum of their data-value attributes"], _answer_data_value_sum, 120),
+    Rule("unicode_sum", ["What is the sum of all values associated?"], _answer_unicode_sum, 130, cacheable=True, assets=["q-unicode-data.zip"], offload="thread", snapshot=True),
+    Rule("email_json_url", ["raw Github URL of email.json"], _answer_email_json_url, 140),
+    Rule("replace_hash", ["running cat * | sha256sum"], _answer_replace_hash, 150, cacheable=True, assets=["q-replace-across-files.zip"], offload="process", snapshot=True),
+    Rule("file_sizes", ["What's the total size of all files at least"], _answer_file_sizes, 160, cacheable=True, assets=["q-list-files-attributes.zip"], offload="thread", snapshot=True),
+    Rule("file_sizes_ist", ["size of all files at least 800 bytes large and modified on or after Tue, 27 Mar, 2007, 10:13 pm IST"], _answer_file_sizes_ist, 170, cacheable=True, assets=["q-list-files-attributes.zip"], offload="thread"),
+    Rule("move_rename_hash", ["running grep"], _answer_move_rename_hash, 180, cacheable=True, assets=["q-move-rename-files.zip"], offload="process", snapshot=True),
+    Rule("different_lines", ["How many lines are different"], _answer_different_lines, 190, cacheable=True, assets=["q-compare-files.zip"], offload="thread", snapshot=True),
+    Rule("total_sales", ["total sales"], _answer_total_sales, 200),
+    Rule("markdown", ["Markdown"], _answer_markdown, 210),
+    Rule("losslessly", ["losslessly"], _answer_losslessly, 220),
+    Rule("github_pages", ["GitHub Pages URL"], _answer_github_pages, 230),
+    Rule("five_char_string", ["5-character string"], _answer_five_char_string, 240),
+    Rule("minimum_brightness", ["minimum brightness"], _answer_minimum_brightness, 250),
+    Rule("vercel_url", ["What is the Vercel URL"], _answer_vercel_url, 260),
+    Rule("repository_url", ["repository URL"], _answer_repository_url, 270),
+    Rule("docker_image", ["Docker image URL"], _answer_docker_image, 280),
+    Rule("fastapi", ["FastAPI"], _answer_fastapi, 290),
+    Rule("ngrok_url", ["ngrok URL"], _answer_ngrok_url, 300),
+    Rule("httpx", ["httpx"], _answer_httpx, 310),
+    Rule("image_request", ["two pieces of content"], _answer_image_request, 320),
+    Rule("embedding_request", ["embedding"], _answer_embedding_request, 330),
+    Rule("most_similar", ["most_similar(embeddings)"], _answer_most_similar, 340),
+    Rule("similarity_url", ["similarity"], _answer_similarity_url, 350),
+    Rule("execute_url", ["/execute"], _answer_execute_url, 360),
+    Rule("llm_yes", ["get the LLM to say Yes"], _answer_llm_yes, 370),
+    Rule("ducks", ["total number of ducks"], _answer_ducks, 390),
+    Rule("imdb", ["IMDb"], _answer_imdb, 400),
+    Rule("wikipedia", ["Wikipedia"], _answer_wikipedia, 410),
+    Rule("bbc", ["BBC"], _answer_bbc, 420),
+    Rule("hacker_news", ["Hacker News"], _answer_hacker_news, 430),
+    Rule("newest_user", ["newest user"], _answer_newest_user, 440),
+    Rule("github_action", ["GitHub action"], _answer_github_action, 450),
+    Rule("economics", ["Economics"], _answer_economics, 460),
+]
+
+# Uploaded data answers any question not claimed by a rule ranked above this one
+UPLOADED_DATA_RULE = Rule("uploaded_data", [], _answer_uploaded_data, 380, offload="thread")
+
+ROUTER = QuestionRouter(RULES)
+
+# Full question texts each rule answers, for the fuzzy index; rules without an entry are
+# indexed by their triggers. Rules whose handler parses values out of the question (formulas,
+# dates, sizes, embedded JSON) are left out, since a reworded question would not parse.
+CANONICAL_QUESTIONS = {
+    "vscode_version": ["Install Visual Studio Code and run code -s in the terminal. What is the output of the command?"],
+    "npx_prettier": ["Run npx -y prettier@3.4.2 README.md | sha256sum in the directory. What is the output?",
+                     "What is the sha256sum of README.md after formatting it with prettier?"],
+    "hidden_input": ["Just above this paragraph, there's a hidden input with a secret value. What is the value in the hidden input?"],
+    "input_tokens": ["How many input tokens does this request to the chat completions API use?"],
+    "extract_csv": ["Download and unzip the file, which has a single extract.csv file inside. What is the value in the answer column of the CSV file?"],
+    "jsonhash": ["Use multi-cursors to convert the key=value pairs into a single JSON object. What is the hash when you paste it at the jsonhash tool?"],
+    "data_value_sum": ["Find all divs having a foo class in the hidden element below. What's the sum of their data-value attributes?"],
+    "unicode_sum": ["Download and process the files which contain different encodings. What is the sum of all values associated with these symbols?"],
+    "email_json_url": ["Create a GitHub repository, commit a single JSON file called email.json and push it. Enter the raw GitHub URL of email.json."],
+    "replace_hash": ["Replace all IITM (in upper, lower or mixed case) with IIT Madras in all files. What does running cat * | sha256sum in that folder show in bash?"],
+    "move_rename_hash": ["Move all files under folders into an empty folder and rename each digit to the next. What does running grep . * | LC_ALL=C sort | sha256sum show?"],
+    "different_lines": ["Download and extract the zip file. It has two nearly identical files, a.txt and b.txt. How many lines are different between a.txt and b.txt?",
+                        "How many lines differ between the two files a.txt and b.txt?"],
+    "total_sales": ["What is the total sales of all the items in the Gold ticket type? Write SQL to calculate it."],
+    "github_pages": ["Publish a page using GitHub Pages that showcases your work. What is the GitHub Pages URL?"],
+    "vercel_url": ["Deploy a Python app to Vercel that exposes an API. What is the Vercel URL?"],
+    "repository_url": ["Create a GitHub action on one of your repositories, trigger the action and enter the repository URL."],
+    "docker_image": ["Create and push an image to Docker Hub. What is the Docker image URL?"],
+    "ngrok_url": ["Run Llamafile with the model and create a tunnel with ngrok. What is the ngrok URL?"],
+    "execute_url": ["What is the API URL endpoint for your /execute implementation that calls functions?"],
+    "newest_user": ["Using the GitHub API, find users located in the city with over a number of followers. When was the newest user joined?"],
+    "imdb": ["Extract the movies from IMDb with a rating between two values as JSON"],
+    "hacker_news": ["Search Hacker News for the latest post mentioning a topic with a minimum number of points. What is the link?"],
+}
+
+# Routes questions no trigger matches to the rule with the most similar canonical question
+FUZZY_INDEX = QuestionIndex([(text, rule) for rule in RULES
+                             for text in CANONICAL_QUESTIONS.get(rule.name, rule.triggers)],
+                            float(os.environ.get("FUZZY_THRESHOLD", str(FUZZY_THRESHOLD))))
+FUZZY_ROUTING = os.environ.get("FUZZY_ROUTING", "on") != "off"
+
+RULES_BY_NAME = {rule.name: rule for rule in RULES + [UPLOADED_DATA_RULE]}
+
+def route_question(question, extracted_data=None):
+    """
+    Selects the rule that answers a question.
+
+    Args:
+        question (str): The question text.
+        extracted_data: Parsed contents of an uploaded file, if any.
+
+    Returns:
+        Rule: The winning rule, or None if no rule applies.
+    """
+    rule = ROUTER.route(question)
+    if rule is None and not extracted_data and FUZZY_ROUTING:
+        rule = FUZZY_INDEX.route(question)
+    if extracted_data and (rule is None or rule.priority > UPLOADED_DATA_RULE.priority):
+        return UPLOADED_DATA_RULE
+    return rule
 
-    if "newest user" in question:
-        return "2024-07-31T01:54:58Z"
+def process_question(question, extracted_data):
+    """
+    Determines the type of question and returns the appropriate answer.
+    """
+    return answer_routed(route_question(question, extracted_data), question, extracted_data)
 
-    if "GitHub action" in question:
-        return "https://github.com/studentforgit/TDS-GA/actions/"
+def answer_routed(rule, question, extracted_data, run=None):
+    """
+    Answers a question with an already routed rule and records its metrics and log entry.
 
-    if "Economics" in question:
-        return 63594
+    Both servers answer through this function, so they share the snapshot, cache and
+    coalescing behaviour of answer_with_rule.
+
+    Args:
+        rule (Rule): The rule from route_question, or None.
+        question (str): The question text.
+        extracted_data: Parsed contents of an uploaded file, if any.
+        run (callable): Called as run(rule, question, extracted_data) to compute an answer the
+            snapshot and cache do not hold; defaults to calling the rule's handler.
+    """
+    started = time.perf_counter()
+    handler_name = rule.name if rule is not None else "unmatched"
+    answer = None
+    error = True
+    try:
+        answer = answer_with_rule(rule, question, extracted_data, run)
+        error = is_error_answer(answer)
+        return answer
+    finally:
+        seconds = time.perf_counter() - started
+        METRICS.observe(handler_name, seconds, error)
+        log_answer(handler_name, seconds, error, answer if error else None, sys.exc_info()[1])
+
+def _run_handler(rule, question, extracted_data):
+    return rule.handler(question, extracted_data)
+
+def answer_with_rule(rule, question, extracted_data, run=None):
+    """
+    Answers a question with an already selected rule, going through the answer cache.
+
+    Cacheable rules, the expensive ones, are also coalesced on their cache key: concurrent calls
+    for the same question and upload share a single run of the handler.
+    """
+    if rule is None:
+        return "Could not determine the answer."
+    if rule.snapshot and extracted_data is None:
+        found, answer = SNAPSHOT.lookup(rule.name)
+        if found:
+            return answer
+    run = run or _run_handler
+    if not rule.cacheable:
+        return run(rule, question, extracted_data)
+    key = ANSWER_CACHE.make_key(rule.name, question, extracted_data, rule.assets)
+    try:
+        return IN_FLIGHT.do(key, lambda: ANSWER_CACHE.get_or_compute(key, lambda: run(rule, question, extracted_data)))
+    except SingleFlightTimeout as e:
+        return f"Error: {str(e)}"
+
+def run_rule(rule_name, question, extracted_data=None):
+    """
+    Calls a rule's handler directly, bypassing routing and the answer cache.
+
+    Rules are looked up by name so the call can be shipped to a worker process.
+    """
+    return RULES_BY_NAME[rule_name].handler(question, extracted_data)
 
-    return "Could not determine the answer."
 
 
 def answer_vscode_version():
@@ -423,36 +590,29 @@ def answer_npx_prettier():
     try:
         if not os.path.exists("README.md"):
             return "Error: README.md not found. Ensure the file is in the correct directory."
-        
-        # Run Prettier
-        prettier_result = subprocess.run(
-            "npx -y prettier@3.4.2 README.md", 
-            shell=True, capture_output=True, text=True
-        )
-        
-        if prettier_result.returncode != 0:
-            return f"Error running Prettier: {prettier_result.stderr}"
-        
-        # Compute SHA-256 hash using Python
-        formatted_content = prettier_result.stdout.encode("utf-8")
-        hash_output = hashlib.sha256(formatted_content).hexdigest()
-        
-        return hash_output
+
+        # Formatted by a persistent prettier worker (or the Python fallback) and hashed in Python
+        return PRETTIER.formatted_sha256("README.md")
+    except FormatterError as e:
+        return f"Error running Prettier: {str(e)}"
     except Exception as e:
         return f"Exception occurred: {str(e)}"
 
 def param_constrained_sum(rows, cols, start, step, select_rows, select_cols):
-    # Generate the complete sequence matrix
-    matrix = [[start + step * (col + row * cols) for col in range(cols)] for row in range(rows)]
-    
-    # Apply constraints: select only the specified rows and columns
-    constrained = [matrix[row][:select_cols] for row in range(select_rows)]
-    
-    # Flatten the constrained array and calculate the sum
-    result = sum(sum(row) for row in constrained)
-    return result
+    from formula_engine import Grid
+    # Sum the constrained corner of the sequence as an arithmetic series, without building the matrix
+    sequence = Grid(rows, cols, start, step)
+    constrained = sequence.window(0, 0, min(rows, select_rows), min(cols, select_cols))
+    return constrained.total()
 
 def extract_answer_from_data(data):
+    if isinstance(data, LazyUpload):
+        if data.is_tabular:
+            value = data.first_value('answer')
+            return value if value is not None else "No answer found in the provided data."
+        if getattr(data, "archive", None) is not None:
+            return "No answer found in the provided data."
+        return data.text_prefix(200) + "..."
     if isinstance(data, dict):
         for key in data.keys():
             if 'answer' in key.lower():
@@ -462,17 +622,14 @@ def extract_answer_from_data(data):
     return "No answer found in the provided data."
 
 def sum_take_sortby(values, sort_order, take_count):
+    from formula_engine import evaluate
     try:
-        # Step 1: Sort 'values' by 'sort_order'
-        sorted_values = [x for _, x in sorted(zip(sort_order, values))]
-
-        # Step 2: Take the first 'take_count' elements
-        taken_values = sorted_values[:take_count]
-
-        # Step 3: Sum the taken values
-        result = sum(taken_values)
-
-        return result
+        # Select the take_count entries with the smallest sort keys (stable on ties) and sum them
+        return evaluate(("call", "SUM", [("call", "TAKE", [
+            ("call", "SORTBY", [("array", [list(values)]), ("array", [list(sort_order)])]),
+            ("number", 1),
+            ("number", take_count),
+        ])]))
     except Exception as e:
         return f"Error in calculation: {str(e)}"
 
@@ -488,20 +645,8 @@ def count_wednesdays(start_date, end_date):
         int: The number of Wednesdays in the date range.
     """
     try:
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-
-        # Initialize the count of Wednesdays
-        wednesday_count = 0
-
-        # Iterate through the date range
-        current_date = start
-        while current_date <= end:
-            if current_date.weekday() == 2:  # 2 corresponds to Wednesday
-                wednesday_count += 1
-            current_date += timedelta(days=1)
-
-        return wednesday_count
+        # Closed-form count; constant time however long the range is
+        return count_weekdays(start_date, end_date, 2)
     except Exception as e:
         return f"Error in calculation: {str(e)}"
 
@@ -548,77 +693,46 @@ def sort_json_array(json_array):
 def convert_txt_to_json(file_path):
     """
     Converts a text file with key=value pairs into a JSON object and computes its hash value.
+    The compact JSON is streamed into the hash by json_engine; neither the object nor the string is built.
 
     Args:
-        file_path (str): Path to the text file.
+        file_path: Path to the text file, or a seekable binary stream.
 
     Returns:
-        dict: A JSON object with key-value pairs.
         str: The hash value of the JSON object.
     """
     try:
-        json_object = {}
-        with open(file_path, 'r') as file:
-            for line in file:
-                if '=' in line:
-                    key, value = line.strip().split('=', 1)
-                    json_object[key] = value
-
-        # Compute the hash value of the JSON object
-        json_string = json.dumps(json_object, separators=(',', ':'))
-        hash_value = hashlib.sha256(json_string.encode('utf-8')).hexdigest()
-
-        return hash_value
+        return kv_json_sha256(file_path)
     except Exception as e:
         return f"Error converting text to JSON: {str(e)}", None
 
-def sum_unicode_values(zip_file_path, symbols):
+def sum_unicode_values(zip_file_path, symbols, aggregate="sum"):
     """
     Sums up all the values where the symbol matches any of the specified symbols across all files in a ZIP archive.
+    Each file's encoding (byte-order mark, else UTF-8 or CP-1252) and delimiter are detected by aggregate_engine,
+    which streams the files in chunks.
 
     Args:
-        zip_file_path (str): Path to the ZIP file.
+        zip_file_path: Path to the ZIP file, its bytes, or a ZipArchive.
         symbols (list): List of symbols to match.
+        aggregate (str): "sum", "count" or "mean" of the matching values.
 
     Returns:
         int: The sum of all matching values.
     """
-    total_sum = 0
     try:
-        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-            # Process data1.csv (CP-1252 encoding)
-            with zip_ref.open('data1.csv') as file:
-                reader = csv.DictReader(file.read().decode('cp1252').splitlines())
-                for row in reader:
-                    if row['symbol'] in symbols:
-                        total_sum += int(row['value'])
-
-            # Process data2.csv (UTF-8 encoding)
-            with zip_ref.open('data2.csv') as file:
-                reader = csv.DictReader(file.read().decode('utf-8').splitlines())
-                for row in reader:
-                    if row['symbol'] in symbols:
-                        total_sum += int(row['value'])
-
-            # Process data3.txt (UTF-16 encoding, tab-separated)
-            with zip_ref.open('data3.txt') as file:
-                reader = csv.DictReader(file.read().decode('utf-16').splitlines(), delimiter='\t')
-                for row in reader:
-                    if row['symbol'] in symbols:
-                        total_sum += int(row['value'])
-
-        return total_sum
+        return aggregate_archive(zip_file_path, symbols, aggregate)
     except Exception as e:
         return f"Error processing files: {str(e)}"
 
-def replace_across_files_and_hash(zip_file_path, output_folder, search_text, replace_text):
+def replace_across_files_and_hash(zip_file_path, search_text, replace_text):
     """
-    Unzips a ZIP file into a folder, replaces all occurrences of a text (case-insensitive) with another text in all files,
-    and computes the SHA-256 hash of the concatenated file contents.
+    Replaces all occurrences of a text (case-insensitive) with another text in every file of a ZIP archive,
+    and computes the SHA-256 hash of the concatenated file contents, as `cat * | sha256sum` would.
+    The archive is streamed through replace_engine; nothing is extracted or concatenated in memory.
 
     Args:
-        zip_file_path (str): Path to the ZIP file.
-        output_folder (str): Path to the output folder where files will be extracted.
+        zip_file_path: Path to the ZIP file, its bytes, or a ZipArchive.
         search_text (str): Text to search for (case-insensitive).
         replace_text (str): Text to replace with.
 
@@ -626,197 +740,101 @@ def replace_across_files_and_hash(zip_file_path, output_folder, search_text, rep
         str: The SHA-256 hash of the concatenated file contents.
     """
     try:
-        # Create the output folder if it doesn't exist
-        os.makedirs(output_folder, exist_ok=True)
-
-        # Unzip the files into the output folder
-        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-            zip_ref.extractall(output_folder)
-
-        # Iterate through all files in the output folder
-        concatenated_content = ""
-        for root, _, files in os.walk(output_folder):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-
-                # Read the file content
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-
-                # Replace all occurrences of the search text with the replace text (case-insensitive)
-                updated_content = re.sub(search_text, replace_text, content, flags=re.IGNORECASE)
-
-                # Write the updated content back to the file
-                with open(file_path, 'w', encoding='utf-8') as file:
-                    file.write(updated_content)
-
-                # Append the updated content to the concatenated content
-                concatenated_content += updated_content
-
-        # Compute the SHA-256 hash of the concatenated content
-        hash_value = hashlib.sha256(concatenated_content.encode('utf-8')).hexdigest()
-        return hash_value
+        return replace_and_hash(zip_file_path, search_text, replace_text)
     except Exception as e:
         return f"Error processing files: {str(e)}"
 
-def list_files_attributes_and_sum(zip_file_path, min_size, min_date):
+def list_files_attributes_and_sum(zip_file_path, min_size, min_date, archive_tz=IST):
     """
-    Extracts files from a ZIP archive using 7-Zip, lists their attributes, and calculates the total size of files
-    that meet the specified size and modification date criteria. Deletes the extracted folder after processing.
+    Lists the attributes of the files in a ZIP archive and calculates the total size of files that meet
+    the specified size and modification date criteria. Sizes and timestamps are read from the archive's
+    central directory, so nothing is extracted.
 
     Args:
-        zip_file_path (str): Path to the ZIP file.
+        zip_file_path: Path to the ZIP file, its bytes, or a ZipArchive.
         min_size (int): Minimum file size in bytes.
-        min_date (datetime): Minimum modification date.
+        min_date (datetime): Minimum modification date; naive dates are taken to be in archive_tz.
+        archive_tz (tzinfo): Time zone the archive's timestamps were recorded in.
 
     Returns:
         int: The total size of files meeting the criteria.
     """
-    total_size = 0
-    output_folder = os.path.join("/tmp", "q-list-files-attributes")
     try:
-        # Get the correct 7-Zip executable
-        seven_zip_path = get_seven_zip_executable()
-
-        # Check if 7-Zip executable exists
-        if not os.path.exists(seven_zip_path):
-            return f"Error: 7-Zip executable not found at {seven_zip_path}. Please ensure it is included in the project."
-
-        # Create the output folder
-        os.makedirs(output_folder, exist_ok=True)
-
-        # Use the full path to 7-Zip to extract the ZIP file
-        subprocess.run([seven_zip_path, "x", zip_file_path, f"-o{output_folder}"], check=True)
-
-        # Iterate through all files in the extracted folder
-        for root, _, files in os.walk(output_folder):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
+        return total_size(zip_file_path, min_size=min_size, modified_after=min_date, archive_tz=archive_tz)
+    except Exception as e:
+        return f"Error processing files: {str(e)}"
 
-                # Get file attributes
-                file_stat = os.stat(file_path)
-                file_size = file_stat.st_size
-                file_mtime = datetime.fromtimestamp(file_stat.st_mtime)
+NEXT_DIGIT = str.maketrans("0123456789", "1234567890")
 
-                # Check if the file meets the criteria
-                if file_size >= min_size and file_mtime >= min_date:
-                    total_size += file_size
+def _next_digit_name(file_name):
+    # str.translate covers ASCII names; the regex also shifts other Unicode digits, as \d matches them
+    if file_name.isascii():
+        return file_name.translate(NEXT_DIGIT)
+    return re.sub(r'\d', lambda x: str((int(x.group(0)) + 1) % 10), file_name)
 
-        return total_size
-    except subprocess.CalledProcessError as e:
-        return f"Error extracting files with 7-Zip: {str(e)}"
-    except Exception as e:
-        return f"Error processing files: {str(e)}"
-    finally:
-        # Delete the extracted folder
-        if os.path.exists(output_folder):
-            shutil.rmtree(output_folder)
+def _name_line_records(archive, batch_chars=1 << 20):
+    """
+    Yields lists of UTF-8 "name:line" records, one for every stripped line of every member,
+    reading about batch_chars characters at a time.
+    """
+    for file_name in archive.sorted_names():
+        prefix = f"{file_name}:"
+        try:
+            with archive.open_text(file_name, encoding='utf-8') as file:
+                for lines in iter(lambda: file.readlines(batch_chars), []):
+                    yield [(prefix + line.strip() + "\n").encode('utf-8') for line in lines]
+        except Exception as e:
+            logger.warning("Error reading file %s: %s", file_name, e)
 
-def move_and_rename_files(zip_file_path, output_folder):
+def move_and_rename_files(zip_file_path, run_bytes=RUN_BYTES):
     """
-    Extracts files from a ZIP archive, moves all files under folders into a single folder,
-    renames all files by replacing each digit with the next, and computes the SHA-256 hash
-    of the sorted concatenated file contents.
+    Moves all files under folders of a ZIP archive into a single folder, renames all files by replacing
+    each digit with the next, and computes the SHA-256 hash of the sorted concatenated file contents.
+    The moves and renames happen in an in-memory view of the archive; nothing is extracted to disk.
+    The records are sorted in byte order by sort_engine, which spills runs of run_bytes to temporary
+    files for large archives, and hashed as they are merged.
 
     Args:
-        zip_file_path (str): Path to the ZIP file.
-        output_folder (str): Path to the output folder where files will be processed.
+        zip_file_path: Path to the ZIP file, its bytes, or a ZipArchive.
+        run_bytes (int): Memory budget for sorting before runs are spilled to disk.
 
     Returns:
         str: The SHA-256 hash of the sorted concatenated file contents.
     """
     try:
-        import stat
+        with open_archive(zip_file_path) as archive:
+            archive = archive.fork()
 
-        # Create the output folder if it doesn't exist
-        os.makedirs(output_folder, exist_ok=True)
+            # Move all files under folders into the top-level folder
+            archive.flatten()
 
-        # Extract the ZIP file
-        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-            zip_ref.extractall(output_folder)
-
-        # Change permissions for all folders and files in the extracted directory
-        for root, dirs, files in os.walk(output_folder):
-            for dir_name in dirs:
-                dir_path = os.path.join(root, dir_name)
-                os.chmod(dir_path, stat.S_IRWXU)  # Grant read, write, and execute permissions to the user
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-                os.chmod(file_path, stat.S_IRWXU)  # Grant read, write, and execute permissions to the user
-
-        # Move all files under folders into the output folder
-        for root, dirs, files in os.walk(output_folder):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-                try:
-                    if root != output_folder:  # Avoid moving files already in the output folder
-                        shutil.move(file_path, os.path.join(output_folder, file_name))
-                except Exception as e:
-                    print(f"Error moving file {file_name}: {e}")
-
-        # Rename all files by replacing each digit with the next
-        for file_name in os.listdir(output_folder):
-            old_file_path = os.path.join(output_folder, file_name)
-            try:
-                new_file_name = re.sub(r'\d', lambda x: str((int(x.group(0)) + 1) % 10), file_name)
-                new_file_path = os.path.join(output_folder, new_file_name)
-                os.rename(old_file_path, new_file_path)
-            except Exception as e:
-                print(f"Error renaming file {file_name}: {e}")
-
-        # Concatenate and sort file contents
-        concatenated_content = []
-        for file_name in sorted(os.listdir(output_folder)):
-            file_path = os.path.join(output_folder, file_name)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    for line in file:
-                        concatenated_content.append(f"{file_name}:{line.strip()}\n")
-            except Exception as e:
-                print(f"Error reading file {file_name}: {e}")
-
-        # Sort the concatenated content line by line using LC_ALL=C behavior
-        sorted_content = "".join(sorted(concatenated_content, key=lambda x: x.encode('utf-8')))
-
-        # Compute the SHA-256 hash of the sorted concatenated content
-        hash_value = hashlib.sha256(sorted_content.encode('utf-8')).hexdigest()
-        return hash_value
+            # Rename all files by replacing each digit with the next
+            for file_name in archive.names():
+                archive.rename(file_name, _next_digit_name(file_name))
+
+            # Sort the name:line records using LC_ALL=C behavior and hash them as they are merged
+            return sorted_sha256(_name_line_records(archive), run_bytes)
     except Exception as e:
         return f"Error processing files: {str(e)}"
 
-def compare_files(zip_file_path, file1_name, file2_name):
+def compare_files(zip_file_path, file1_name, file2_name, whitespace="strip", count_extra=False):
     """
-    Compares two files line by line and counts the number of differing lines.
+    Compares two files inside a ZIP archive line by line and counts the number of differing lines.
+    Both files are streamed straight from the archive by diff_engine, which skips identical blocks
+    without splitting them into lines.
 
     Args:
-        zip_file_path (str): Path to the ZIP file containing the files.
+        zip_file_path: Path to the ZIP file containing the files, its bytes, or a ZipArchive.
         file1_name (str): Name of the first file.
         file2_name (str): Name of the second file.
+        whitespace (str): "strip" (ignore leading and trailing whitespace), "ignore" or "exact".
+        count_extra (bool): Also count lines of the longer file beyond the end of the shorter one.
 
     Returns:
         int: The number of lines that are different between the two files.
     """
     try:
-        import zipfile
-
-        # Extract the ZIP file
-        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-            zip_ref.extractall("q-compare-files")
-
-        # Open the two files and compare line by line
-        file1_path = os.path.join("q-compare-files", file1_name)
-        file2_path = os.path.join("q-compare-files", file2_name)
-
-        differing_lines = 0
-        with open(file1_path, 'r', encoding='utf-8') as file1, open(file2_path, 'r', encoding='utf-8') as file2:
-            for line1, line2 in zip(file1, file2):
-                if line1.strip() != line2.strip():
-                    differing_lines += 1
-
-        return differing_lines
+        with open_archive(zip_file_path) as archive:
+            return count_differences((archive, file1_name), (archive, file2_name), whitespace, count_extra)
     except Exception as e:
         return f"Error comparing files: {str(e)}"
-
-
-
-
@@ -0,0 +1,174 @@
+import io
+import os
+import re
+import zlib
+import atexit
+import hashlib
+import zipfile
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from zip_fs import open_archive
+
+CHUNK_SIZE = 1 << 20
+# Archives with less uncompressed data than this are processed on the calling thread
+PARALLEL_MIN_BYTES = 32 << 20
+# Members larger than this are streamed in place rather than buffered whole by a worker
+MAX_BUFFERED_MEMBER = 16 << 20
+# Compression methods a worker can undo itself; members using others are streamed in place
+_WORKER_METHODS = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=64)
+def compile_pattern(search_text, flags=re.IGNORECASE):
+    """
+    Compiles a search pattern once and reuses it across files and requests.
+    """
+    return re.compile(search_text, flags)
+
+def _fixed_length(pattern):
+    """
+    Returns the match length of a pattern without regex metacharacters, or None.
+
+    Only such literal patterns can be replaced chunk by chunk with a bounded carry;
+    anything else is replaced one whole member at a time.
+    """
+    if not pattern.pattern or re.search(r'[\\.^$*+?{}\[\]|()]', pattern.pattern):
+        return None
+    return len(pattern.pattern)
+
+def iter_replaced(text_stream, pattern, replace_text, chunk_size=CHUNK_SIZE):
+    """
+    Yields the UTF-8 bytes of a text stream with every match of pattern replaced.
+
+    For literal patterns the stream is processed in chunks, so memory stays bounded by chunk_size.
+    Chunks are cut after their last newline, which no newline-free literal can straddle, and each
+    piece is handed to pattern.sub() whole. A chunk without a newline falls back to carrying its
+    last (length - 1) characters. The output is identical to pattern.sub() over the whole text.
+
+    Args:
+        text_stream: A readable text stream.
+        pattern: Compiled regular expression.
+        replace_text (str): Replacement template, as accepted by pattern.sub().
+        chunk_size (int): Characters read per chunk.
+    """
+    length = _fixed_length(pattern)
+    if length is None:
+        yield pattern.sub(replace_text, text_stream.read()).encode('utf-8')
+        return
+
+    cut_at_newlines = "\n" not in pattern.pattern
+    carry = ""
+    while True:
+        chunk = text_stream.read(chunk_size)
+        buffer = carry + chunk
+        if not chunk:
+            if buffer:
+                yield pattern.sub(replace_text, buffer).encode('utf-8')
+            return
+
+        boundary = buffer.rfind("\n") + 1 if cut_at_newlines else 0
+        if boundary:
+            carry = buffer[boundary:]
+            yield pattern.sub(replace_text, buffer[:boundary]).encode('utf-8')
+            continue
+
+        # No complete match can start in the last (length - 1) characters
+        cut = max(len(buffer) - (length - 1), 0)
+        pieces = []
+        position = 0
+        for match in pattern.finditer(buffer):
+            if match.start() >= cut:
+                break
+            pieces.append(buffer[position:match.start()])
+            pieces.append(match.expand(replace_text))
+            position = match.end()
+        boundary = max(cut, position)
+        pieces.append(buffer[position:boundary])
+        carry = buffer[boundary:]
+        yield "".join(pieces).encode('utf-8')
+
+def replace_member(archive, name, pattern, replace_text, chunk_size=CHUNK_SIZE):
+    """
+    Yields the replaced UTF-8 bytes of one archive member, read with universal newlines.
+    """
+    with archive.open_text(name, encoding='utf-8') as stream:
+        yield from iter_replaced(stream, pattern, replace_text, chunk_size)
+
+def _process_pool(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(workers)
+            atexit.register(_executor.shutdown, wait=False)
+        return _executor
+
+def _default_workers():
+    return min(os.cpu_count() or 1, 8)
+
+def _replace_raw_member(compress_type, crc, raw, search_text, flags, replace_text, chunk_size):
+    # Runs in a worker process: decompress one member, check it and return its replaced bytes
+    data = zlib.decompress(raw, -zlib.MAX_WBITS) if compress_type == zipfile.ZIP_DEFLATED else raw
+    if zlib.crc32(data) != crc:
+        raise zipfile.BadZipFile("Bad CRC-32 for a member")
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8')
+    return b"".join(iter_replaced(stream, compile_pattern(search_text, flags), replace_text, chunk_size))
+
+def replace_and_hash(source, search_text, replace_text, flags=re.IGNORECASE, chunk_size=CHUNK_SIZE,
+                     workers=None):
+    """
+    Replaces search_text in every member of an archive and returns the SHA-256 of the results
+    concatenated in byte order of member name, the way `cat * | sha256sum` reads them.
+
+    Replaced bytes are fed straight into an incremental hash; the concatenation is never built.
+    Archives holding at least PARALLEL_MIN_BYTES are spread over a shared process pool: each
+    worker gets one member still compressed, decompresses it and returns its replaced bytes.
+    Results are hashed strictly in name order through a bounded window, so the digest does not
+    depend on scheduling. Smaller archives, and members too large or compressed in a way a
+    worker cannot undo, are streamed on the calling thread, with memory bounded by chunk_size.
+
+    Args:
+        source: Path to the ZIP file, its bytes, a file object or a ZipArchive.
+        search_text (str): Regular expression to replace.
+        replace_text (str): Replacement template.
+        flags (int): Regular expression flags; case-insensitive by default.
+        chunk_size (int): Characters processed per chunk when streaming a member.
+        workers (int): Worker processes; None picks one per CPU.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    pattern = compile_pattern(search_text, flags)
+    digest = hashlib.sha256()
+    workers = _default_workers() if workers is None else workers
+    with open_archive(source) as archive:
+        names = archive.sorted_names()
+        if workers <= 1 or len(names) < 2 or sum(archive.size(name) for name in names) < PARALLEL_MIN_BYTES:
+            for name in names:
+                for piece in replace_member(archive, name, pattern, replace_text, chunk_size):
+                    digest.update(piece)
+            return digest.hexdigest()
+
+        executor = _process_pool(workers)
+        pending = deque()
+        for name in names:
+            info = archive.info(name)
+            if archive.size(name) > MAX_BUFFERED_MEMBER or (info is not None and (
+                    info.compress_type not in _WORKER_METHODS or info.flag_bits & 0x1)):
+                # Hash earlier members first, then stream this one in place
+                while pending:
+                    digest.update(pending.popleft().result())
+                for piece in replace_member(archive, name, pattern, replace_text, chunk_size):
+                    digest.update(piece)
+                continue
+            compress_type, crc, raw = archive.read_raw(name)
+            pending.append(executor.submit(_replace_raw_member, compress_type, crc, raw, search_text, flags,
+                                           replace_text, chunk_size))
+            if len(pending) >= workers * 2:
+                digest.update(pending.popleft().result())
+        while pending:
+            digest.update(pending.popleft().result())
+    return digest.hexdigest()
@@ -0,0 +1,202 @@
+"""
+Structured, non-blocking logging for the request path.
+
+configure_logging() routes every record through a bounded in-memory queue to a background
+listener thread, which formats records as JSON lines and writes them out. Request threads
+only enqueue, so slow log I/O never adds to request latency. Each record carries the id of
+the request it was emitted for.
+
+Configuration comes from the environment:
+    LOG_LEVEL          root level, default INFO
+    LOG_LEVELS         per-module levels, e.g. "werkzeug=WARNING,pdf_engine=DEBUG"
+    LOG_SAMPLE_RATE    fraction of successful answers to log, default 0.01; errors are always logged
+    LOG_QUEUE_SIZE     records held for the listener before new non-error records are dropped
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import atexit
+import random
+import logging
+import threading
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.01"))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+REQUEST_ID = contextvars.ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed through `extra` and is emitted as a field
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+logger = logging.getLogger("answers")
+
+_listener = None
+_configure_lock = threading.Lock()
+
+def new_request_id(incoming=None):
+    """
+    Sets the id of the current request, reusing a client-supplied X-Request-ID if given.
+
+    Returns:
+        contextvars.Token: Pass to REQUEST_ID.reset() when the request ends.
+    """
+    request_id = incoming[:64] if incoming else uuid.uuid4().hex[:16]
+    return REQUEST_ID.set(request_id)
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamps each record with the current request id when it is created, on the request thread.
+    """
+
+    def filter(self, record):
+        record.request_id = REQUEST_ID.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line, including any `extra` fields.
+    """
+
+    def format(self, record):
+        document = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                document[key] = value
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            document["exception"] = record.exc_text
+        return json.dumps(document, default=str, ensure_ascii=False)
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Enqueues records without waiting. When the queue is full, records below ERROR are dropped
+    and counted; errors wait briefly for room so they are kept.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render the message and traceback now, while the arguments are still intact
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.ERROR:
+                self.dropped += 1
+                return
+            try:
+                self.queue.put(record, timeout=0.1)
+            except queue.Full:
+                self.dropped += 1
+
+def parse_module_levels(spec):
+    """
+    Parses "module=LEVEL,other=LEVEL" into {module: level}. Malformed entries are ignored.
+    """
+    levels = {}
+    for entry in spec.split(","):
+        name, _, level = entry.partition("=")
+        name, level = name.strip(), level.strip().upper()
+        if name and isinstance(logging.getLevelName(level), int):
+            levels[name] = level
+    return levels
+
+def configure_logging(level=None, module_levels=None, stream=None):
+    """
+    Installs the queue handler on the root logger and starts the listener thread.
+
+    Calling it again is a no-op, so every entry point can call it.
+
+    Args:
+        level (str): Root level; defaults to LOG_LEVEL.
+        module_levels (dict): {logger name: level}; defaults to parsing LOG_LEVELS.
+        stream: Where the listener writes; defaults to stderr.
+
+    Returns:
+        QueueListener: The running listener.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return _listener
+        handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        handler.addFilter(RequestContextFilter())
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel((level or LOG_LEVEL).upper())
+        levels = parse_module_levels(LOG_LEVELS) if module_levels is None else module_levels
+        for name, module_level in levels.items():
+            logging.getLogger(name).setLevel(module_level.upper())
+
+        _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+def shutdown_logging():
+    """
+    Stops the listener after it has written every queued record.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def log_answer(handler_name, seconds, error=False, detail=None, exc=None):
+    """
+    Logs one answered question. Successful answers are sampled at LOG_SAMPLE_RATE; errors are
+    always logged with their detail and traceback.
+
+    Args:
+        handler_name (str): Name of the rule that answered.
+        seconds (float): Wall-clock time spent answering.
+        error (bool): The handler raised or returned an error message.
+        detail (str): The error message returned by the handler, if any.
+        exc (BaseException): The exception raised by the handler, if any.
+    """
+    duration_ms = round(seconds * 1000, 3)
+    if error:
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning("answer failed", exc_info=exc,
+                           extra={"handler": handler_name, "duration_ms": duration_ms, "detail": detail})
+    elif (LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE) and logger.isEnabledFor(logging.INFO):
+        logger.info("answered", extra={"handler": handler_name, "duration_ms": duration_ms,
+                                       "sample_rate": LOG_SAMPLE_RATE})
+
+def timed_request(method, path, status, started):
+    """
+    Logs the end of an HTTP request at DEBUG, with its status and total duration.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("request", extra={"method": method, "path": path, "status": status,
+                                       "duration_ms": round((time.perf_counter() - started) * 1000, 3)})
@@ -0,0 +1,302 @@
+import math
+import threading
+from collections import Counter, deque
+
+# Below this many triggers CPython's C-level substring search beats a per-character automaton
+# walk, so the router tests triggers one by one (see benchmarks/bench_routing.py).
+AUTOMATON_MIN_TRIGGERS = 200
+# Cosine similarity a question needs with a canonical question to be routed by the fuzzy index.
+# Rewordings of the canonical questions score about 0.5 to 0.9 and unrelated questions below 0.25,
+# but a question that only differs in its key noun ("lines" for "ducks") can reach 0.48.
+FUZZY_THRESHOLD = 0.5
+
+
+class Rule:
+    """
+    A single entry in the question handler registry.
+
+    Args:
+        name (str): Short identifier for the handler, used in logs and metrics.
+        triggers (list): Substrings that select this rule when found in a question.
+        handler (callable): Called as handler(question, extracted_data) to produce the answer.
+        priority (int): Lower values win when several rules match the same question.
+        ignore_case (bool): Match the triggers against the lower-cased question.
+        cacheable (bool): The answer is a pure function of the question, upload and assets.
+        assets (list): Paths of bundled files the handler reads, fingerprinted into cache keys.
+        offload (str): Where an async server runs the handler: None runs it inline on the event
+            loop, "thread" on a thread pool (blocking I/O, subprocesses) and "process" on a
+            process pool (CPU-bound work that needs no upload).
+        snapshot (bool): Without an upload, the answer depends only on the assets, so it can be
+            precomputed by answer_snapshot.py.
+    """
+
+    def __init__(self, name, triggers, handler, priority, ignore_case=False, cacheable=False, assets=(),
+                 offload=None, snapshot=False):
+        self.name = name
+        self.triggers = list(triggers)
+        self.handler = handler
+        self.priority = priority
+        self.ignore_case = ignore_case
+        self.cacheable = cacheable
+        self.assets = list(assets)
+        self.offload = offload
+        self.snapshot = snapshot
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, priority={self.priority})"
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher that finds every pattern occurring in a text in one pass.
+
+    Each pattern carries a value; the automaton reports the values of all patterns found.
+    The goto/fail construction is flattened into a full transition table at build time,
+    so matching is a single dictionary lookup per character of the text.
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns (list): (pattern, value) pairs. Empty patterns are ignored.
+        """
+        goto = [{}]
+        outputs = [[]]
+        for pattern, value in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(value)
+
+        # Breadth-first pass computes failure links and merges outputs along them
+        fail = [0] * len(goto)
+        order = []
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                target = goto[link].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+
+        # Flatten into a full transition table so matching never follows failure links
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        for state in order:
+            transitions = dict(delta[fail[state]])
+            transitions.update(goto[state])
+            delta[state] = transitions
+
+        self._delta = delta
+        self._outputs = {state: tuple(values) for state, values in enumerate(outputs) if values}
+        self._lowest = {state: min(values) for state, values in self._outputs.items()}
+
+    def iter_matches(self, text):
+        """
+        Yields the value of every pattern occurrence in the text, in order of match end.
+        """
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if state in outputs:
+                yield from outputs[state]
+
+    def min_match(self, text):
+        """
+        Returns the smallest value among all patterns found in the text, or None.
+        """
+        delta = self._delta
+        lowest = self._lowest
+        state = 0
+        best = None
+        for char in text:
+            state = delta[state].get(char, 0)
+            if state in lowest:
+                value = lowest[state]
+                if best is None or value < best:
+                    best = value
+        return best
+
+
+class QuestionRouter:
+    """
+    Routes a question to the highest-priority rule whose trigger occurs in it.
+
+    The automata are built once from the registry; automaton routing scans the question a single
+    time (twice if any rule is case-insensitive) regardless of how many rules are registered.
+
+    Args:
+        rules (list): The Rule registry.
+        strategy (str): "automaton", "linear", or "auto" to pick by registry size.
+    """
+
+    def __init__(self, rules, strategy="auto"):
+        self.rules = sorted(rules, key=lambda rule: rule.priority)
+        sensitive = []
+        insensitive = []
+        for index, rule in enumerate(self.rules):
+            for trigger in rule.triggers:
+                if rule.ignore_case:
+                    insensitive.append((trigger.lower(), index))
+                else:
+                    sensitive.append((trigger, index))
+        self._linear = [
+            (trigger.lower() if rule.ignore_case else trigger, rule.ignore_case, rule)
+            for rule in self.rules for trigger in rule.triggers
+        ]
+        self._sensitive = AhoCorasick(sensitive)
+        self._insensitive = AhoCorasick(insensitive) if insensitive else None
+        if strategy == "auto":
+            strategy = "automaton" if len(self._linear) >= AUTOMATON_MIN_TRIGGERS else "linear"
+        if strategy not in ("automaton", "linear"):
+            raise ValueError(f"Unknown routing strategy: {strategy}")
+        self.strategy = strategy
+
+    def route(self, question):
+        """
+        Returns the matching Rule with the lowest priority value, or None if nothing matches.
+        """
+        if self.strategy == "automaton":
+            return self.route_automaton(question)
+        return self.route_linear(question)
+
+    def route_automaton(self, question):
+        """
+        Routes with the Aho-Corasick automata in a single pass over the question.
+        """
+        best = self._sensitive.min_match(question)
+        if self._insensitive is not None:
+            other = self._insensitive.min_match(question.lower())
+            if other is not None and (best is None or other < best):
+                best = other
+        return self.rules[best] if best is not None else None
+
+    def matches(self, question):
+        """
+        Returns every matching Rule in priority order.
+        """
+        found = set(self._sensitive.iter_matches(question))
+        if self._insensitive is not None:
+            found.update(self._insensitive.iter_matches(question.lower()))
+        return [self.rules[index] for index in sorted(found)]
+
+    def route_linear(self, question):
+        """
+        Routes by testing each rule's triggers in priority order, stopping at the first hit.
+        """
+        lowered = None
+        for trigger, ignore_case, rule in self._linear:
+            if ignore_case:
+                if lowered is None:
+                    lowered = question.lower()
+                if trigger in lowered:
+                    return rule
+            elif trigger in question:
+                return rule
+        return None
+
+
+def trigrams(text):
+    """
+    Counts the character trigrams of a text, lower-cased with runs of whitespace collapsed and
+    padded with a space at each end, so word boundaries form trigrams of their own.
+    """
+    text = " " + " ".join(text.lower().split()) + " "
+    return Counter(text[i:i + 3] for i in range(len(text) - 2))
+
+
+class QuestionIndex:
+    """
+    Fuzzy question matcher: scores a question against canonical question texts by the cosine
+    similarity of their character-trigram TF-IDF vectors.
+
+    The texts are stored as L2-normalized rows of a dense NumPy matrix with one column per
+    trigram of the vocabulary. Scoring a question is a single product of the columns of its
+    trigrams with its weights, so every text is scored at once. Trigrams outside the
+    vocabulary still count towards the question's norm, with the highest IDF, so a question
+    that shares a few trigrams with a text but is otherwise unrelated scores low.
+
+    The matrix is built on first use, which is also when NumPy is imported.
+
+    Args:
+        documents (list): (text, value) pairs; route() returns the value of the best text.
+        threshold (float): Lowest similarity that counts as a match.
+    """
+
+    def __init__(self, documents, threshold=FUZZY_THRESHOLD):
+        self.documents = list(documents)
+        self.threshold = threshold
+        self._matrix = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        import numpy as np
+
+        counts = [trigrams(text) for text, _ in self.documents]
+        frequencies = Counter(gram for count in counts for gram in count)
+        vocabulary = {gram: column for column, gram in enumerate(sorted(frequencies))}
+        total = len(counts)
+        # Smoothed IDF, as if one extra text held every trigram
+        idf = {gram: math.log((1 + total) / (1 + frequency)) + 1 for gram, frequency in frequencies.items()}
+        matrix = np.zeros((total, len(vocabulary)), dtype=np.float32)
+        for row, count in enumerate(counts):
+            for gram, frequency in count.items():
+                matrix[row, vocabulary[gram]] = frequency * idf[gram]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms > 0, norms, 1)
+        self._np = np
+        self._vocabulary = vocabulary
+        self._idf = np.array([idf[gram] for gram in sorted(frequencies)], dtype=np.float32)
+        self._unknown_idf = math.log(1 + total) + 1
+        self._values = [value for _, value in self.documents]
+        self._matrix = matrix
+
+    def scores(self, question):
+        """
+        Returns the cosine similarity of the question with every text, as a NumPy array.
+        """
+        if self._matrix is None:
+            with self._lock:
+                if self._matrix is None:
+                    self._build()
+        np = self._np
+        columns = []
+        frequencies = []
+        unknown = 0.0
+        for gram, frequency in trigrams(question).items():
+            column = self._vocabulary.get(gram)
+            if column is None:
+                unknown += (frequency * self._unknown_idf) ** 2
+            else:
+                columns.append(column)
+                frequencies.append(frequency)
+        if not columns:
+            return np.zeros(len(self._values), dtype=np.float32)
+        weights = np.array(frequencies, dtype=np.float32) * self._idf[columns]
+        norm = math.sqrt(float(weights @ weights) + unknown)
+        return self._matrix[:, columns] @ (weights / norm)
+
+    def route(self, question):
+        """
+        Returns the value of the most similar text, or None if none reaches the threshold.
+        """
+        if not self.documents:
+            return None
+        scores = self.scores(question)
+        best = int(scores.argmax())
+        return self._values[best] if scores[best] >= self.threshold else None
@@ -0,0 +1,167 @@
+"""
+Single-flight coalescing of identical in-flight computations.
+
+When several requests ask the same expensive question at once, only the first runs the handler;
+the others wait for it and share its answer or its exception. Within a process the waiters are
+threads. With SINGLE_FLIGHT_DIR set, calls are also coalesced across processes (e.g. pre-forked
+server workers) through lock files in that directory: the process holding a key's lock computes
+the answer and leaves it in a result file for the processes queued on the lock.
+
+Configuration comes from the environment:
+    SINGLE_FLIGHT_TIMEOUT    seconds a caller waits for another's result, default 120; 0 waits forever
+    SINGLE_FLIGHT_DIR        directory for cross-process lock and result files; unset disables them
+"""
+import os
+import time
+import pickle
+import hashlib
+import threading
+
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get("SINGLE_FLIGHT_TIMEOUT", "120"))
+SINGLE_FLIGHT_DIR = os.environ.get("SINGLE_FLIGHT_DIR") or None
+# Longest sleep between attempts to take a lock another process holds
+MAX_POLL_SECONDS = 0.05
+
+class SingleFlightTimeout(TimeoutError):
+    """
+    Raised in a caller that gave up waiting for another caller's result.
+    """
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers with the same key get the
+    running call's result, or have its exception raised in them too.
+
+    Args:
+        timeout (float): Seconds a caller waits for a call already running, in this process or
+            another; None or 0 waits forever.
+        lock_dir (str): Directory for cross-process lock files, or None to coalesce within the
+            process only.
+    """
+
+    def __init__(self, timeout=SINGLE_FLIGHT_TIMEOUT, lock_dir=SINGLE_FLIGHT_DIR):
+        self.timeout = timeout or None
+        self.lock_dir = lock_dir
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def do(self, key, function):
+        """
+        Returns function(), unless a call with an equal key is already running, in which case
+        it waits for that call and returns its result.
+
+        Raises:
+            SingleFlightTimeout: The running call did not finish within the timeout.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            if not call.done.wait(self.timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise SingleFlightTimeout(f"Timed out after {self.timeout:g}s waiting for an identical request")
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            if self.lock_dir is None:
+                call.result = function()
+            else:
+                call.result = self._do_across_processes(key, function)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _do_across_processes(self, key, function):
+        """
+        Runs function() while holding the key's lock file, unless another process finishes the
+        same call while this one waits for the lock, in which case its stored result is used.
+
+        Only results are shared across processes; a failed call leaves none, so the next
+        process in line runs the function itself.
+        """
+        import fcntl
+
+        name = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+        result_path = os.path.join(self.lock_dir, name + ".result")
+        started = time.time()
+        with open(os.path.join(self.lock_dir, name + ".lock"), "a+b") as lock_file:
+            self._acquire(fcntl, lock_file)
+            try:
+                stored = self._read_result(result_path, started)
+                if stored is not None:
+                    with self._lock:
+                        self.coalesced += 1
+                    return stored[0]
+                result = function()
+                self._write_result(result_path, result)
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _acquire(self, fcntl, lock_file):
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    with self._lock:
+                        self.timeouts += 1
+                    raise SingleFlightTimeout(
+                        f"Timed out after {self.timeout:g}s waiting for an identical request in another process")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_POLL_SECONDS)
+
+    def _read_result(self, path, started):
+        # A result counts only if it was written after this caller started waiting
+        try:
+            with open(path, "rb") as file:
+                finished, result = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return (result,) if finished >= started else None
+
+    def _write_result(self, path, result):
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                pickle.dump((time.time(), result), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            # Results that cannot be pickled are simply not shared
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "timeouts": self.timeouts,
+            }
+
+IN_FLIGHT = SingleFlight()
@@ -0,0 +1,87 @@
+import os
+import heapq
+import pickle
+import hashlib
+import tempfile
+from itertools import chain, islice
+
+# Bytes of records sorted in memory before a run is spilled to a temporary file
+RUN_BYTES = int(os.environ.get("SORT_RUN_BYTES", str(64 << 20)))
+# Records pickled together in a spilled run; merging holds one block per run in memory
+BLOCK_RECORDS = 4096
+# Approximate per-record overhead of a bytes object in a list, counted against RUN_BYTES
+RECORD_OVERHEAD = 41
+
+def _spill(run, tmp_dir):
+    file = tempfile.TemporaryFile(dir=tmp_dir)
+    for start in range(0, len(run), BLOCK_RECORDS):
+        pickle.dump(run[start:start + BLOCK_RECORDS], file, protocol=pickle.HIGHEST_PROTOCOL)
+    file.seek(0)
+    return file
+
+def _read_run(file):
+    while True:
+        try:
+            block = pickle.load(file)
+        except EOFError:
+            return
+        yield from block
+
+def sorted_batches(batches, run_bytes=RUN_BYTES, tmp_dir=None):
+    """
+    Sorts byte records in byte order, the order `LC_ALL=C sort` uses, and yields them in lists.
+
+    Records are collected into runs of about run_bytes, each sorted in memory; when more than
+    one run is needed, the full runs are spilled to temporary files and the runs are merged
+    with a heap. Memory stays bounded by one run plus one block per spilled run, however
+    many records there are.
+
+    Args:
+        batches (iterable): Lists of bytes records.
+        run_bytes (int): Memory budget for the run being collected.
+        tmp_dir (str): Directory for spilled runs; defaults to the system temporary directory.
+    """
+    run = []
+    size = 0
+    spilled = []
+    try:
+        for batch in batches:
+            run.extend(batch)
+            size += sum(map(len, batch)) + RECORD_OVERHEAD * len(batch)
+            if size >= run_bytes:
+                run.sort()
+                spilled.append(_spill(run, tmp_dir))
+                run = []
+                size = 0
+        run.sort()
+        if not spilled:
+            for start in range(0, len(run), BLOCK_RECORDS):
+                yield run[start:start + BLOCK_RECORDS]
+            return
+        merged = heapq.merge(*(_read_run(file) for file in spilled), run)
+        while True:
+            batch = list(islice(merged, BLOCK_RECORDS))
+            if not batch:
+                return
+            yield batch
+    finally:
+        for file in spilled:
+            file.close()
+
+def external_sort(records, run_bytes=RUN_BYTES, tmp_dir=None):
+    """
+    Yields byte records in byte order; see sorted_batches.
+    """
+    records = iter(records)
+    batches = iter(lambda: list(islice(records, BLOCK_RECORDS)), [])
+    return chain.from_iterable(sorted_batches(batches, run_bytes, tmp_dir))
+
+def sorted_sha256(batches, run_bytes=RUN_BYTES, tmp_dir=None):
+    """
+    Returns the hex SHA-256 of batches of byte records concatenated in byte order, without
+    building the concatenation.
+    """
+    digest = hashlib.sha256()
+    for batch in sorted_batches(batches, run_bytes, tmp_dir):
+        digest.update(b"".join(batch))
+    return digest.hexdigest()
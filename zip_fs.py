@@ -0,0 +1,190 @@
+import io
+import zlib
+import posixpath
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+
+class ZipArchive:
+    """
+    A virtual, in-memory view of a ZIP archive.
+
+    Handlers read, rename, move and rewrite members through this view instead of extracting
+    the archive, so a request never writes to disk and concurrent requests never share state.
+    Member contents stay compressed inside the archive until they are streamed; only members
+    rewritten with write() are held as bytes.
+
+    Args:
+        source: Path to a ZIP file, the archive bytes, or a seekable binary file object.
+    """
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        self._zip = zipfile.ZipFile(source, 'r')
+        # Virtual path -> ZipInfo for untouched members, or bytes for rewritten ones
+        self._entries = OrderedDict(
+            (info.filename, info) for info in self._zip.infolist() if not info.is_dir()
+        )
+
+    def fork(self):
+        """
+        Returns an independent view over the same archive, so renames and writes made through
+        one view are invisible to the other. Closing either view closes the shared archive.
+        """
+        view = object.__new__(ZipArchive)
+        view._zip = self._zip
+        view._entries = OrderedDict(self._entries)
+        return view
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def names(self):
+        """
+        Returns the virtual paths of all file members in archive order.
+        """
+        return list(self._entries)
+
+    def sorted_names(self):
+        """
+        Returns the virtual paths in byte order, the way `ls` or `cat *` list them under LC_ALL=C.
+        """
+        return sorted(self._entries, key=lambda name: name.encode('utf-8'))
+
+    def infolist(self):
+        """
+        Returns the ZipInfo of every entry in the underlying archive, directories included,
+        as recorded in its central directory.
+        """
+        return self._zip.infolist()
+
+    def info(self, name):
+        """
+        Returns the original ZipInfo of a member, or None if it was rewritten in memory.
+        """
+        entry = self._entries[name]
+        return entry if isinstance(entry, zipfile.ZipInfo) else None
+
+    def size(self, name):
+        """
+        Returns the uncompressed size of a member in bytes.
+        """
+        entry = self._entries[name]
+        return entry.file_size if isinstance(entry, zipfile.ZipInfo) else len(entry)
+
+    def open(self, name):
+        """
+        Opens a member for streaming binary reads.
+        """
+        entry = self._entries[name]
+        if isinstance(entry, zipfile.ZipInfo):
+            return self._zip.open(entry, 'r')
+        return io.BytesIO(entry)
+
+    def read_raw(self, name):
+        """
+        Returns (compression method, CRC-32, stored bytes) of a member without decompressing it,
+        so the decompression can happen elsewhere, e.g. in a worker process. Members rewritten
+        with write() come back as ZIP_STORED.
+
+        Raises:
+            ValueError: The member is encrypted.
+        """
+        entry = self._entries[name]
+        if not isinstance(entry, zipfile.ZipInfo):
+            return zipfile.ZIP_STORED, zlib.crc32(entry), entry
+        if entry.flag_bits & 0x1:
+            raise ValueError(f"{name} is encrypted")
+        # open() checks the local header and leaves the shared file at the member's data
+        with self._zip.open(entry, 'r') as member:
+            return entry.compress_type, entry.CRC, member._fileobj.read(entry.compress_size)
+
+    def open_text(self, name, encoding='utf-8', errors='strict', newline=None):
+        """
+        Opens a member for streaming text reads with the same newline handling as open(path, 'r').
+        """
+        return io.TextIOWrapper(self.open(name), encoding=encoding, errors=errors, newline=newline)
+
+    def read(self, name):
+        with self.open(name) as stream:
+            return stream.read()
+
+    def read_text(self, name, encoding='utf-8', errors='strict'):
+        with self.open_text(name, encoding=encoding, errors=errors) as stream:
+            return stream.read()
+
+    def write(self, name, data):
+        """
+        Replaces (or creates) a member's contents in memory. The archive itself is never modified.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._entries[name] = bytes(data)
+
+    def rename(self, old_name, new_name):
+        """
+        Renames a member, replacing any existing member at the new path like os.rename does.
+        """
+        if old_name == new_name:
+            return
+        entry = self._entries.pop(old_name)
+        self._entries.pop(new_name, None)
+        self._entries[new_name] = entry
+
+    def move(self, name, directory=""):
+        """
+        Moves a member into a directory (the archive root by default), keeping its base name.
+
+        Returns:
+            str: The member's new virtual path.
+        """
+        new_name = posixpath.join(directory, posixpath.basename(name)) if directory else posixpath.basename(name)
+        self.rename(name, new_name)
+        return new_name
+
+    def flatten(self):
+        """
+        Moves every member into the archive root. Later members win on base-name collisions.
+        """
+        for name in self.names():
+            self.move(name)
+
+    def iter_sorted(self):
+        """
+        Yields (name, binary stream) pairs in byte order of name; each stream is closed after use.
+        """
+        for name in self.sorted_names():
+            with self.open(name) as stream:
+                yield name, stream
+
+@contextmanager
+def open_archive(source):
+    """
+    Opens a path, bytes or file object as a ZipArchive for the duration of a with-block.
+
+    An existing ZipArchive is passed through and left open for its owner.
+    """
+    if isinstance(source, ZipArchive):
+        yield source
+        return
+    archive = ZipArchive(source)
+    try:
+        yield archive
+    finally:
+        archive.close()
@@ -0,0 +1,170 @@
+import re
+import struct
+from datetime import datetime, timedelta, timezone
+from zip_fs import open_archive
+
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+
+# Abbreviations that appear in questions; datetime.strptime's %Z only understands UTC/GMT
+TIMEZONES = {
+    "UTC": timezone.utc,
+    "GMT": timezone.utc,
+    "Z": timezone.utc,
+    "IST": IST,
+    "EST": timezone(timedelta(hours=-5), "EST"),
+    "EDT": timezone(timedelta(hours=-4), "EDT"),
+    "CST": timezone(timedelta(hours=-6), "CST"),
+    "CDT": timezone(timedelta(hours=-5), "CDT"),
+    "MST": timezone(timedelta(hours=-7), "MST"),
+    "MDT": timezone(timedelta(hours=-6), "MDT"),
+    "PST": timezone(timedelta(hours=-8), "PST"),
+    "PDT": timezone(timedelta(hours=-7), "PDT"),
+    "CET": timezone(timedelta(hours=1), "CET"),
+    "CEST": timezone(timedelta(hours=2), "CEST"),
+    "BST": timezone(timedelta(hours=1), "BST"),
+    "JST": timezone(timedelta(hours=9), "JST"),
+}
+
+EXTENDED_TIMESTAMP_ID = 0x5455
+
+class ZipEntry:
+    """
+    Size and modification time of one archive member, read from the central directory.
+
+    Args:
+        name (str): Member path inside the archive.
+        size (int): Uncompressed size in bytes.
+        compressed_size (int): Stored size in bytes.
+        modified (datetime): Timezone-aware modification time.
+        is_dir (bool): Whether the member is a directory entry.
+    """
+
+    def __init__(self, name, size, compressed_size, modified, is_dir):
+        self.name = name
+        self.size = size
+        self.compressed_size = compressed_size
+        self.modified = modified
+        self.is_dir = is_dir
+
+    def __repr__(self):
+        return f"ZipEntry({self.name!r}, size={self.size}, modified={self.modified.isoformat()})"
+
+def extended_timestamp(extra):
+    """
+    Returns the UTC modification time stored in an "UT" (0x5455) extra field, or None.
+
+    Args:
+        extra (bytes): The ZipInfo.extra field.
+
+    Returns:
+        int: Seconds since the epoch, or None if the field is absent or carries no mtime.
+    """
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, length = struct.unpack_from("<HH", extra, offset)
+        body = extra[offset + 4:offset + 4 + length]
+        if header_id == EXTENDED_TIMESTAMP_ID and len(body) >= 5 and body[0] & 0x01:
+            return struct.unpack_from("<i", body, 1)[0]
+        offset += 4 + length
+    return None
+
+def entry_from_info(info, archive_tz=IST):
+    """
+    Builds a ZipEntry from a ZipInfo.
+
+    The extended timestamp is exact UTC and is preferred. Otherwise the DOS date_time, which
+    records the creator's wall-clock time without a zone, is read as wall-clock time in archive_tz.
+    """
+    stamp = extended_timestamp(info.extra)
+    if stamp is not None:
+        modified = datetime.fromtimestamp(stamp, tz=timezone.utc).astimezone(archive_tz)
+    else:
+        modified = datetime(*info.date_time, tzinfo=archive_tz)
+    return ZipEntry(info.filename, info.file_size, info.compress_size, modified, info.is_dir())
+
+def iter_entries(source, archive_tz=IST, include_dirs=False):
+    """
+    Yields a ZipEntry for every member without decompressing anything.
+
+    Args:
+        source: Path to the ZIP file, its bytes, a file object or a ZipArchive.
+        archive_tz (tzinfo): Zone in which the archive's DOS timestamps were recorded.
+        include_dirs (bool): Also yield directory entries.
+    """
+    with open_archive(source) as archive:
+        for info in archive.infolist():
+            if info.is_dir() and not include_dirs:
+                continue
+            yield entry_from_info(info, archive_tz)
+
+def parse_datetime(text, tz=IST, formats=("%a, %d %b, %Y, %I:%M %p", "%a, %d %b %Y, %I:%M %p",
+                                          "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")):
+    """
+    Parses a date as written in a question, honouring a trailing zone abbreviation such as "IST".
+
+    Args:
+        text (str): e.g. "Tue, 27 Mar, 2007, 10:13 pm IST".
+        tz (tzinfo): Zone assumed when the text names none.
+        formats (tuple): strptime formats tried in order, without the zone.
+
+    Returns:
+        datetime: A timezone-aware datetime.
+    """
+    text = text.strip()
+    match = re.search(r"\s+([A-Za-z]{1,5})$", text)
+    if match and match.group(1).upper() in TIMEZONES:
+        tz = TIMEZONES[match.group(1).upper()]
+        text = text[:match.start()]
+    for fmt in formats:
+        try:
+            return datetime.strptime(text, fmt).replace(tzinfo=tz)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {text!r}")
+
+def _aware(moment, tz):
+    return moment.replace(tzinfo=tz) if moment.tzinfo is None else moment
+
+def select_entries(source, min_size=None, max_size=None, modified_after=None, modified_before=None,
+                   predicate=None, archive_tz=IST):
+    """
+    Returns the file entries matching every given criterion.
+
+    Naive datetimes are taken to be in archive_tz. Bounds are inclusive.
+
+    Args:
+        source: Path to the ZIP file, its bytes, a file object or a ZipArchive.
+        min_size (int): Smallest size in bytes.
+        max_size (int): Largest size in bytes.
+        modified_after (datetime): Earliest modification time.
+        modified_before (datetime): Latest modification time.
+        predicate (callable): Extra test called with each ZipEntry.
+        archive_tz (tzinfo): Zone in which the archive's DOS timestamps were recorded.
+
+    Returns:
+        list: Matching ZipEntry objects in archive order.
+    """
+    if modified_after is not None:
+        modified_after = _aware(modified_after, archive_tz)
+    if modified_before is not None:
+        modified_before = _aware(modified_before, archive_tz)
+    selected = []
+    for entry in iter_entries(source, archive_tz):
+        if min_size is not None and entry.size < min_size:
+            continue
+        if max_size is not None and entry.size > max_size:
+            continue
+        if modified_after is not None and entry.modified < modified_after:
+            continue
+        if modified_before is not None and entry.modified > modified_before:
+            continue
+        if predicate is not None and not predicate(entry):
+            continue
+        selected.append(entry)
+    return selected
+
+def total_size(source, **criteria):
+    """
+    Returns the summed uncompressed size of the file entries matching select_entries(**criteria).
+    """
+    return sum(entry.size for entry in select_entries(source, **criteria))